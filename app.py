@@ -1,18 +1,33 @@
+import os
+import uuid
+from datetime import datetime
+
 import streamlit as st
 import numpy as np
-import joblib
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+
+# Keep these imports light: scikit-learn, scipy and matplotlib are only loaded on
+# the code paths that need them (first assessment, first chart)
+from healthcare import charts, metrics
+from healthcare.attributions import FEATURE_LABELS, explain
+from healthcare.cohort import get_reference_index
+from healthcare.drift import get_drift_monitor
+from healthcare.history import get_history_store
+from healthcare.compact import COMPACT_PATH
+from healthcare.neighbors import get_similar_patients
+from healthcare.result_cache import get_result_cache
+from healthcare.risk import health_score as compute_health_score
+from healthcare.rules import ACTION_PLANS, STATUS_TONES
+from healthcare.schema import FEATURES, HEART_MODEL_PATH, SCALER_PATH
+from healthcare.scoring import get_serving_scorer
+from healthcare.whatif import DEFAULT_TARGETS, what_if
 
 # Set page config MUST be the first Streamlit command
 st.set_page_config(page_title="Personalized Healthcare Recommendations", page_icon="💓", layout="wide")
 
-# Load trained model and scaler
-try:
-    model = joblib.load("heart_model.pkl")
-    scaler = joblib.load("scaler.pkl")
-except:
+# The trained model and scaler (pickles, or their compact export) are loaded on the first
+# assessment and then shared across sessions; only check they exist here so the first
+# page render stays fast
+if not (os.path.exists(HEART_MODEL_PATH) and os.path.exists(SCALER_PATH)) and not os.path.exists(COMPACT_PATH):
     st.error("❌ Model files not found. Please ensure 'heart_model.pkl' and 'scaler.pkl' are in the same directory.")
     st.stop()
 
@@ -220,11 +235,21 @@ if 'probability' not in st.session_state:
     st.session_state.probability = None
     st.session_state.risk_level = None
     st.session_state.risk_factors = None
+    # The inputs and results of the last "Analyze My Health"; the recommendation and analytics tabs
+    # render from this, so editing the form does not change (or rerun) them until the next analysis
+    st.session_state.assessment = None
 
-# Create tabs for different sections
-tab1, tab2, tab3 = st.tabs(["📊 HEALTH ASSESSMENT", "💡 RECOMENDATIONS", "📈 HEALTH ANALYTICS"])
+# History is kept per user; without sign-in the id lives in the page URL, so a bookmark keeps it
+if 'user_id' not in st.session_state:
+    st.session_state.user_id = st.query_params.get("user") or uuid.uuid4().hex[:12]
+    st.query_params["user"] = st.session_state.user_id
 
-with tab1:
+# Each section below is a function. The form and the goal tracker are fragments: moving one of
+# their widgets reruns only that fragment, not the CSS, the other tabs and their charts
+
+
+@st.fragment
+def assessment_form():
     st.header("Personal Health Assessment")
     
     col1, col2 = st.columns(2)
@@ -331,90 +356,122 @@ with tab1:
         key="bmi_input"
     )
     
-    # Prepare input data
-    input_data = np.array([[age, sex_encoded, cp_encoded, trestbps, chol, fbs_encoded, 
-                          restecg_encoded, thalachh, exang_encoded, oldpeak, 
-                          slope_encoded, ca, thal_encoded]])
-
-    # Calculate risk factors
-    risk_factors = 0
-    if age > 50: risk_factors += 1
-    if trestbps > 140: risk_factors += 1
-    if chol > 240: risk_factors += 1
-    if bmi > 30: risk_factors += 1
-    if smoking == "Current": risk_factors += 1
-    if exercise < 3: risk_factors += 1
-
     # Add some space before the button
     st.markdown("<br>", unsafe_allow_html=True)
     
-    if st.button("🔍 Analyze My Health", type="primary", use_container_width=True):
-        with st.spinner("Analyzing your health data and generating recommendations..."):
+    if st.button("🔍 Analyze My Health", type="primary", width="stretch"):
+        with metrics.session("assessment"), st.spinner("Analyzing your health data and generating recommendations..."):
+            metrics.count("assessments")
+            
+            # Prepare input data
+            with metrics.stage("input_assembly"):
+                input_data = np.array([[age, sex_encoded, cp_encoded, trestbps, chol, fbs_encoded, 
+                                      restecg_encoded, thalachh, exang_encoded, oldpeak, 
+                                      slope_encoded, ca, thal_encoded]])
             
-            # Scale input and make prediction
-            scaled_input = scaler.transform(input_data)
-            prediction = model.predict(scaled_input)
-            prediction_proba = model.predict_proba(scaled_input)
+            # Load the model selected by HEALTHCARE_MODEL on first use (logistic by default)
+            try:
+                with metrics.stage("model_load"):
+                    scorer = get_serving_scorer()
+            except Exception:
+                metrics.count("model_load_errors")
+                st.error("❌ Could not load the model files. Please check 'heart_model.pkl', 'scaler.pkl' and 'healthcare_recommendation_model.pkl'.")
+                st.stop()
             
-            probability = prediction_proba[0][1]  # Probability of heart disease
+            # Score the inputs and evaluate risk factors, health indicators and profile-specific
+            # recommendations, or reuse all of it from an identical earlier submission in any session
+            with metrics.stage("predict"):
+                form_inputs = dict(zip(FEATURES, input_data[0].tolist()),
+                                   bmi=bmi, exercise=exercise, smoking=smoking, alcohol=alcohol)
+                result = get_result_cache().assess_one(form_inputs, scorer)
+            probability = result["probability"]  # Probability of heart disease
+            risk_factors = result["risk_factors"]
+            
+            # Count the inputs and score towards the drift report (/drift on the metrics endpoint)
+            drift = get_drift_monitor()
+            if drift is not None:
+                with metrics.stage("drift_observe"):
+                    drift.observe(form_inputs, probability, scorer)
             
             # Store results in session state
             st.session_state.probability = probability
             st.session_state.risk_factors = risk_factors
+            st.session_state.assessment = {
+                "inputs": form_inputs,
+                "input_data": input_data,
+                "rules": {
+                    "risk_factors": risk_factors,
+                    "risk_present": result["risk_present"],
+                    "indicators": result["indicators"],
+                    "recommendations": result["specific_recommendations"],
+                },
+            }
+            # A goal projection was computed from the previous inputs
+            st.session_state.pop("goal_projection", None)
             
-            # Determine risk level
-            if probability > 0.7 or risk_factors >= 4:
-                st.session_state.risk_level = "HIGH"
-            elif probability > 0.3 or risk_factors >= 2:
-                st.session_state.risk_level = "MEDIUM"
+            st.session_state.risk_level = result["risk_level"]
+            
+            # Keep the result for the trend chart in the analytics tab (written in the background)
+            history = get_history_store()
+            if history is not None:
+                with metrics.stage("history_append"):
+                    history.append_assessment(
+                        st.session_state.user_id, probability, st.session_state.risk_level, risk_factors,
+                        result["health_score"], trestbps=trestbps, chol=chol, bmi=bmi, thalachh=thalachh,
+                        exercise=exercise,
+                    )
+                st.session_state.history_pending = True
+        
+        # Every tab shows the new results: rerun the whole page once, which then displays them below
+        st.session_state.show_results = True
+        st.rerun()
+    
+    # Display results (until the form changes, as before)
+    if st.session_state.pop("show_results", False):
+        probability = st.session_state.probability
+        risk_factors = st.session_state.risk_factors
+        st.markdown("---")
+        st.header("📋 Health Assessment Results")
+        
+        col_result1, col_result2 = st.columns(2)
+        
+        with col_result1:
+            # Risk level display
+            risk_class = f"risk-{st.session_state.risk_level.lower()}"
+            emoji = "🚨" if st.session_state.risk_level == "HIGH" else "⚠️" if st.session_state.risk_level == "MEDIUM" else "✅"
+            
+            st.markdown(f"""
+            <div class="{risk_class}">
+                <h3 style="color: #000000;">{emoji} Risk Level: {st.session_state.risk_level}</h3>
+                <h4 style="color: #000000;">Heart Disease Probability: {probability:.1%}</h4>
+                <p style="color: #000000;">Identified Risk Factors: {risk_factors} out of 6</p>
+            </div>
+            """, unsafe_allow_html=True)
+            
+            # Probability gauge (rendered once per rounded probability and reused)
+            if charts.CHART_MODE == "native":
+                with metrics.stage("gauge_render"):
+                    gauge = charts.gauge_spec(probability)
+                with metrics.stage("gauge_transfer"):
+                    st.vega_lite_chart(gauge, width="stretch")
             else:
-                st.session_state.risk_level = "LOW"
+                with metrics.stage("gauge_render"):
+                    gauge = charts.gauge_png(probability)
+                with metrics.stage("gauge_transfer"):
+                    st.image(gauge, width="stretch")
             
-            # Display results
-            st.markdown("---")
-            st.header("📋 Health Assessment Results")
+        with col_result2:
+            st.subheader("Key Health Indicators")
             
-            col_result1, col_result2 = st.columns(2)
+            indicators = st.session_state.assessment["rules"]["indicators"]
+            tone_emoji = {"good": "🟢", "warning": "🟡", "critical": "🔴"}
             
-            with col_result1:
-                # Risk level display
-                risk_class = f"risk-{st.session_state.risk_level.lower()}"
-                emoji = "🚨" if st.session_state.risk_level == "HIGH" else "⚠️" if st.session_state.risk_level == "MEDIUM" else "✅"
-                
-                st.markdown(f"""
-                <div class="{risk_class}">
-                    <h3 style="color: #000000;">{emoji} Risk Level: {st.session_state.risk_level}</h3>
-                    <h4 style="color: #000000;">Heart Disease Probability: {probability:.1%}</h4>
-                    <p style="color: #000000;">Identified Risk Factors: {risk_factors} out of 6</p>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Probability gauge
-                fig, ax = plt.subplots(figsize=(8, 2))
-                ax.barh([0], [probability], color='red' if probability > 0.5 else 'orange' if probability > 0.3 else 'green')
-                ax.set_xlim(0, 1)
-                ax.set_xlabel('Heart Disease Probability')
-                ax.set_yticklabels([])
-                ax.set_title('Risk Probability Gauge')
-                st.pyplot(fig)
-                
-            with col_result2:
-                st.subheader("Key Health Indicators")
-                
-                indicators = {
-                    "Blood Pressure": "Normal" if trestbps < 120 else "Elevated" if trestbps < 130 else "High",
-                    "Cholesterol": "Normal" if chol < 200 else "Borderline" if chol < 240 else "High",
-                    "Max Heart Rate": "Good" if thalachh > 150 else "Average" if thalachh > 130 else "Low",
-                    "BMI": "Normal" if 18.5 <= bmi <= 24.9 else "Overweight" if bmi <= 29.9 else "Obese",
-                    "Exercise": "Active" if exercise >= 5 else "Moderate" if exercise >= 3 else "Sedentary",
-                    "Smoking": "Non-smoker" if smoking == "Never" else "Former smoker" if smoking == "Former" else "Current smoker"
-                }
-                
-                for indicator, status in indicators.items():
-                    color = "🟢" if status in ["Normal", "Good", "Active", "Non-smoker"] else "🟡" if status in ["Average", "Moderate", "Borderline", "Overweight", "Former smoker"] else "🔴"
-                    st.write(f"{color} **{indicator}:** {status}")
+            for indicator, status in indicators.items():
+                color = tone_emoji[STATUS_TONES[status]]
+                st.write(f"{color} **{indicator}:** {status}")
 
-with tab2:
+
+def recommendations():
     st.header("💡 Personalized Recommendations")
     
     if st.session_state.probability is not None:
@@ -426,18 +483,6 @@ with tab2:
             </div>
             """, unsafe_allow_html=True)
             
-            recommendations = [
-                "🩺 **Consult a cardiologist immediately** for comprehensive evaluation",
-                "💊 **Discuss medication options** with your healthcare provider",
-                "🏥 **Schedule diagnostic tests**: ECG, Stress Test, Echocardiogram",
-                "📱 **Monitor vital signs daily**: Blood pressure and heart rate",
-                "🚭 **Quit smoking immediately** and avoid secondhand smoke",
-                "🥗 **Adopt strict heart-healthy diet**: Low sodium, low cholesterol",
-                "🏃 **Start supervised exercise program** with medical clearance",
-                "😴 **Ensure 7-8 hours of quality sleep** nightly",
-                "⚖️ **Achieve and maintain healthy weight** (BMI 18.5-24.9)"
-            ]
-            
         elif st.session_state.risk_level == "MEDIUM":
             st.markdown("""
             <div class="risk-medium">
@@ -445,36 +490,14 @@ with tab2:
             </div>
             """, unsafe_allow_html=True)
             
-            recommendations = [
-                "🩺 **Regular check-ups** with primary care physician every 6 months",
-                "🏃 **Moderate exercise** 30 minutes daily, 5 days/week",
-                "🥗 **Heart-healthy diet**: Focus on fruits, vegetables, whole grains",
-                "⚖️ **Weight management** through balanced diet and exercise",
-                "🚭 **Smoking cessation** program if applicable",
-                "🍷 **Limit alcohol** to moderate levels",
-                "😊 **Stress management**: Meditation, yoga, or relaxation techniques",
-                "📊 **Monitor health metrics** regularly",
-                "💤 **Quality sleep** 7-8 hours per night"
-            ]
-            
         else:
             st.markdown("""
             <div class="risk-low">
             <h3 style="color: #000000;">✅ Low Risk Maintenance</h3>
             </div>
             """, unsafe_allow_html=True)
-            
-            recommendations = [
-                "✅ **Continue current healthy lifestyle** habits",
-                "🏃 **Maintain regular physical activity** routine",
-                "🥗 **Balanced nutrition** with variety of whole foods",
-                "🩺 **Annual health check-ups** for prevention",
-                "😊 **Stress management** and work-life balance",
-                "💤 **Consistent sleep schedule**",
-                "🚭 **Avoid smoking** and limit alcohol",
-                "📚 **Stay informed** about heart health",
-                "🎯 **Set health goals** for continuous improvement"
-            ]
+        
+        recommendations = ACTION_PLANS[st.session_state.risk_level]
         
         # Display recommendations
         st.subheader("📝 Your Personalized Action Plan")
@@ -484,59 +507,171 @@ with tab2:
         # Specific recommendations
         st.subheader("🔍 Specific Recommendations Based on Your Profile")
         
-        specific_recommendations = []
-        if trestbps > 140:
-            specific_recommendations.append("**Blood Pressure**: Reduce sodium intake, monitor BP daily")
-        if chol > 240:
-            specific_recommendations.append("**Cholesterol**: Increase soluble fiber, reduce saturated fats")
-        if bmi > 30:
-            specific_recommendations.append("**Weight**: Aim for 5-10% weight loss through diet and exercise")
-        if exercise < 3:
-            specific_recommendations.append("**Activity**: Gradually increase to 150 minutes of moderate exercise weekly")
-        if smoking == "Current":
-            specific_recommendations.append("**Smoking**: Seek smoking cessation support immediately")
-        if alcohol == "Heavy":
-            specific_recommendations.append("**Alcohol**: Reduce alcohol consumption to moderate levels")
+        specific_recommendations = st.session_state.assessment["rules"]["recommendations"]
         
         if specific_recommendations:
             for rec in specific_recommendations:
                 st.write(f"• {rec}")
         else:
             st.write("• No specific additional recommendations - keep up the good work!")
+        
+        # Most similar patients in the reference data, in the model's standardized feature space
+        st.subheader("👥 Similar Patients in the Reference Data")
+        with metrics.stage("similar_patients"):
+            similar = get_similar_patients().similar(st.session_state.assessment["input_data"][0], k=5)
+        st.dataframe([
+            {
+                "Age": int(patient["age"]),
+                "Sex": "Male" if patient["sex"] == 1 else "Female",
+                "Blood Pressure": int(patient["trestbps"]),
+                "Cholesterol": int(patient["chol"]),
+                "Max Heart Rate": int(patient["thalachh"]),
+                "Distance": round(patient["distance"], 2),
+                "Outcome": "Heart disease" if patient["target"] == 1 else "No heart disease",
+            }
+            for patient in similar
+        ], width="stretch", hide_index=True)
+        affected = sum(patient["target"] for patient in similar)
+        st.caption(f"{affected} of the {len(similar)} most similar patients had heart disease.")
             
     else:
         st.info("Please complete the health assessment in the first tab to get personalized recommendations.")
 
-with tab3:
+@st.fragment
+def goal_tracker():
+    # Progress tracking
+    st.subheader("📊 Health Improvement Tracker")
+    st.info("Set goals and track your progress over time")
+    
+    col_track1, col_track2, col_track3, col_track4, col_track5 = st.columns(5)
+    
+    with col_track1:
+        st.write("**Target Blood Pressure**")
+        target_bp = st.number_input("Target BP (mm Hg)", 80, 200, DEFAULT_TARGETS["trestbps"], key="target_bp")
+    with col_track2:
+        st.write("**Target Cholesterol**")
+        target_chol = st.number_input("Target Cholesterol", 100, 600, DEFAULT_TARGETS["chol"], key="target_chol")
+    with col_track3:
+        st.write("**Target BMI**")
+        target_bmi = st.number_input("Target BMI", 15.0, 50.0, DEFAULT_TARGETS["bmi"], step=0.1, key="target_bmi")
+    with col_track4:
+        st.write("**Target Max Heart Rate**")
+        target_hr = st.number_input("Target Max HR (bpm)", 60, 250, DEFAULT_TARGETS["thalachh"], key="target_hr")
+    with col_track5:
+        st.write("**Target Exercise**")
+        target_exercise = st.number_input("Target Hours / Week", 0, 20, DEFAULT_TARGETS["exercise"], key="target_exercise")
+    
+    if st.button("Set Health Goals", key="set_goals"):
+        # Score every combination of partial progress toward the goals in one batch
+        with metrics.session("goal_projection"), metrics.stage("what_if"):
+            st.session_state.goal_projection = what_if(st.session_state.assessment["inputs"], {
+                "trestbps": target_bp, "chol": target_chol, "thalachh": target_hr,
+                "exercise": target_exercise, "bmi": target_bmi,
+            })
+        history = get_history_store()
+        if history is not None:
+            history.append_goals(st.session_state.user_id, target_bp=target_bp, target_chol=target_chol,
+                                 target_bmi=target_bmi, target_hr=target_hr, target_exercise=target_exercise)
+            st.session_state.history_pending = True
+        st.success("Health goals set! Track your progress regularly.")
+    
+    projection = st.session_state.get("goal_projection")
+    if projection is not None:
+        current, goal = projection.current, projection.goal
+        st.write(f"**Projected outcome across {len(projection):,} combinations of progress toward your goals**")
+        col_goal1, col_goal2, col_goal3 = st.columns(3)
+        col_goal1.metric("Probability at Goal", f"{goal['probability']:.1%}",
+                         f"{goal['probability'] - current['probability']:+.1%}", delta_color="inverse")
+        col_goal2.metric("Risk Level at Goal", goal["risk_level"])
+        col_goal3.metric("Risk Factors at Goal", goal["risk_factors"],
+                         goal["risk_factors"] - current["risk_factors"], delta_color="inverse")
+        
+        goal_labels = {"trestbps": "Blood Pressure", "chol": "Cholesterol", "thalachh": "Max Heart Rate",
+                       "exercise": "Exercise", "bmi": "BMI"}
+        st.dataframe([
+            {
+                "Goal reached on its own": goal_labels[name],
+                "Target": str(outcome[name]),
+                "Probability": f"{outcome['probability']:.1%}",
+                "Risk Factors": outcome["risk_factors"],
+                "Risk Level": outcome["risk_level"],
+            }
+            for name, outcome in projection.single_goals().items()
+        ], width="stretch", hide_index=True)
+        st.vega_lite_chart(charts.goal_path_spec([step["probability"] for step in projection.path()]),
+                           width="stretch")
+    
+    # Trend over every saved assessment of this user (one indexed range read)
+    history = get_history_store()
+    if history is not None:
+        st.subheader("📅 Your Assessment History")
+        with metrics.stage("history_read"):
+            if st.session_state.pop("history_pending", False):
+                history.flush(timeout=1.0)
+            past = history.assessments(st.session_state.user_id)
+            latest_goals = history.latest_goals(st.session_state.user_id)
+        if len(past["ts"]) > 1:
+            st.vega_lite_chart(charts.history_spec(past["ts"], past["probability"], past["health_score"]),
+                               width="stretch")
+            st.caption(f"{len(past['ts'])} assessments since {datetime.fromtimestamp(past['ts'][0]):%d %b %Y}")
+        else:
+            st.info("Each assessment you run is saved here, so you can follow your trend over time. "
+                    "Bookmark this page: its link identifies your history.")
+        if latest_goals is not None and past["ts"]:
+            st.write(f"**Latest results against the goals you set on "
+                     f"{datetime.fromtimestamp(latest_goals['ts']):%d %b %Y}**")
+            st.dataframe([
+                {"Measure": label, "Latest": past[column][-1], "Target": latest_goals[target]}
+                for label, column, target in (
+                    ("Blood Pressure", "trestbps", "target_bp"),
+                    ("Cholesterol", "chol", "target_chol"),
+                    ("BMI", "bmi", "target_bmi"),
+                    ("Max Heart Rate", "thalachh", "target_hr"),
+                    ("Exercise (hours / week)", "exercise", "target_exercise"),
+                )
+            ], width="stretch", hide_index=True)
+
+
+def analytics():
     st.header("📈 Health Analytics & Insights")
     
     if st.session_state.probability is not None:
+        assessment = st.session_state.assessment
+        inputs = assessment["inputs"]
         col_anal1, col_anal2 = st.columns(2)
         
         with col_anal1:
             st.subheader("Risk Factor Analysis")
             
-            # Create risk factors chart
-            risk_data = {
-                'Factor': ['Age > 50', 'BP > 140', 'Chol > 240', 'BMI > 30', 'Smoking', 'Low Exercise'],
-                'Risk Present': [age > 50, trestbps > 140, chol > 240, bmi > 30, smoking == "Current", exercise < 3]
-            }
-            risk_df = pd.DataFrame(risk_data)
+            # Create risk factors chart (one cached image per combination of risk factors)
+            if charts.CHART_MODE == "native":
+                with metrics.stage("risk_chart_render"):
+                    risk_chart = charts.risk_factors_spec(assessment["rules"]["risk_present"])
+                with metrics.stage("risk_chart_transfer"):
+                    st.vega_lite_chart(risk_chart, width="stretch")
+            else:
+                with metrics.stage("risk_chart_render"):
+                    risk_chart = charts.risk_factors_png(assessment["rules"]["risk_present"])
+                with metrics.stage("risk_chart_transfer"):
+                    st.image(risk_chart, width="stretch")
             
-            fig, ax = plt.subplots(figsize=(10, 6))
-            colors = ['red' if present else 'green' for present in risk_df['Risk Present']]
-            ax.barh(risk_df['Factor'], [1]*len(risk_df), color=colors)
-            ax.set_xlabel('Risk Impact')
-            ax.set_title('Your Risk Factors Analysis')
-            ax.set_xlim(0, 1)
-            st.pyplot(fig)
+            # How each of the 13 model inputs moved this prediction, from the same attributions as batch scoring
+            with metrics.stage("attributions"):
+                drivers = explain(assessment["input_data"], get_serving_scorer())
+                top_drivers = [(FEATURE_LABELS[name], value) for name, value in drivers.row(0, k=8)]
+            units = "log-odds" if drivers.units == "logit" else "probability"
+            if charts.CHART_MODE == "native":
+                st.vega_lite_chart(charts.contributions_spec(top_drivers, units), width="stretch")
+            else:
+                st.image(charts.contributions_png(top_drivers, units), width="stretch")
+            st.caption(f"The model's largest influences on your result, in {units}: "
+                       "red bars raise the predicted risk, green bars lower it.")
         
         with col_anal2:
             st.subheader("Health Score Comparison")
             
             # Calculate health score
-            health_score = 100 - (st.session_state.risk_factors * 15) - (st.session_state.probability * 20)
-            health_score = max(0, min(100, health_score))
+            health_score = float(compute_health_score(st.session_state.probability, st.session_state.risk_factors))
             
             st.metric("Overall Health Score", f"{health_score:.0f}/100")
             
@@ -546,29 +681,38 @@ with tab3:
                 st.warning("Good health with some areas for improvement")
             else:
                 st.error("Needs significant health improvements")
+            
+            # Where this patient sits among people of the same sex and age band in the reference data
+            with metrics.stage("cohort_percentiles"):
+                cohort = get_reference_index(get_serving_scorer()).query(
+                    inputs["age"], inputs["sex"], probability=st.session_state.probability,
+                    chol=inputs["chol"], trestbps=inputs["trestbps"], thalachh=inputs["thalachh"],
+                )
+            st.write(f"**Compared with {cohort['group_size']} people in the reference data ({cohort['group']})**")
+            pct1, pct2 = st.columns(2)
+            pct1.metric("Predicted risk percentile", f"{cohort['probability']:.0f}")
+            pct2.metric("Cholesterol percentile", f"{cohort['chol']:.0f}")
+            pct1.metric("Blood Pressure percentile", f"{cohort['trestbps']:.0f}")
+            pct2.metric("Max Heart Rate percentile", f"{cohort['thalachh']:.0f}")
         
-        # Progress tracking
-        st.subheader("📊 Health Improvement Tracker")
-        st.info("Set goals and track your progress over time")
-        
-        col_track1, col_track2, col_track3 = st.columns(3)
-        
-        with col_track1:
-            st.write("**Target Blood Pressure**")
-            target_bp = st.number_input("Target BP (mm Hg)", 80, 200, 120, key="target_bp")
-        with col_track2:
-            st.write("**Target Cholesterol**")
-            target_chol = st.number_input("Target Cholesterol", 100, 600, 200, key="target_chol")
-        with col_track3:
-            st.write("**Target BMI**")
-            target_bmi = st.number_input("Target BMI", 15.0, 50.0, 22.0, step=0.1, key="target_bmi")
-        
-        if st.button("Set Health Goals", key="set_goals"):
-            st.success("Health goals set! Track your progress regularly.")
+        goal_tracker()
     
     else:
         st.info("Complete the health assessment to see your analytics and insights.")
 
+
+# Create tabs for different sections
+tab1, tab2, tab3 = st.tabs(["📊 HEALTH ASSESSMENT", "💡 RECOMENDATIONS", "📈 HEALTH ANALYTICS"])
+
+with tab1:
+    assessment_form()
+
+with tab2:
+    recommendations()
+
+with tab3:
+    analytics()
+
 # Footer
 st.markdown("---")
 st.markdown("""
@@ -0,0 +1,93 @@
+"""Batch attribution throughput for both models, with exactness checks.
+
+    python benchmarks/bench_attributions.py [--rows 100000] [--check-rows 20]
+
+Times :func:`~healthcare.attributions.explain` over ``--rows`` reference-like
+patients for the logistic model and the random forest, and checks that
+
+* every row's contributions add up (with the base) to the model's logit or
+  probability, and
+* for ``--check-rows`` rows the forest's contributions match a per-row,
+  per-tree walk of the fitted scikit-learn trees via ``decision_path``.
+"""
+
+import argparse
+import sys
+import time
+import warnings
+
+import numpy as np
+
+from common import reference_patients
+
+from healthcare.attributions import explain
+from healthcare.forest import get_forest_scorer
+from healthcare.registry import load_forest_model, load_scaler
+from healthcare.schema import FEATURES
+from healthcare.scoring import get_scorer
+
+warnings.filterwarnings("ignore")
+
+TOLERANCE = 1e-9
+
+
+def reference_forest_contributions(X, scaler, forest):
+    """Saabas contributions the slow way: one row, one tree, one path at a time."""
+    scaled = scaler.transform(X).astype(np.float32)
+    out = np.zeros(X.shape)
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        value = tree.value[:, 0, 1] / tree.value[:, 0, :].sum(axis=1)
+        paths = estimator.decision_path(scaled)
+        for i in range(len(X)):
+            nodes = paths.indices[paths.indptr[i]:paths.indptr[i + 1]]
+            for parent, child in zip(nodes[:-1], nodes[1:]):
+                out[i, tree.feature[parent]] += value[child] - value[parent]
+    return out / len(forest.estimators_)
+
+
+def _time(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--check-rows", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    X = reference_patients(args.rows, seed=0)[FEATURES].to_numpy(dtype=np.float64)
+    failures = 0
+    for name, scorer in (("logistic", get_scorer()), ("forest", get_forest_scorer())):
+        explain(X[:100], scorer)  # warm up
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            attributions = explain(X, scorer)
+            timings.append(time.perf_counter() - start)
+        predict_seconds = min(_time(lambda: scorer.predict(X)) for _ in range(args.repeat))
+        seconds = min(timings)
+        print(f"{name:9s} {args.rows:,} rows in {seconds:.3f}s ({args.rows / seconds:,.0f} rows/s; "
+              f"predict alone {predict_seconds:.3f}s)")
+
+        expected = scorer.decision_function(X) if attributions.units == "logit" else scorer.predict(X)[1]
+        error = np.abs(attributions.total() - expected).max()
+        if error > TOLERANCE:
+            print(f"FAIL: {name} contributions do not add up to the prediction (max error {error:.2e})")
+            failures += 1
+
+    rows = X[:args.check_rows]
+    reference = reference_forest_contributions(rows, load_scaler(), load_forest_model())
+    error = np.abs(explain(rows, get_forest_scorer()).contributions - reference).max()
+    print(f"forest contributions vs per-row decision_path walk on {len(rows)} rows: max error {error:.2e}")
+    if error > TOLERANCE:
+        print("FAIL: forest contributions differ from the reference walk")
+        failures += 1
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
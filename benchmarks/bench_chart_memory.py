@@ -0,0 +1,100 @@
+"""Resident-memory growth of chart rendering over many simulated assessments.
+
+    python benchmarks/bench_chart_memory.py [--assessments 10000] [--legacy 300]
+
+Renders both assessment charts through ``healthcare.charts`` for every
+simulated assessment and samples RSS as it goes. Exits non-zero if RSS grows
+by more than ``--budget-mb`` after warm-up. ``--legacy`` runs that many
+assessments through the old never-closed ``plt.subplots`` pattern for
+comparison.
+"""
+
+import argparse
+import io
+import resource
+import sys
+import time
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np  # noqa: E402
+
+from common import synthetic_patients  # noqa: E402
+
+from healthcare import charts  # noqa: E402
+from healthcare.rules import default_engine  # noqa: E402
+from healthcare.scoring import get_scorer  # noqa: E402
+from healthcare.schema import FEATURES  # noqa: E402
+
+
+def rss_mb():
+    with open("/proc/self/statm") as fh:
+        pages = int(fh.read().split()[1])
+    return pages * resource.getpagesize() / 2**20
+
+
+def legacy_render(probability, risk_present):
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(8, 2))
+    ax.barh([0], [probability], color=charts.gauge_color(probability))
+    fig.savefig(io.BytesIO(), format="png")
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.barh(list(risk_present), [1] * len(risk_present),
+            color=['red' if flag else 'green' for flag in risk_present.values()])
+    fig.savefig(io.BytesIO(), format="png")
+
+
+def simulated_assessments(n):
+    patients = synthetic_patients(n, seed=7)
+    _, probability = get_scorer().predict(patients[FEATURES].to_numpy(dtype=np.float64))
+    rules = default_engine.evaluate(patients)
+    for i in range(n):
+        yield probability[i], rules.row(i)["risk_present"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--assessments", type=int, default=10_000)
+    parser.add_argument("--warmup", type=int, default=2_000)
+    parser.add_argument("--budget-mb", type=float, default=5.0)
+    parser.add_argument("--legacy", type=int, default=300)
+    args = parser.parse_args(argv)
+
+    samples = []
+    start = time.perf_counter()
+    for i, (probability, risk_present) in enumerate(simulated_assessments(args.assessments), 1):
+        charts.gauge_png(probability)
+        charts.risk_factors_png(risk_present)
+        if i % 1000 == 0:
+            samples.append((i, rss_mb()))
+    elapsed = time.perf_counter() - start
+
+    for i, rss in samples:
+        print(f"after {i:6,} assessments: RSS {rss:7.1f} MB")
+    info = charts.cache_info()
+    print(f"{args.assessments:,} assessments in {elapsed:.2f}s "
+          f"({elapsed / args.assessments * 1e3:.3f} ms each); "
+          f"gauge hits {info['gauge'].hits:,}/{info['gauge'].hits + info['gauge'].misses:,}, "
+          f"risk chart hits {info['risk_factors'].hits:,}/{info['risk_factors'].hits + info['risk_factors'].misses:,}")
+
+    baseline = next((rss for i, rss in samples if i >= args.warmup), samples[0][1])
+    growth = samples[-1][1] - baseline
+    print(f"RSS growth after warm-up: {growth:+.1f} MB (budget {args.budget_mb} MB)")
+
+    if args.legacy:
+        before = rss_mb()
+        start = time.perf_counter()
+        for _, (probability, risk_present) in zip(range(args.legacy), simulated_assessments(args.legacy)):
+            legacy_render(probability, risk_present)
+        elapsed = time.perf_counter() - start
+        print(f"legacy plt.subplots path: {args.legacy} assessments, "
+              f"{elapsed / args.legacy * 1e3:.1f} ms each, RSS {rss_mb() - before:+.1f} MB")
+
+    return 1 if growth > args.budget_mb else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""Percentile lookups against reference cohorts of growing size.
+
+    python benchmarks/bench_cohort.py [--sizes 100000 1000000 5000000] [--queries 2000] [--reference data.csv]
+
+Checks the index against a direct scan of the reference dataset (``--reference``,
+by default the one the app uses), then builds
+indexes over synthetic cohorts of increasing size and times a single-patient
+query for each. Query latency should stay flat as the cohort grows; the scan
+it replaces is shown for comparison.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from common import synthetic_patients
+
+from healthcare.cohort import METRICS, MIN_GROUP_SIZE, REFERENCE_PATH, PercentileIndex, age_band
+from healthcare.schema import FEATURES
+from healthcare.scoring import get_scorer
+
+TOLERANCE = 1e-9
+
+
+def scan_percentiles(columns, age, sex, values):
+    """The per-request computation the index replaces: filter the group, then count."""
+    group = (age_band(columns["age"]) == age_band(age)) & (columns["sex"] == sex)
+    if group.sum() < MIN_GROUP_SIZE:
+        group = np.ones(len(group), dtype=bool)
+    n = group.sum()
+    result = {}
+    for name, value in values.items():
+        column = columns[name][group]
+        result[name] = 100.0 * ((column < value).sum() + (column <= value).sum()) / (2 * n)
+    return result
+
+
+def cohort_columns(frame, scorer):
+    _, probability = scorer.predict(frame[FEATURES].to_numpy(dtype=np.float64))
+    columns = {name: frame[name].to_numpy(dtype=np.float64) for name in ("age", "sex", "chol", "trestbps", "thalachh")}
+    columns["probability"] = probability
+    return columns
+
+
+def per_query_seconds(fn, queries):
+    start = time.perf_counter()
+    for query in queries:
+        fn(query)
+    return (time.perf_counter() - start) / len(queries)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 5_000_000])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--reference", default=REFERENCE_PATH, help="reference CSV to check the index against")
+    args = parser.parse_args(argv)
+
+    scorer = get_scorer()
+    patients = cohort_columns(synthetic_patients(args.queries, seed=99), scorer)
+    queries = [
+        (patients["age"][i], patients["sex"][i], {name: patients[name][i] for name in METRICS})
+        for i in range(args.queries)
+    ]
+
+    reference = cohort_columns(pd.read_csv(args.reference), scorer)
+    index = PercentileIndex.build(reference["age"], reference["sex"], {name: reference[name] for name in METRICS})
+    error = 0.0
+    for age, sex, values in queries:
+        got = index.query(age, sex, **values)
+        expected = scan_percentiles(reference, age, sex, values)
+        error = max(error, max(abs(got[name] - expected[name]) for name in METRICS))
+    print(f"parity: max |d percentile| = {error:.3e} over {len(queries):,} queries")
+    if error > TOLERANCE:
+        print("FAIL: index disagrees with a direct scan")
+        return 1
+
+    cohorts = [("reference", reference)]
+    for size in args.sizes:
+        cohorts.append((f"{size:,}", cohort_columns(synthetic_patients(size, seed=size), scorer)))
+
+    print(f"{'cohort':>12s} {'build':>9s} {'index':>10s} {'query':>11s} {'scan':>11s}")
+    for label, columns in cohorts:
+        start = time.perf_counter()
+        index = PercentileIndex.build(columns["age"], columns["sex"], {name: columns[name] for name in METRICS})
+        build = time.perf_counter() - start
+        nbytes = sum(v.nbytes for v in index.values.values()) + index.offsets.nbytes
+        query = per_query_seconds(lambda q: index.query(q[0], q[1], **q[2]), queries)
+        # Scanning is slow on large cohorts; a handful of queries is enough to time it
+        scan = per_query_seconds(lambda q: scan_percentiles(columns, q[0], q[1], q[2]), queries[:20])
+        print(f"{label:>12s} {build:8.2f}s {nbytes / 2**20:7.1f}MiB {query * 1e6:8.1f} us {scan * 1e6:8.0f} us")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
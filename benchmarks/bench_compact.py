@@ -0,0 +1,113 @@
+"""Compact memory-mapped artifacts against the joblib pickles.
+
+    python benchmarks/bench_compact.py
+
+Exports the artifacts to a temporary compact file and checks that both
+scorers built from it give exactly the predictions of the ones built from the
+pickles. Then, in a fresh interpreter per format, measures load time and how
+much private (anonymous) memory loading and scoring adds to the process;
+mapped weights show up as shared file-backed pages instead.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+from common import reference_patients
+
+from healthcare import compact
+from healthcare.forest import ForestScorer
+from healthcare.registry import load_forest_model, load_heart_model, load_scaler
+from healthcare.schema import FEATURES
+from healthcare.scoring import LinearScorer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, sys, time, warnings
+warnings.filterwarnings("ignore")
+sys.path.insert(0, {root!r})
+import numpy as np
+import scipy.special  # used by predict in both formats; keep its import out of the figures
+
+def status():
+    fields = {{}}
+    with open("/proc/self/status") as fh:
+        for line in fh:
+            name, _, value = line.partition(":")
+            if name in ("RssAnon", "RssFile"):
+                fields[name] = int(value.split()[0]) * 1024
+    return fields
+
+X = np.random.default_rng(0).uniform(0, 1, (1000, 13)) * 100
+if {mode!r} == "pickle":
+    import joblib, sklearn.ensemble, sklearn.linear_model, sklearn.preprocessing
+    from healthcare.forest import ForestScorer
+    from healthcare.scoring import LinearScorer
+    before = status()
+    start = time.perf_counter()
+    scaler, model, forest = (joblib.load(p) for p in {pickles!r})
+    seconds = time.perf_counter() - start
+    linear = LinearScorer.from_estimators(scaler, model)
+    flat = ForestScorer.from_estimators(scaler, forest)
+else:
+    from healthcare import compact
+    from healthcare.forest import ForestScorer
+    from healthcare.scoring import LinearScorer
+    before = status()
+    start = time.perf_counter()
+    models = compact.load({path!r})
+    seconds = time.perf_counter() - start
+    linear, flat = models.linear_scorer(), models.forest_scorer()
+linear.predict(X)
+flat.predict(X)
+after = status()
+print(json.dumps({{"seconds": seconds, "anon": after["RssAnon"] - before["RssAnon"],
+                  "file": after["RssFile"] - before["RssFile"]}}))
+"""
+
+
+def measure(mode, path):
+    from healthcare.schema import FOREST_MODEL_PATH, HEART_MODEL_PATH, SCALER_PATH
+
+    script = CHILD.format(root=ROOT, mode=mode, path=path, pickles=(SCALER_PATH, HEART_MODEL_PATH, FOREST_MODEL_PATH))
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    scaler, model, forest = load_scaler(), load_heart_model(), load_forest_model()
+    X = reference_patients(50_000)[FEATURES].to_numpy(dtype=np.float64)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "models.flat")
+        compact.export(path, scaler, model, forest)
+        models = compact.load(path)
+        print(f"compact file: {os.path.getsize(path) / 1024:.1f} KiB, {len(models.arrays)} arrays")
+
+        pairs = {
+            "logistic": (LinearScorer.from_estimators(scaler, model), models.linear_scorer()),
+            "forest": (ForestScorer.from_estimators(scaler, forest), models.forest_scorer()),
+        }
+        for name, (expected, mapped) in pairs.items():
+            (labels_a, proba_a), (labels_b, proba_b) = expected.predict(X), mapped.predict(X)
+            single = all(expected.predict_one(row) == mapped.predict_one(row) for row in X[:500])
+            if not (np.array_equal(proba_a, proba_b) and np.array_equal(labels_a, labels_b) and single):
+                print(f"FAIL: {name} predictions differ between the pickles and the compact file")
+                return 1
+            print(f"parity: {name} identical on {len(X):,} rows")
+
+        print(f"\n{'format':8s} {'load':>12s} {'private':>12s} {'mapped':>12s}")
+        for mode in ("pickle", "compact"):
+            m = measure(mode, path)
+            print(f"{mode:8s} {m['seconds'] * 1e3:9.3f} ms {m['anon'] / 1024:9.0f} KiB {m['file'] / 1024:9.0f} KiB")
+        del models
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
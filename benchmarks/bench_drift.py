@@ -0,0 +1,105 @@
+"""Per-assessment cost of the drift monitor, and whether it catches a shift.
+
+    python benchmarks/bench_drift.py [--rows 20000] [--batch 64]
+
+Counts ``--rows`` reference-like assessments into a
+:class:`~healthcare.drift.DriftMonitor` one at a time (as the app does) and in
+batches of ``--batch`` (as the scoring service does), and reports the cost per
+assessment next to scoring one assessment from the result cache and from the
+model. It then times a report, shows that the monitor's memory does not grow
+with the rows counted, and checks that a cohort with cholesterol raised by
+45 mg/dL and BMI by 4 is reported as drifted while the unshifted one is not.
+"""
+
+import argparse
+import sys
+import time
+import warnings
+
+import numpy as np
+
+from common import reference_patients
+
+from healthcare.assessment import assess_many, normalize_inputs
+from healthcare.drift import REFERENCE_ROWS, DriftMonitor
+from healthcare.registry import deep_nbytes
+from healthcare.result_cache import ResultCache
+from healthcare.scoring import get_serving_scorer
+
+warnings.filterwarnings("ignore")
+
+
+def assessments(n, seed, shift=False):
+    patients = reference_patients(n, seed=seed)
+    if shift:
+        patients["chol"] += 45
+        patients["bmi"] += 4
+    records = [normalize_inputs(row) for row in patients.to_dict("records")]
+    return records, [result["probability"] for result in assess_many(records)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--batch", type=int, default=64)
+    args = parser.parse_args(argv)
+
+    scorer = get_serving_scorer()
+    records, probabilities = assessments(args.rows, seed=1)
+
+    monitor = DriftMonitor()
+    monitor.observe(records[0], probabilities[0], scorer)  # builds the probability baseline
+    latencies = np.empty(args.rows)
+    for i, (record, probability) in enumerate(zip(records, probabilities)):
+        start = time.perf_counter()
+        monitor.observe(record, probability, scorer)
+        latencies[i] = time.perf_counter() - start
+        if i == args.rows // 2:
+            half_size = deep_nbytes(monitor._ring)
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1e6
+
+    batched = DriftMonitor()
+    start = time.perf_counter()
+    for i in range(0, args.rows, args.batch):
+        batched.observe_many(records[i:i + args.batch], probabilities[i:i + args.batch], scorer)
+    per_row = (time.perf_counter() - start) / args.rows * 1e6
+
+    cache = ResultCache()
+    sample = records[:1000]
+    start = time.perf_counter()
+    for record in sample:
+        cache.assess_one(record, scorer)
+    miss = (time.perf_counter() - start) / len(sample) * 1e6
+    start = time.perf_counter()
+    for record in sample:
+        cache.assess_one(record, scorer)
+    hit = (time.perf_counter() - start) / len(sample) * 1e6
+
+    print(f"observe():      p50 {p50:.1f} us  p99 {p99:.1f} us per assessment")
+    print(f"observe_many(): {per_row:.2f} us per assessment in batches of {args.batch}")
+    print(f"for scale:      assessment from the result cache {hit:.1f} us, scored by the model {miss:.0f} us")
+
+    start = time.perf_counter()
+    report = monitor.report()
+    print(f"report():       {(time.perf_counter() - start) * 1e3:.1f} ms for {len(report['fields'])} fields")
+    print(f"memory:         {half_size / 1024:.0f} KiB of counts after {args.rows // 2:,} assessments, "
+          f"{deep_nbytes(monitor._ring) / 1024:.0f} KiB after {args.rows:,}")
+
+    failures = 0
+    for name, shift, expected in (("unshifted", False, set()), ("shifted", True, {"chol", "bmi"})):
+        cohort = DriftMonitor()
+        cohort.observe_many(records[:REFERENCE_ROWS], probabilities[:REFERENCE_ROWS], scorer)
+        cohort.observe_many(*assessments(5_000, seed=2, shift=shift), scorer)
+        report = cohort.report()
+        fields = report["fields"]
+        print(f"{name:9s} cohort: drifted {report['drifted'] or 'none'}; "
+              f"PSI chol {fields['chol']['psi']:.3f} bmi {fields['bmi']['psi']:.3f} "
+              f"probability {fields['probability']['psi']:.3f}")
+        if not expected <= set(report["drifted"]) or (not expected and report["drifted"]):
+            print(f"FAIL: expected {sorted(expected) or 'no'} drifted fields")
+            failures += 1
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
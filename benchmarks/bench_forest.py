@@ -0,0 +1,96 @@
+"""Parity, latency and footprint of the flattened random forest.
+
+    python benchmarks/bench_forest.py [--rows 500] [--batch 100000]
+
+Checks ``ForestScorer`` against ``RandomForestClassifier`` probabilities and
+labels on the reference dataset and on synthetic form inputs, then compares
+single-row latency, batch throughput and resident size.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from common import synthetic_patients
+
+from healthcare.forest import ForestScorer
+from healthcare.registry import deep_nbytes, load_forest_model, load_scaler
+from healthcare.schema import DATA_PATH, FEATURES
+
+TOLERANCE = 1e-12
+
+
+def reference_proba(forest, scaled):
+    """Positive-class ``predict_proba`` with every tree's output normalized.
+
+    The shipped pickle was written by scikit-learn 1.3, whose trees store
+    class counts and whose ``predict_proba`` normalized them per tree. Newer
+    releases assume stored fractions and skip that step, so calling
+    ``predict_proba`` on the old pickle directly returns unnormalized sums.
+    Normalizing per tree reproduces the fitted model's probabilities under
+    either version.
+    """
+    total = np.zeros(len(scaled))
+    for estimator in forest.estimators_:
+        proba = estimator.predict_proba(scaled)
+        total += proba[:, 1] / proba.sum(axis=1)
+    return total / len(forest.estimators_)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--batch", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    scaler, forest = load_scaler(), load_forest_model()
+    start = time.perf_counter()
+    scorer = ForestScorer.from_estimators(scaler, forest)
+    flatten_seconds = time.perf_counter() - start
+
+    reference = pd.read_csv(DATA_PATH)[FEATURES].to_numpy(dtype=np.float64)
+    synthetic = synthetic_patients(20_000)[FEATURES].to_numpy(dtype=np.float64)
+    X = np.vstack([reference, synthetic])
+
+    scaled = scaler.transform(X)
+    expected = reference_proba(forest, scaled)
+    labels, probability = scorer.predict(X)
+    error = np.abs(probability - expected).max()
+    mismatches = int((labels != forest.classes_[(expected > 0.5).astype(int)]).sum())
+    print(f"parity: max |dp| = {error:.3e}, label mismatches = {mismatches} over {len(X):,} rows")
+    if error > TOLERANCE or mismatches:
+        print("FAIL: flattened forest disagrees with scikit-learn")
+        return 1
+
+    rows = synthetic[:args.rows]
+    start = time.perf_counter()
+    for row in rows:
+        forest.predict_proba(scaler.transform(row[None]))
+    sklearn_row = (time.perf_counter() - start) / len(rows)
+    start = time.perf_counter()
+    for row in rows:
+        scorer.predict_one(row)
+    flat_row = (time.perf_counter() - start) / len(rows)
+    print(f"single row:  sklearn {sklearn_row * 1e3:8.3f} ms   flattened {flat_row * 1e3:8.3f} ms")
+
+    big = synthetic_patients(args.batch, seed=1)[FEATURES].to_numpy(dtype=np.float64)
+    start = time.perf_counter()
+    forest.predict_proba(scaler.transform(big))
+    sklearn_batch = time.perf_counter() - start
+    start = time.perf_counter()
+    scorer.predict(big)
+    flat_batch = time.perf_counter() - start
+    print(f"batch {len(big):,}: sklearn {len(big) / sklearn_batch:12,.0f} rows/s   "
+          f"flattened {len(big) / flat_batch:12,.0f} rows/s")
+
+    print(f"footprint:   sklearn {deep_nbytes(forest) / 1024:8.1f} KiB   "
+          f"flattened {scorer.forest.nbytes / 1024:8.1f} KiB "
+          f"({len(scorer.forest.value):,} nodes, depth {scorer.forest.max_depth}, built in {flatten_seconds * 1e3:.1f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""Assessment history append throughput and per-user trend read latency.
+
+    python benchmarks/bench_history.py [--users 1000] [--per-user 1000] [--threads 16] [--seconds 5]
+
+Prefills a temporary database with ``--per-user`` daily assessments for each of
+``--users`` users (years of history), then:
+
+* appends from ``--threads`` concurrent threads for ``--seconds`` through
+  :class:`~healthcare.history.HistoryStore` and reports committed appends/sec
+  and the latency of the ``append_assessment`` call itself;
+* reads random users' full history, and their last 90 days, through the
+  ``(user_id, ts)`` index and, for comparison, with the index disabled.
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+import common  # noqa: F401
+
+from healthcare.history import ASSESSMENT_COLUMNS, HistoryStore
+
+DAY = 86_400.0
+
+
+def prefill(path, users, per_user):
+    rng = np.random.default_rng(0)
+    start = time.time() - per_user * DAY
+    connection = sqlite3.connect(path)
+    query = f"INSERT INTO assessments VALUES ({', '.join('?' * len(ASSESSMENT_COLUMNS))})"
+    for user in range(users):
+        p = rng.uniform(0, 1, per_user)
+        connection.executemany(query, (
+            (f"user{user}", start + day * DAY, float(p[day]), "LOW", 1, 100 - 60 * float(p[day]),
+             120.0, 200.0, 25.0, 150.0, 5.0)
+            for day in range(per_user)
+        ))
+    connection.commit()
+    connection.close()
+
+
+def append_load(store, threads, seconds, users):
+    latencies = [[] for _ in range(threads)]
+    stop = time.perf_counter() + seconds
+
+    def worker(out):
+        rnd = random.Random(len(out))
+        while time.perf_counter() < stop:
+            begin = time.perf_counter()
+            store.append_assessment(f"user{rnd.randrange(users)}", rnd.random(), "MEDIUM", 2, 70.0,
+                                    trestbps=130.0, chol=220.0, bmi=27.0, thalachh=140.0, exercise=3.0)
+            out.append(time.perf_counter() - begin)
+
+    before = store.committed
+    start = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(latencies[i],)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    store.flush()
+    elapsed = time.perf_counter() - start
+    return store.committed - before, elapsed, np.concatenate([np.array(out) for out in latencies])
+
+
+def time_reads(fn, users, repeat=50):
+    timings = []
+    for i in range(repeat):
+        user = f"user{(i * 7919) % users}"
+        start = time.perf_counter()
+        fn(user)
+        timings.append(time.perf_counter() - start)
+    return np.median(timings) * 1e3
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--per-user", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "history.sqlite3")
+        store = HistoryStore(path)
+        start = time.perf_counter()
+        prefill(path, args.users, args.per_user)
+        print(f"prefilled {args.users * args.per_user:,} assessments in {time.perf_counter() - start:.1f}s "
+              f"({os.path.getsize(path) / 2**20:.0f} MiB)")
+
+        committed, elapsed, latencies = append_load(store, args.threads, args.seconds, args.users)
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1e6
+        print(f"appends:      {committed / elapsed:,.0f}/s committed from {args.threads} threads "
+              f"in {store.batches:,} transactions; append() p50 {p50:.1f} us  p99 {p99:.1f} us")
+
+        recent = time.time() - 90 * DAY
+        full = time_reads(store.assessments, args.users)
+        last_90 = time_reads(lambda user: store.assessments(user, since=recent), args.users)
+        scan = sqlite3.connect(path)
+        unindexed = time_reads(lambda user: scan.execute(
+            "SELECT ts, probability, health_score FROM assessments NOT INDEXED WHERE user_id = ? ORDER BY ts",
+            (user,)).fetchall(), args.users, repeat=5)
+        print(f"trend read:   full history ({args.per_user:,} rows) {full:.2f} ms   last 90 days {last_90:.2f} ms   "
+              f"without the index {unindexed:.1f} ms")
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
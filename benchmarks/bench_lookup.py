@@ -0,0 +1,84 @@
+"""Lookup-table scoring against the compiled scorer and the scikit-learn path.
+
+    python benchmarks/bench_lookup.py [--rows 2000] [--batch 1000000]
+
+Builds the contribution table in a temporary directory, checks it against
+scikit-learn on on-grid and off-grid rows, then times single-row and batch
+scoring.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from common import synthetic_patients
+
+from healthcare.lookup import LookupScorer, save_table
+from healthcare.registry import load_heart_model, load_scaler
+from healthcare.schema import FEATURES
+from healthcare.scoring import get_scorer
+
+TOLERANCE = 1e-12
+
+
+def per_row_seconds(fn, rows):
+    start = time.perf_counter()
+    for row in rows:
+        fn(row)
+    return (time.perf_counter() - start) / len(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    scaler, model, compiled = load_scaler(), load_heart_model(), get_scorer()
+    with tempfile.TemporaryDirectory() as tmp:
+        table_path, header_path = os.path.join(tmp, "lut.npy"), os.path.join(tmp, "lut.json")
+        save_table(compiled, table_path, header_path)
+        lookup = LookupScorer.load(table_path, header_path, fallback=compiled)
+
+        on_grid = synthetic_patients(20_000)[FEATURES].to_numpy(dtype=np.float64)
+        off_grid = on_grid[:2000].copy()
+        off_grid[:, FEATURES.index("chol")] += 0.5
+        off_grid[:1000, FEATURES.index("age")] = 110
+        X = np.vstack([on_grid, off_grid])
+
+        expected = model.predict_proba(scaler.transform(X))[:, 1]
+        _, batch = lookup.predict(X)
+        single = np.array([lookup.predict_one(row)[1] for row in X])
+        error = max(np.abs(batch - expected).max(), np.abs(single - expected).max())
+        print(f"parity: max |dp| = {error:.3e} over {len(X):,} rows ({len(off_grid):,} off-grid)")
+        if error > TOLERANCE:
+            print("FAIL: lookup scorer disagrees with scikit-learn")
+            return 1
+
+        rows = on_grid[:args.rows]
+        timings = {
+            "scaler.transform + predict + predict_proba": per_row_seconds(
+                lambda row: (model.predict(scaler.transform(row[None])), model.predict_proba(scaler.transform(row[None]))),
+                rows),
+            "LinearScorer.predict_one": per_row_seconds(compiled.predict_one, rows),
+            "LookupScorer.predict_one": per_row_seconds(lookup.predict_one, rows),
+        }
+        for name, seconds in timings.items():
+            print(f"{name:44s} {seconds * 1e6:9.2f} us/row")
+
+        big = synthetic_patients(args.batch, seed=1)[FEATURES].to_numpy(dtype=np.float64)
+        for name, scorer in (("LinearScorer.predict", compiled), ("LookupScorer.predict", lookup)):
+            start = time.perf_counter()
+            scorer.predict(big)
+            elapsed = time.perf_counter() - start
+            print(f"{name:44s} {len(big) / elapsed:12,.0f} rows/s")
+        del lookup
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""Overhead of the metrics layer, disabled and enabled.
+
+    python benchmarks/bench_metrics.py [--iterations 1000000]
+
+Times an empty ``with metrics.stage(...)`` block and ``metrics.count`` against
+a bare loop, first with metrics disabled (the default) and then enabled, and
+the cost of a profiled ``metrics.session``.
+"""
+
+import argparse
+import sys
+import time
+
+import common  # noqa: F401  (puts the repo root on sys.path)
+
+from healthcare import metrics
+
+
+def per_call_ns(fn, iterations):
+    start = time.perf_counter()
+    fn(iterations)
+    return (time.perf_counter() - start) / iterations * 1e9
+
+
+def bare(n):
+    for _ in range(n):
+        pass
+
+
+def stage(n):
+    for _ in range(n):
+        with metrics.stage("bench"):
+            pass
+
+
+def count(n):
+    for _ in range(n):
+        metrics.count("bench")
+
+
+def session(n):
+    for _ in range(n):
+        with metrics.session("bench"):
+            pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    baseline = per_call_ns(bare, args.iterations)
+    print(f"{'bare loop':32s} {baseline:8.1f} ns/iteration")
+    for enabled in (False, True):
+        metrics.enable(enabled)
+        state = "enabled" if enabled else "disabled"
+        for name, fn in (("stage", stage), ("count", count), ("session", session)):
+            ns = per_call_ns(fn, args.iterations) - baseline
+            print(f"{name + ' (' + state + ')':32s} {ns:8.1f} ns/call")
+
+    metrics.PROFILE_SLOW_MS = float("inf")  # sample every session, never report one
+    ns = per_call_ns(session, 2000) - baseline
+    print(f"{'session (enabled, profiling)':32s} {ns / 1000:8.1f} us/call")
+    metrics.enable(False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
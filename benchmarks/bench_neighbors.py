@@ -0,0 +1,73 @@
+"""Similar-patient index types compared on build time, memory and query latency.
+
+    python benchmarks/bench_neighbors.py [--sizes 100000 1000000 10000000] [--queries 200] [--k 5]
+
+For each cohort size, standardizes synthetic patients with ``scaler.pkl`` and
+builds every index kind over the same float32 matrix. Tree results are checked
+against the brute-force scan before timing single-patient queries.
+"""
+
+import argparse
+import gc
+import sys
+import time
+
+import numpy as np
+
+from common import synthetic_patients
+
+from healthcare.neighbors import INDEX_KINDS, build_index
+from healthcare.registry import load_scaler
+from healthcare.schema import FEATURES
+
+TOLERANCE = 1e-4
+
+
+def standardized_cohort(n, scaler, seed, chunk=1_000_000):
+    points = np.empty((n, len(FEATURES)), dtype=np.float32)
+    for start in range(0, n, chunk):
+        size = min(chunk, n - start)
+        X = synthetic_patients(size, seed=seed + start)[FEATURES].to_numpy(dtype=np.float64)
+        points[start:start + size] = (X - scaler.mean_) / scaler.scale_
+    return points
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    scaler = load_scaler()
+    queries = standardized_cohort(args.queries, scaler, seed=10**9)
+
+    print(f"{'rows':>12s} {'kind':>9s} {'build':>9s} {'memory':>10s} {'query':>10s}")
+    for size in args.sizes:
+        points = standardized_cohort(size, scaler, seed=0)
+        expected = None
+        for kind in INDEX_KINDS:
+            start = time.perf_counter()
+            index = build_index(kind, points)
+            build = time.perf_counter() - start
+
+            distances = np.vstack([index.query(q, args.k)[0] for q in queries[:20]])
+            if expected is None:
+                expected = distances
+            elif np.abs(distances - expected).max() > TOLERANCE:
+                print(f"FAIL: {kind} disagrees with brute force")
+                return 1
+
+            start = time.perf_counter()
+            for q in queries:
+                index.query(q, args.k)
+            query = (time.perf_counter() - start) / len(queries)
+            print(f"{size:12,d} {kind:>9s} {build:8.2f}s {index.nbytes / 2**20:7.1f}MiB {query * 1e3:7.2f} ms")
+            del index
+            gc.collect()
+        del points
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
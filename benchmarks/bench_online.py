@@ -0,0 +1,158 @@
+"""Online update cost versus full retraining, and what the updates buy.
+
+    python benchmarks/bench_online.py [--new 1000 10000 100000] [--history 100000 400000]
+
+* **Cost.** For each ``--history`` size, fits a scaler and logistic model on
+  that many labelled reference-like patients, then times
+  :meth:`~healthcare.online.OnlineLogistic.partial_fit` on each ``--new`` batch
+  against refitting from scratch on history plus the batch. The update only
+  touches the new rows, so its time should follow ``--new`` and not
+  ``--history``.
+* **Quality.** Seeds a model on 40% of the reference dataset, streams the next
+  40% through the learner in batches of ``--stream-batch`` rows, and compares
+  log loss and ROC AUC on the last 20% with the seed and with a full refit.
+* **Hot swap.** In a scratch copy of the package and its pickles, starts a
+  :class:`~healthcare.pool.WorkerPool`, runs ``healthcare.online update
+  --install`` and checks that the pool's workers then score with the updated
+  model, exactly as the in-process scorer does. Fails otherwise.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+from common import reference_patients
+
+from healthcare.online import OnlineLogistic
+from healthcare.registry import load_heart_model, load_scaler
+from healthcare.schema import BASE_DIR, FEATURES, FOREST_MODEL_PATH, HEART_MODEL_PATH, SCALER_PATH, TARGET
+from healthcare.train import load_dataset
+
+warnings.filterwarnings("ignore")
+
+
+def fit(X, y):
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler().fit(X)
+    return scaler, LogisticRegression(max_iter=1000).fit(scaler.transform(X), y)
+
+
+def labelled_patients(n, seed):
+    """Reference-like patients with outcomes drawn from the installed model's risk."""
+    X = reference_patients(n, seed=seed)[FEATURES].to_numpy(dtype=np.float64)
+    p = load_heart_model().predict_proba(load_scaler().transform(X))[:, 1]
+    return X, (np.random.default_rng(seed).random(n) < p).astype(np.int64)
+
+
+def cost(history_sizes, new_sizes, repeat):
+    print(f"{'history':>9s} {'new rows':>9s} {'update':>9s} {'refit':>9s} {'speedup':>8s}")
+    for history in history_sizes:
+        X_history, y_history = labelled_patients(history, seed=1)
+        seed_model = fit(X_history, y_history)
+        for new in new_sizes:
+            X_new, y_new = labelled_patients(new, seed=2)
+            update = []
+            for _ in range(repeat):
+                learner = OnlineLogistic.from_estimators(*seed_model)
+                start = time.perf_counter()
+                learner.partial_fit(X_new, y_new)
+                update.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            fit(np.vstack([X_history, X_new]), np.concatenate([y_history, y_new]))
+            refit = time.perf_counter() - start
+            print(f"{history:9,d} {new:9,d} {min(update) * 1e3:7.1f}ms {refit * 1e3:7.0f}ms "
+                  f"{refit / min(update):7.0f}x")
+
+
+def quality(stream_batch):
+    from sklearn.metrics import log_loss, roc_auc_score
+
+    X, y = load_dataset()
+    order = np.random.default_rng(0).permutation(len(X))
+    seed_rows, stream_rows, holdout = np.array_split(order, [int(0.4 * len(X)), int(0.8 * len(X))])
+    scaler, model = fit(X[seed_rows], y[seed_rows])
+
+    learner = OnlineLogistic.from_estimators(scaler, model)
+    for start in range(0, len(stream_rows), stream_batch):
+        rows = stream_rows[start:start + stream_batch]
+        learner.partial_fit(X[rows], y[rows])
+    refit_scaler, refit_model = fit(X[np.r_[seed_rows, stream_rows]], y[np.r_[seed_rows, stream_rows]])
+
+    print(f"\nholdout of {len(holdout)} rows after streaming {len(stream_rows)} in batches of {stream_batch}:")
+    for name, p in (
+        ("seed (40%)", model.predict_proba(scaler.transform(X[holdout]))[:, 1]),
+        ("online (40% + 40%)", learner.predict_proba_positive(X[holdout])),
+        ("refit (80%)", refit_model.predict_proba(refit_scaler.transform(X[holdout]))[:, 1]),
+    ):
+        print(f"  {name:20s} log loss {log_loss(y[holdout], p):.4f}  ROC AUC {roc_auc_score(y[holdout], p):.4f}")
+
+
+# Runs inside the scratch copy: score one row in a pool, install an online update, score it again
+_HOT_SWAP = """
+import json, subprocess, sys
+import numpy as np
+from healthcare.pool import WorkerPool
+from healthcare.scoring import get_serving_scorer
+
+row = np.array([json.loads(sys.argv[1])])
+with WorkerPool(2) as pool:
+    before = float(pool.predict(row)[1][0])
+    subprocess.run([sys.executable, "-m", "healthcare.online", "update", sys.argv[2], "--install",
+                    "--learning-rate", "0.5", "--epochs", "5", "--output", sys.argv[3]],
+                   check=True, stdout=subprocess.DEVNULL)
+    pool_after = float(pool.predict(row)[1][0])
+local_after = float(get_serving_scorer().predict(row)[1][0])
+print(json.dumps({"before": before, "pool_after": pool_after, "local_after": local_after}))
+"""
+
+
+def hot_swap():
+    X, y = labelled_patients(2_000, seed=3)
+    with tempfile.TemporaryDirectory() as scratch:
+        shutil.copytree(os.path.join(BASE_DIR, "healthcare"), os.path.join(scratch, "healthcare"),
+                        ignore=shutil.ignore_patterns("__pycache__"))
+        for path in (SCALER_PATH, HEART_MODEL_PATH, FOREST_MODEL_PATH):
+            shutil.copyfile(path, os.path.join(scratch, os.path.basename(path)))
+        outcomes = os.path.join(scratch, "outcomes.csv")
+        # Flip the labels so the update visibly moves the model
+        np.savetxt(outcomes, np.column_stack([X, 1 - y]), delimiter=",", comments="",
+                   header=",".join(FEATURES + [TARGET]), fmt="%g")
+        env = {key: value for key, value in os.environ.items() if not key.startswith("HEALTHCARE_")}
+        completed = subprocess.run(
+            [sys.executable, "-W", "ignore", "-c", _HOT_SWAP, json.dumps(X[0].tolist()), outcomes,
+             os.path.join(scratch, "artifacts")],
+            cwd=scratch, env=dict(env, PYTHONPATH=scratch), capture_output=True, text=True, check=True)
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    print(f"\nhot swap: probability {result['before']:.5f} before the install, "
+          f"{result['pool_after']:.5f} in the pool and {result['local_after']:.5f} in-process after")
+    if result["pool_after"] == result["before"] or abs(result["pool_after"] - result["local_after"]) > 1e-12:
+        print("FAIL: the worker pool did not pick up the installed model")
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--new", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--history", type=int, nargs="+", default=[100_000, 400_000])
+    parser.add_argument("--stream-batch", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    cost(args.history, args.new, args.repeat)
+    quality(args.stream_batch)
+    return hot_swap()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
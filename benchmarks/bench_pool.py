@@ -0,0 +1,88 @@
+"""Throughput of the worker pool against in-process scoring.
+
+    python benchmarks/bench_pool.py [--workers 1 2 4] [--model forest] [--rows 1000000] [--what-ifs 64]
+
+Two CPU-bound workloads are timed in-process and through a
+:class:`~healthcare.pool.WorkerPool` of each size: batch scoring of ``--rows``
+reference-like patients (split into ``--chunk-rows`` tasks) and what-if grids
+toward the tracker's default targets for ``--what-ifs`` patients (one task
+each). Speedup is relative to in-process; it cannot exceed the number of cores
+(``os.cpu_count()`` is printed first), and with one core the pool only adds
+inter-process overhead. Results are checked against in-process scoring.
+"""
+
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+from common import reference_patients
+
+from healthcare.assessment import normalize_inputs
+from healthcare.forest import get_forest_scorer
+from healthcare.pool import CHUNK_ROWS, WorkerPool
+from healthcare.schema import FEATURES
+from healthcare.scoring import SERVING_MODEL, get_scorer
+from healthcare.whatif import DEFAULT_TARGETS, what_if
+
+warnings.filterwarnings("ignore")
+
+TOLERANCE = 1e-12
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, os.cpu_count() or 1}))
+    parser.add_argument("--model", choices=["logistic", "forest"], default=SERVING_MODEL)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--what-ifs", type=int, default=64)
+    parser.add_argument("--steps", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"cpus: {os.cpu_count()}, model: {args.model}")
+    patients = reference_patients(args.rows, seed=0)
+    X = patients[FEATURES].to_numpy(dtype=np.float64)
+    requests = [(normalize_inputs(record), DEFAULT_TARGETS, args.steps)
+                for record in patients.iloc[:args.what_ifs].to_dict("records")]
+
+    scorer = get_forest_scorer() if args.model == "forest" else get_scorer()
+    batch_seconds, (_, expected) = best_of(lambda: scorer.predict(X), args.repeat)
+    grid_seconds, grids = best_of(lambda: [what_if(*request, scorer=scorer) for request in requests], args.repeat)
+    expected_grids = np.concatenate([grid.probability for grid in grids])
+    grid_rows = len(expected_grids)
+
+    print(f"{'':14s} {'batch rows/s':>14s} {'speedup':>8s} {'what-if rows/s':>16s} {'speedup':>8s}")
+    print(f"{'in-process':14s} {args.rows / batch_seconds:14,.0f} {1:8.2f}x "
+          f"{grid_rows / grid_seconds:16,.0f} {1:8.2f}x")
+
+    failures = 0
+    for workers in args.workers:
+        with WorkerPool(workers, chunk_rows=args.chunk_rows) as pool:
+            pool.warm_up()
+            seconds, (_, probability) = best_of(lambda: pool.predict(X, args.model), args.repeat)
+            pool_grid_seconds, pool_grids = best_of(lambda: pool.what_if_many(requests, args.model), args.repeat)
+        print(f"{f'{workers} workers':14s} {args.rows / seconds:14,.0f} {batch_seconds / seconds:8.2f}x "
+              f"{grid_rows / pool_grid_seconds:16,.0f} {grid_seconds / pool_grid_seconds:8.2f}x")
+        if (np.abs(probability - expected).max() > TOLERANCE or np.abs(
+                np.concatenate([grid.probability for grid in pool_grids]) - expected_grids).max() > TOLERANCE):
+            print(f"FAIL: {workers} workers disagree with in-process scoring")
+            failures += 1
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+"""Server-side cost of one widget interaction in the Streamlit app.
+
+    python benchmarks/bench_rerun.py [--repeat 15] [--before REVISION | old_app.py]
+
+Drives ``app.py`` with Streamlit's ``AppTest`` and times every script run on
+the server (``ScriptRunner._run_script``) for these interactions:
+
+* moving the age slider before any assessment,
+* moving it after an assessment, when all three tabs are populated,
+* changing a goal target in the analytics tab,
+* pressing "Analyze My Health", for reference.
+
+The reported speedup compares two apps. The baseline is the app as it was
+before the form and the goal tracker became fragments, when every
+interaction reran the whole script. By default that app is taken from git:
+the parent of the first commit that added ``@st.fragment`` to ``app.py``.
+``--before`` names another revision, or an app script in the repository root,
+where it can import ``healthcare``. The current app is timed both as a
+full-script rerun and as the fragment-scoped rerun the browser now requests.
+``AppTest`` always reruns the whole script, so fragment runs are requested
+the way the browser does, by tagging the rerun with the fragment's id. The
+compiled script is cached across runs, as on a server.
+
+Pressing "Analyze My Health" again with unchanged inputs must be answered
+from the result cache: the script fails if a repeated press evaluates the
+rule engine.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+import common  # noqa: F401
+
+# Keep the benchmark's assessments out of the real history database
+os.environ.setdefault("HEALTHCARE_HISTORY", os.path.join(tempfile.mkdtemp(), "history.sqlite3"))
+
+import streamlit.testing.v1.local_script_runner as local_script_runner  # noqa: E402
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache  # noqa: E402
+from streamlit.runtime.scriptrunner.script_runner import ScriptRunner  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from healthcare.rules import RuleEngine  # noqa: E402
+from healthcare.schema import BASE_DIR  # noqa: E402
+
+warnings.filterwarnings("ignore")
+
+APP_PATH = os.path.join(BASE_DIR, "app.py")
+
+_run_seconds = []
+_rule_evaluations = [0]
+_fragment = [None]
+_run_script = ScriptRunner._run_script
+_RerunData = local_script_runner.RerunData
+_evaluate = RuleEngine.evaluate
+# A server compiles the script once; AppTest recompiles it on every run unless the cache is shared
+_script_cache = ScriptCache()
+
+
+def _timed_run_script(self, rerun_data):
+    start = time.perf_counter()
+    try:
+        return _run_script(self, rerun_data)
+    finally:
+        _run_seconds.append(time.perf_counter() - start)
+
+
+def _counted_evaluate(self, columns):
+    _rule_evaluations[0] += 1
+    return _evaluate(self, columns)
+
+
+def _rerun_data(**kwargs):
+    # What the browser sends for a widget inside a fragment: the widget states plus the fragment's id
+    return _RerunData(fragment_id=_fragment[0], **kwargs)
+
+
+ScriptRunner._run_script = _timed_run_script
+local_script_runner.RerunData = _rerun_data
+RuleEngine.evaluate = _counted_evaluate
+local_script_runner.ScriptCache = lambda: _script_cache
+
+
+def _fragment_ids(at):
+    """Fragment ids in the order the last full run registered them (form first, then goal tracker)."""
+    storage = at._fragment_storage
+    return sorted(storage._fragments, key=storage._registration_sequence_by_id.get)
+
+
+def _interact(at, action, fragment=None):
+    _run_seconds.clear()
+    _fragment[0] = fragment
+    try:
+        action(at).run()
+    finally:
+        _fragment[0] = None
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return sum(_run_seconds)
+
+
+def measure(path, repeat, scoped):
+    """Median server seconds per interaction, fragment-scoped when ``scoped``, and the rule
+    engine evaluations made by the repeated (identical) analyses."""
+    at = AppTest.from_file(path, default_timeout=120).run()
+    fragments = _fragment_ids(at) if scoped else []
+    form = fragments[0] if scoped else None
+
+    def slider(i):
+        return lambda at: at.slider[0].set_value(45 + i % 2)
+
+    timings = {}
+    timings["form, before analysis"] = [_interact(at, slider(i), form) for i in range(repeat)]
+    timings["analyze"] = [_interact(at, lambda at: at.button[0].click())]
+    _rule_evaluations[0] = 0
+    timings["analyze"] += [_interact(at, lambda at: at.button[0].click()) for _ in range(repeat - 1)]
+    repeated_evaluations = _rule_evaluations[0]
+    goals = _fragment_ids(at)[1] if scoped else None
+    timings["form, after analysis"] = [_interact(at, slider(i), form) for i in range(repeat)]
+    # Show the results again: moving the slider above cleared them, as in the browser
+    _interact(at, lambda at: at.button[0].click())
+    timings["goal target"] = [
+        _interact(at, lambda at, i=i: at.number_input(key="target_chol").set_value(180 + i % 2), goals)
+        for i in range(repeat)
+    ]
+    return {name: float(np.median(values)) for name, values in timings.items()}, repeated_evaluations
+
+
+def _git(*args):
+    return subprocess.run(["git", *args], cwd=BASE_DIR, capture_output=True, text=True, check=True).stdout
+
+
+def before_app(before=None):
+    """Path of the baseline app script, and whether it was written here (and must be removed)."""
+    if before is not None and os.path.exists(before):
+        return os.path.abspath(before), False
+    if before is None:
+        # The last app.py in which every interaction reran the whole script
+        added = _git("log", "--reverse", "--format=%H", "-S@st.fragment", "--", "app.py").split()
+        if not added:
+            raise SystemExit("no commit adds @st.fragment to app.py; pass --before")
+        before = f"{added[0]}^"
+    path = os.path.join(BASE_DIR, f".bench_rerun_before_{os.getpid()}.py")
+    with open(path, "w") as fh:
+        fh.write(_git("show", f"{before}:app.py"))
+    return path, True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=15)
+    parser.add_argument("--before", help="git revision or app script to compare with "
+                                         "(default: the app before it used fragments)")
+    args = parser.parse_args(argv)
+
+    path, written = before_app(args.before)
+    columns = {}
+    try:
+        columns["before"], _ = measure(path, args.repeat, scoped=False)
+    finally:
+        if written:
+            os.remove(path)
+    columns["full rerun"], evaluations = measure(APP_PATH, args.repeat, scoped=False)
+    columns["fragment"], scoped_evaluations = measure(APP_PATH, args.repeat, scoped=True)
+
+    print(f"{'interaction':24s}" + "".join(f"{name:>14s}" for name in columns) + f"{'speedup':>10s}")
+    baseline = columns["before"]
+    for interaction in columns["fragment"]:
+        after = columns["fragment"][interaction]
+        print(f"{interaction:24s}" + "".join(f"{values[interaction] * 1e3:12.1f}ms" for values in columns.values())
+              + f"{baseline[interaction] / after:9.1f}x")
+    if evaluations or scoped_evaluations:
+        print(f"FAIL: repeated identical analyses evaluated the rule engine "
+              f"{evaluations + scoped_evaluations} times instead of using the result cache")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
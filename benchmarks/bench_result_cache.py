@@ -0,0 +1,73 @@
+"""Result cache hit rate, lookup cost and memory on a skewed submission stream.
+
+    python benchmarks/bench_result_cache.py [--submissions 20000] [--distinct 2000] [--defaults 0.3]
+
+Simulates a stream in which a ``--defaults`` share of submissions are the
+untouched form defaults and the rest are drawn from ``--distinct`` patients
+with Zipf-distributed popularity. Every submission is assessed through
+:class:`~healthcare.result_cache.ResultCache` and, for comparison, directly;
+cached and direct results must be identical.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from common import synthetic_patients
+
+from healthcare.assessment import assess_many, normalize_inputs
+from healthcare.result_cache import ResultCache
+from healthcare.scoring import get_serving_scorer
+
+DEFAULTS = {"age": 45, "sex": 1, "cp": 0, "trestbps": 120, "chol": 200, "fbs": 0, "restecg": 0,
+            "thalachh": 150, "exang": 0, "oldpeak": 0.0, "slope": 0, "ca": 0, "thal": 1}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--submissions", type=int, default=20_000)
+    parser.add_argument("--distinct", type=int, default=2_000)
+    parser.add_argument("--defaults", type=float, default=0.3, help="share of submissions left at the defaults")
+    parser.add_argument("--maxsize", type=int, default=1024)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    pool = [normalize_inputs(record) for record in synthetic_patients(args.distinct).to_dict("records")]
+    default = normalize_inputs(DEFAULTS)
+    popular = np.minimum(rng.zipf(1.3, args.submissions), args.distinct) - 1
+    stream = [default if rng.random() < args.defaults else pool[i] for i in popular]
+
+    scorer = get_serving_scorer()
+    cache = ResultCache(maxsize=args.maxsize)
+    cache.assess_one(default, scorer)
+    cache.clear()
+
+    start = time.perf_counter()
+    direct = [assess_many([inputs], scorer)[0] for inputs in stream]
+    direct_seconds = time.perf_counter() - start
+
+    hits, misses = [], []
+    cached = []
+    for inputs in stream:
+        before = cache.hits
+        start = time.perf_counter()
+        cached.append(cache.assess_one(inputs, scorer))
+        (hits if cache.hits > before else misses).append(time.perf_counter() - start)
+
+    stats = cache.stats()
+    print(f"submissions:  {len(stream):,}  ({args.defaults:.0%} defaults, {args.distinct:,} distinct others)")
+    print(f"hit rate:     {stats['hit_rate']:.1%}  ({stats['evictions']:,} evictions at maxsize {args.maxsize:,})")
+    print(f"lookup:       hit p50 {np.median(hits) * 1e6:.1f} us   miss p50 {np.median(misses) * 1e6:.1f} us")
+    print(f"total:        cached {(sum(hits) + sum(misses)) * 1e3:.0f} ms   uncached {direct_seconds * 1e3:.0f} ms")
+    print(f"memory:       {stats['bytes'] / 1024:.0f} KiB for {stats['entries']:,} entries "
+          f"({stats['bytes'] / max(stats['entries'], 1):,.0f} bytes each)")
+    if cached != direct:
+        print("FAIL: cached results differ from direct assessment")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
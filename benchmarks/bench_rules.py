@@ -0,0 +1,83 @@
+"""Throughput of the vectorized rule engine against the original scalar if-chains.
+
+    python benchmarks/bench_rules.py [--patients 1000000]
+"""
+
+import argparse
+import sys
+import time
+
+from common import synthetic_patients
+
+from healthcare.rules import default_engine
+
+
+def scalar_rules(age, trestbps, chol, thalachh, bmi, exercise, smoking, alcohol):
+    """The per-patient logic as it was written inline in app.py."""
+    risk_factors = 0
+    if age > 50: risk_factors += 1
+    if trestbps > 140: risk_factors += 1
+    if chol > 240: risk_factors += 1
+    if bmi > 30: risk_factors += 1
+    if smoking == "Current": risk_factors += 1
+    if exercise < 3: risk_factors += 1
+
+    indicators = {
+        "Blood Pressure": "Normal" if trestbps < 120 else "Elevated" if trestbps < 130 else "High",
+        "Cholesterol": "Normal" if chol < 200 else "Borderline" if chol < 240 else "High",
+        "Max Heart Rate": "Good" if thalachh > 150 else "Average" if thalachh > 130 else "Low",
+        "BMI": "Normal" if 18.5 <= bmi <= 24.9 else "Overweight" if bmi <= 29.9 else "Obese",
+        "Exercise": "Active" if exercise >= 5 else "Moderate" if exercise >= 3 else "Sedentary",
+        "Smoking": "Non-smoker" if smoking == "Never" else "Former smoker" if smoking == "Former" else "Current smoker",
+    }
+
+    recommendations = []
+    if trestbps > 140: recommendations.append("blood_pressure")
+    if chol > 240: recommendations.append("cholesterol")
+    if bmi > 30: recommendations.append("weight")
+    if exercise < 3: recommendations.append("activity")
+    if smoking == "Current": recommendations.append("smoking")
+    if alcohol == "Heavy": recommendations.append("alcohol")
+    return risk_factors, indicators, recommendations
+
+
+SCALAR_COLUMNS = ["age", "trestbps", "chol", "thalachh", "bmi", "exercise", "smoking", "alcohol"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--patients", type=int, default=1_000_000)
+    parser.add_argument("--scalar-sample", type=int, default=100_000,
+                        help="patients timed through the scalar baseline")
+    args = parser.parse_args(argv)
+
+    patients = synthetic_patients(args.patients)
+
+    start = time.perf_counter()
+    result = default_engine.evaluate(patients)
+    vector_seconds = time.perf_counter() - start
+
+    sample = patients.head(args.scalar_sample)
+    records = list(sample[SCALAR_COLUMNS].itertuples(index=False, name=None))
+    start = time.perf_counter()
+    expected = [scalar_rules(*record) for record in records]
+    scalar_seconds = (time.perf_counter() - start) / len(records) * len(patients)
+
+    for i, (risk_factors, indicators, recommendations) in enumerate(expected):
+        row = result.row(i)
+        if (row["risk_factors"], row["indicators"], result.recommendation_codes(i)) != (
+                risk_factors, indicators, recommendations):
+            print(f"FAIL: rule engine disagrees with the scalar rules for patient {i}")
+            return 1
+    print(f"parity: {len(expected):,} patients match the scalar rules")
+
+    n = len(patients)
+    print(f"vectorized engine:  {vector_seconds:8.3f}s for {n:,} patients ({n / vector_seconds:,.0f} patients/s)")
+    print(f"scalar if-chains:   {scalar_seconds:8.3f}s projected from {len(records):,} "
+          f"({n / scalar_seconds:,.0f} patients/s)")
+    print(f"speed-up: {scalar_seconds / vector_seconds:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Per-row latency of the compiled scorer against the scikit-learn path.
+
+    python benchmarks/bench_scoring.py [--rows 2000]
+
+Also checks that both paths agree to within 1e-12 on the reference dataset
+and on random rows spanning the form's input ranges.
+"""
+
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from healthcare.registry import load_heart_model, load_scaler  # noqa: E402
+from healthcare.schema import DATA_PATH, FEATURES  # noqa: E402
+from healthcare.scoring import get_scorer  # noqa: E402
+
+warnings.filterwarnings("ignore")
+
+TOLERANCE = 1e-12
+
+
+def sklearn_path(scaler, model, input_data):
+    scaled_input = scaler.transform(input_data)
+    prediction = model.predict(scaled_input)
+    prediction_proba = model.predict_proba(scaled_input)
+    return prediction[0], prediction_proba[0][1]
+
+
+def random_rows(n, rng):
+    return np.column_stack([
+        rng.integers(18, 101, n), rng.integers(0, 2, n), rng.integers(0, 4, n),
+        rng.integers(80, 201, n), rng.integers(100, 601, n), rng.integers(0, 2, n),
+        rng.integers(0, 3, n), rng.integers(60, 251, n), rng.integers(0, 2, n),
+        rng.integers(0, 101, n) / 10.0, rng.integers(0, 3, n), rng.integers(0, 5, n),
+        rng.integers(0, 3, n),
+    ]).astype(np.float64)
+
+
+def check_parity(scaler, model, scorer, X):
+    expected = model.predict_proba(scaler.transform(X))[:, 1]
+    labels, probabilities = scorer.predict(X)
+    batch_error = np.max(np.abs(probabilities - expected))
+    single_error = max(abs(scorer.predict_one(row)[1] - p) for row, p in zip(X, expected))
+    label_mismatches = int(np.sum(labels != model.predict(scaler.transform(X))))
+    return max(batch_error, single_error), label_mismatches
+
+
+def per_row_seconds(fn, rows):
+    start = time.perf_counter()
+    for row in rows:
+        fn(row)
+    return (time.perf_counter() - start) / len(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    scaler, model, scorer = load_scaler(), load_heart_model(), get_scorer()
+    rng = np.random.default_rng(0)
+    reference = pd.read_csv(DATA_PATH)[FEATURES].to_numpy(dtype=np.float64)
+    X = np.vstack([reference, random_rows(10_000, rng)])
+
+    error, mismatches = check_parity(scaler, model, scorer, X)
+    print(f"parity: max |dp| = {error:.3e} over {len(X)} rows, label mismatches = {mismatches}")
+    if error > TOLERANCE or mismatches:
+        print("FAIL: compiled scorer disagrees with scikit-learn")
+        return 1
+
+    rows = random_rows(args.rows, rng)
+    current = per_row_seconds(lambda row: sklearn_path(scaler, model, row.reshape(1, -1)), rows)
+    compiled = per_row_seconds(scorer.predict_one, rows)
+    print(f"scaler.transform + predict + predict_proba: {current * 1e6:9.2f} us/row")
+    print(f"LinearScorer.predict_one:                  {compiled * 1e6:9.2f} us/row")
+    print(f"speed-up: {current / compiled:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""Cold-start budget for app.py.
+
+    python benchmarks/bench_startup.py [--import-budget 0.8] [--render-budget 1.5]
+
+Two measurements, each in a fresh interpreter so nothing is already imported:
+
+* ``python -X importtime`` over the top-level imports of app.py, reporting the
+  total and the most expensive modules;
+* the wall time of the first script run under Streamlit's ``AppTest``,
+  together with which heavy libraries that run pulled in.
+
+Exits non-zero when either time exceeds its budget or the first render loads
+a library that should only be imported on demand.
+"""
+
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app.py")
+
+# Needed only after "Analyze My Health" is pressed, or never
+DEFERRED = ("sklearn", "scipy", "joblib", "matplotlib", "pandas", "seaborn")
+
+FIRST_RENDER = """
+import json, sys, time, warnings
+warnings.filterwarnings("ignore")
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=120).run()
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "exception": [str(e.value) for e in at.exception],
+    "loaded": sorted(m for m in {deferred!r} if m in sys.modules),
+}}))
+"""
+
+
+def top_level_imports(path):
+    """Import statements at module level of ``path``, as source lines."""
+    with open(path) as fh:
+        tree = ast.parse(fh.read())
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def import_times(statements):
+    """Run ``statements`` under -X importtime; return (total seconds, {module: self seconds})."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "; ".join(statements)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    self_times = {}
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name[1:]  # nesting is shown as extra leading spaces after the separator
+        self_times[name.strip()] = int(self_us) / 1e6
+        if not name.startswith(" "):  # top-level entry: cumulative covers its whole subtree
+            total += int(cumulative_us) / 1e6
+    return total, self_times
+
+
+def first_render():
+    result = subprocess.run(
+        [sys.executable, "-c", FIRST_RENDER.format(app=APP, deferred=DEFERRED)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--import-budget", type=float, default=0.8, help="seconds for app.py's imports")
+    parser.add_argument("--render-budget", type=float, default=1.5, help="seconds for the first script run")
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    statements = top_level_imports(APP)
+    total, self_times = import_times(statements)
+    print(f"app.py imports: {total:.3f}s (budget {args.import_budget}s)")
+    for name, seconds in sorted(self_times.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {seconds * 1000:8.1f} ms  {name.strip()}")
+
+    render = first_render()
+    print(f"first render:   {render['seconds']:.3f}s (budget {args.render_budget}s)")
+    if render["loaded"]:
+        print(f"  loaded on first render: {', '.join(render['loaded'])}")
+
+    failures = []
+    if total > args.import_budget:
+        failures.append("import time over budget")
+    if render["seconds"] > args.render_budget:
+        failures.append("first render over budget")
+    if render["exception"]:
+        failures.append(f"first render raised: {render['exception']}")
+    if render["loaded"]:
+        failures.append("first render imported deferred libraries")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
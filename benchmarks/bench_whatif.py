@@ -0,0 +1,72 @@
+"""What-if grid scoring latency and agreement with one-at-a-time scoring.
+
+    python benchmarks/bench_whatif.py [--patients 200] [--steps 6 8 10]
+
+For synthetic patients, builds the counterfactual grid toward the tracker's
+default targets and times :func:`~healthcare.whatif.what_if`. A sample of grid
+rows is re-scored one at a time through ``predict_one`` and the rule engine to
+check the batch result.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from common import synthetic_patients
+
+from healthcare.assessment import FORM_FIELDS
+from healthcare.risk import risk_level
+from healthcare.rules import default_engine
+from healthcare.schema import FEATURES
+from healthcare.scoring import get_serving_scorer
+from healthcare.whatif import DEFAULT_TARGETS, what_if
+
+TOLERANCE = 1e-12
+BUDGET_MS = 100
+
+
+def check_rows(result, scorer, rows):
+    for i in rows:
+        inputs = {name: result.columns[name][i].item() for name in FORM_FIELDS}
+        _, probability = scorer.predict_one(np.array([inputs[name] for name in FEATURES], dtype=np.float64))
+        factors = default_engine.evaluate_one(**inputs)["risk_factors"]
+        if (abs(probability - result.probability[i]) > TOLERANCE or factors != result.risk_factors[i]
+                or str(risk_level(probability, factors)) != result.risk_level[i]):
+            return False
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--patients", type=int, default=200)
+    parser.add_argument("--steps", type=int, nargs="+", default=[6, 8, 10])
+    args = parser.parse_args(argv)
+
+    scorer = get_serving_scorer()
+    patients = synthetic_patients(args.patients).to_dict("records")
+    rng = np.random.default_rng(0)
+
+    failures = 0
+    for steps in args.steps:
+        what_if(patients[0], DEFAULT_TARGETS, steps, scorer)  # warm up
+        timings = []
+        for patient in patients:
+            start = time.perf_counter()
+            result = what_if(patient, DEFAULT_TARGETS, steps, scorer)
+            timings.append(time.perf_counter() - start)
+        if not check_rows(result, scorer, rng.integers(0, len(result), 200)):
+            print(f"FAIL: {steps} steps: batch disagrees with one-at-a-time scoring")
+            failures += 1
+        p50, p99 = np.percentile(timings, [50, 99]) * 1e3
+        print(f"{len(result):8,d} counterfactuals ({steps} steps)  p50 {p50:7.2f} ms  p99 {p99:7.2f} ms  "
+              f"{len(result) / np.median(timings):12,.0f} rows/s")
+        if len(result) <= 10_000 and p99 > BUDGET_MS:
+            print(f"FAIL: {steps} steps over the {BUDGET_MS} ms budget")
+            failures += 1
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""Shared helpers for the benchmark scripts."""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from healthcare.schema import DATA_PATH, FEATURES  # noqa: E402
+
+SMOKING = np.array(["Never", "Former", "Current"])
+ALCOHOL = np.array(["None", "Light", "Moderate", "Heavy"])
+
+
+def synthetic_patients(n, seed=0):
+    """``n`` random form submissions spanning the ranges of the app's widgets."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "age": rng.integers(18, 101, n),
+        "sex": rng.integers(0, 2, n),
+        "cp": rng.integers(0, 4, n),
+        "trestbps": rng.integers(80, 201, n),
+        "chol": rng.integers(100, 601, n),
+        "fbs": rng.integers(0, 2, n),
+        "restecg": rng.integers(0, 3, n),
+        "thalachh": rng.integers(60, 251, n),
+        "exang": rng.integers(0, 2, n),
+        "oldpeak": rng.integers(0, 101, n) / 10.0,
+        "slope": rng.integers(0, 3, n),
+        "ca": rng.integers(0, 5, n),
+        "thal": rng.integers(0, 3, n),
+        "bmi": np.round(rng.uniform(15.0, 50.0, n), 1),
+        "exercise": rng.integers(0, 21, n),
+        "smoking": SMOKING[rng.integers(0, 3, n)],
+        "alcohol": ALCOHOL[rng.integers(0, 4, n)],
+    })
+
+
+# (low, high, jitter) for the features resampled with noise; jitter is in widget steps
+_JITTER = {"age": (18, 100, 2), "trestbps": (80, 200, 4), "chol": (100, 600, 10), "thalachh": (60, 250, 5)}
+
+
+def reference_patients(n, seed=0, data_path=DATA_PATH):
+    """``n`` form submissions shaped like the reference dataset.
+
+    Rows are resampled from ``cleaned_merged_heart_dataset.csv``, so the joint
+    distribution of the model features is kept, with a little integer noise on
+    the continuous ones so that repeated rows are not identical. The lifestyle
+    inputs, which the dataset lacks, get plausible population distributions.
+    """
+    rng = np.random.default_rng(seed)
+    reference = pd.read_csv(data_path, usecols=FEATURES)
+    frame = reference.iloc[rng.integers(0, len(reference), n)].reset_index(drop=True)
+    for name, (low, high, jitter) in _JITTER.items():
+        frame[name] = np.clip(frame[name] + rng.integers(-jitter, jitter + 1, n), low, high)
+    frame["oldpeak"] = np.clip(frame["oldpeak"] + rng.integers(-2, 3, n) / 10.0, 0.0, 10.0).round(1)
+    frame["bmi"] = np.clip(rng.normal(27.5, 5.0, n), 15.0, 50.0).round(1)
+    frame["exercise"] = np.clip(rng.poisson(4, n), 0, 20)
+    frame["smoking"] = SMOKING[rng.choice(3, n, p=[0.6, 0.25, 0.15])]
+    frame["alcohol"] = ALCOHOL[rng.choice(4, n, p=[0.3, 0.4, 0.2, 0.1])]
+    return frame
@@ -0,0 +1,121 @@
+"""Load test for the HTTP scoring service.
+
+    python benchmarks/loadtest_service.py [--concurrency 64] [--requests 20000] [--workers 0]
+
+Starts ``python -m healthcare.service`` on a free port (or targets ``--url``),
+drives it from many concurrent keep-alive connections and reports p50/p99
+latency, requests/sec and the mean micro-batch size the server achieved.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from common import synthetic_patients
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def _request(reader, writer, host, method, path, body=b""):
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = 0
+    for line in head.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+    return status, await reader.readexactly(length)
+
+
+async def _client(host, port, payloads, latencies, failures):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for body in payloads:
+            start = time.perf_counter()
+            status, _ = await _request(reader, writer, host, "POST", "/v1/assess", body)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                failures.append(status)
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, concurrency, total):
+    patients = synthetic_patients(total).to_dict("records")
+    bodies = [json.dumps({k: (v.item() if hasattr(v, "item") else v) for k, v in p.items()}).encode()
+              for p in patients]
+    latencies, failures = [], []
+    per_client = [bodies[i::concurrency] for i in range(concurrency)]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, chunk, latencies, failures) for chunk in per_client))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(host, port)
+    _, stats = await _request(reader, writer, host, "GET", "/stats")
+    writer.close()
+    return np.array(latencies), failures, elapsed, json.loads(stats)
+
+
+def _start_server(args):
+    proc = subprocess.Popen(
+        [sys.executable, "-W", "ignore", "-m", "healthcare.service", "--port", "0",
+         "--max-batch", str(args.max_batch), "--max-delay-ms", str(args.max_delay_ms),
+         "--workers", str(args.workers), "--deadline-ms", str(args.deadline_ms)],
+        cwd=ROOT, stdout=subprocess.PIPE, text=True,
+    )
+    line = proc.stdout.readline()
+    if not line.startswith("listening on "):
+        proc.kill()
+        raise RuntimeError(f"service failed to start: {line!r}")
+    url = urlsplit(line.split(" ", 2)[2].strip())
+    return proc, url.hostname, url.port
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="existing service, e.g. http://127.0.0.1:8600")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-delay-ms", type=float, default=2.0)
+    parser.add_argument("--workers", type=int, default=0, help="service worker processes (0: in-process)")
+    parser.add_argument("--deadline-ms", type=float, default=0)
+    args = parser.parse_args(argv)
+
+    proc = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port
+    else:
+        proc, host, port = _start_server(args)
+    try:
+        latencies, failures, elapsed, stats = asyncio.run(run_load(host, port, args.concurrency, args.requests))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    print(f"requests:     {len(latencies):,} ({len(failures)} failed) over {args.concurrency} connections")
+    print(f"throughput:   {len(latencies) / elapsed:,.0f} requests/s")
+    print(f"latency:      p50 {p50:.2f} ms   p99 {p99:.2f} ms")
+    print(f"micro-batches: {stats['batches']:,}, mean size {stats['mean_batch_size']:.1f}")
+    if failures:
+        print(f"failures:     {dict(zip(*np.unique(failures, return_counts=True)))}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
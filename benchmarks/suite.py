@@ -0,0 +1,215 @@
+"""Benchmark suite for the scoring and recommendation hot paths, with regression checks.
+
+    python benchmarks/suite.py [--quick] [--output results.json] [--baseline old.json] [--threshold 0.25]
+
+Runs every case against the real artifacts on synthetic patients resampled
+from the reference dataset (see ``common.reference_patients``) and writes one
+JSON document with the results and the environment they were measured in,
+by default to ``benchmarks/results/<timestamp>-<commit>.json``. With
+``--baseline`` each result is compared to an earlier run; any case more than
+``--threshold`` worse than the baseline is flagged and the exit status is 1.
+
+Each timing is the median of ``--repeat`` runs. ``--quick`` skips the 1M-row
+cases.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import warnings
+from datetime import datetime, timezone
+
+import numpy as np
+
+from common import reference_patients
+
+from healthcare import charts
+from healthcare.assessment import assess_many
+from healthcare.forest import get_forest_scorer
+from healthcare.registry import load_heart_model, load_scaler
+from healthcare.rules import default_engine
+from healthcare.schema import FEATURES
+from healthcare.scoring import get_scorer
+
+warnings.filterwarnings("ignore")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+BATCH_SIZES = (1_000, 100_000, 1_000_000)
+
+
+def median_seconds(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def latency(seconds, per=1):
+    return {"value": seconds / per * 1e6, "unit": "us", "better": "lower"}
+
+
+def throughput(seconds, rows):
+    return {"value": rows / seconds, "unit": "rows/s", "better": "higher"}
+
+
+def scoring_cases(patients, repeat, quick):
+    scaler, model = load_scaler(), load_heart_model()
+    scorers = {"logistic": get_scorer(), "forest": get_forest_scorer()}
+    X = patients[FEATURES].to_numpy(dtype=np.float64)
+    rows = X[:500]
+
+    def sklearn_single():
+        for row in rows:
+            scaled = scaler.transform(row[None])
+            model.predict(scaled), model.predict_proba(scaled)
+
+    results = {"scoring.single_row.sklearn_logistic": latency(median_seconds(sklearn_single, repeat), len(rows))}
+    for name, scorer in scorers.items():
+        def single(scorer=scorer):
+            for row in rows:
+                scorer.predict_one(row)
+
+        results[f"scoring.single_row.{name}"] = latency(median_seconds(single, repeat), len(rows))
+        for size in BATCH_SIZES:
+            if quick and size > 100_000:
+                continue
+            batch = X[:size]
+            results[f"scoring.batch_{size}.{name}"] = throughput(
+                median_seconds(lambda: scorer.predict(batch), repeat), size)
+    return results
+
+
+def rule_cases(patients, repeat):
+    columns = {name: patients[name].to_numpy() for name in patients.columns}
+    records = patients.iloc[:1000].to_dict("records")
+    return {
+        "rules.evaluate_100000": throughput(
+            median_seconds(lambda: default_engine.evaluate(columns), repeat), len(patients)),
+        "rules.evaluate_one": latency(median_seconds(
+            lambda: [default_engine.evaluate_one(**record) for record in records[:200]], repeat), 200),
+        "recommendations.assess_many_1000": throughput(
+            median_seconds(lambda: assess_many(records), repeat), len(records)),
+    }
+
+
+def chart_cases(patients, repeat):
+    present = [default_engine.evaluate_one(**record)["risk_present"] for record in patients.iloc[:50].to_dict("records")]
+    probabilities = np.linspace(0.0, 1.0, 20)
+
+    def cold_gauges():
+        charts._gauge_png.cache_clear()
+        for p in probabilities:
+            charts.gauge_png(p)
+
+    def cold_risk_charts():
+        charts._risk_factors_png.cache_clear()
+        for flags in present[:5]:
+            charts.risk_factors_png(flags)
+
+    # Cache hits and spec building take about a microsecond; time enough calls to rise above noise
+    many = np.tile(probabilities, 100)
+
+    def warm_gauges():
+        for p in many:
+            charts.gauge_png(p)
+
+    cold_gauges()  # import matplotlib outside the timed runs
+    results = {
+        "charts.gauge_png_render": latency(median_seconds(cold_gauges, repeat), len(probabilities)),
+        "charts.risk_factors_png_render": latency(median_seconds(cold_risk_charts, repeat), 5),
+    }
+    cold_gauges()
+    results["charts.gauge_png_cached"] = latency(median_seconds(warm_gauges, repeat), len(many))
+    results["charts.gauge_spec"] = latency(
+        median_seconds(lambda: [charts.gauge_spec(p) for p in many], repeat), len(many))
+    return results
+
+
+def environment():
+    import sklearn
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "scikit-learn": sklearn.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print each shared case against ``baseline``; return the names that regressed."""
+    regressions = []
+    print(f"\n{'case':44s} {'baseline':>14s} {'current':>14s} {'change':>8s}")
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None or previous["unit"] != current["unit"]:
+            continue
+        change = current["value"] / previous["value"] - 1
+        worse = -change if current["better"] == "higher" else change
+        flag = "  REGRESSION" if worse > threshold else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:44s} {previous['value']:14,.2f} {current['value']:14,.2f} {change:+7.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="skip the 1M-row cases")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<timestamp>-<commit>.json)")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="relative slowdown flagged as a regression")
+    args = parser.parse_args(argv)
+
+    patients = reference_patients(max(BATCH_SIZES[:2] if args.quick else BATCH_SIZES), seed=0)
+    results = {}
+    results.update(scoring_cases(patients, args.repeat, args.quick))
+    results.update(rule_cases(patients.iloc[:100_000], args.repeat))
+    results.update(chart_cases(patients, args.repeat))
+
+    for name, result in results.items():
+        print(f"{name:44s} {result['value']:14,.2f} {result['unit']}")
+
+    document = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "environment": environment(),
+        "settings": {"repeat": args.repeat, "quick": args.quick},
+        "results": results,
+    }
+    output = args.output
+    if output is None:
+        stamp = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}"
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{document['environment']['commit'] or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as fh:
+        json.dump(document, fh, indent=2)
+    print(f"\nwrote {output}")
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+        regressions = compare(results, baseline["results"], args.threshold)
+        if regressions:
+            print(f"\nFAIL: {len(regressions)} case(s) regressed by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
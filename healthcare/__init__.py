@@ -0,0 +1 @@
+"""Scoring, rules and serving helpers behind the Streamlit app."""
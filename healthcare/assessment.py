@@ -0,0 +1,77 @@
+"""End-to-end assessment of form inputs: model score plus rule-based summary.
+
+This is the non-UI equivalent of pressing "Analyze My Health", shared by the
+HTTP service and anything else that needs the full result for many patients.
+"""
+
+import numpy as np
+
+from .risk import LIFESTYLE_DEFAULTS, health_score, risk_level
+from .rules import ACTION_PLANS, default_engine
+from .schema import FEATURES
+from .scoring import get_serving_scorer
+
+SMOKING_CHOICES = ("Never", "Former", "Current")
+ALCOHOL_CHOICES = ("None", "Light", "Moderate", "Heavy")
+
+FORM_FIELDS = FEATURES + list(LIFESTYLE_DEFAULTS)
+
+
+def normalize_inputs(payload):
+    """Validate a mapping of form inputs, filling lifestyle defaults.
+
+    Raises ``ValueError`` with a user-facing message on bad input.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("expected a JSON object of form inputs")
+
+    missing = [name for name in FEATURES if name not in payload]
+    if missing:
+        raise ValueError(f"missing model features: {', '.join(missing)}")
+
+    inputs = {}
+    for name in FEATURES + ["bmi", "exercise"]:
+        value = payload.get(name, LIFESTYLE_DEFAULTS.get(name))
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not np.isfinite(value):
+            raise ValueError(f"{name} must be a finite number")
+        inputs[name] = value
+
+    for name, choices in (("smoking", SMOKING_CHOICES), ("alcohol", ALCOHOL_CHOICES)):
+        value = payload.get(name, LIFESTYLE_DEFAULTS[name])
+        if value not in choices:
+            raise ValueError(f"{name} must be one of {', '.join(choices)}")
+        inputs[name] = value
+    return inputs
+
+
+def assess_many(records, scorer=None, engine=default_engine):
+    """Assess a list of normalized input dicts in one vectorized pass."""
+    scorer = scorer or get_serving_scorer()
+    columns = {name: np.array([record[name] for record in records]) for name in FORM_FIELDS}
+    X = np.column_stack([columns[name] for name in FEATURES]).astype(np.float64)
+
+    prediction, probability = scorer.predict(X)
+    rules = engine.evaluate(columns)
+    levels = risk_level(probability, rules.risk_factors)
+    scores = health_score(probability, rules.risk_factors)
+
+    results = []
+    for i in range(len(records)):
+        row = rules.row(i)
+        level = str(levels[i])
+        results.append({
+            "prediction": int(prediction[i]),
+            "probability": float(probability[i]),
+            "risk_level": level,
+            "risk_factors": row["risk_factors"],
+            "risk_present": row["risk_present"],
+            "health_score": float(scores[i]),
+            "indicators": row["indicators"],
+            "recommendations": list(ACTION_PLANS[level]),
+            "specific_recommendations": row["recommendations"],
+        })
+    return results
+
+
+def assess_one(**inputs):
+    return assess_many([normalize_inputs(inputs)])[0]
@@ -0,0 +1,68 @@
+"""Per-feature attributions of the model's prediction, for whole batches at once.
+
+* **Logistic regression.** The logit is ``intercept + sum_j coef_j * (x_j -
+  mean_j) / scale_j``, so each scaled input times its coefficient is that
+  feature's exact contribution, in logit units.
+* **Random forest.** Each tree's prediction is its root value plus the change
+  in node value at every split along the row's path; crediting each change to
+  the split feature and averaging over trees (Saabas path attribution) gives
+  contributions that sum with the mean root value to the predicted
+  probability exactly.
+
+Both are computed with array operations over the whole batch (see
+:meth:`~healthcare.scoring.LinearScorer.contributions` and
+:meth:`~healthcare.forest.FlatForest.path_contributions`); the analytics tab
+and ``healthcare.batch --attributions`` use the same :func:`explain`.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .schema import FEATURES
+from .scoring import get_serving_scorer
+
+FEATURE_LABELS = {
+    "age": "Age",
+    "sex": "Sex",
+    "cp": "Chest Pain Type",
+    "trestbps": "Resting Blood Pressure",
+    "chol": "Cholesterol",
+    "fbs": "Fasting Blood Sugar",
+    "restecg": "Resting ECG",
+    "thalachh": "Max Heart Rate",
+    "exang": "Exercise-Induced Angina",
+    "oldpeak": "ST Depression",
+    "slope": "ST Slope",
+    "ca": "Major Vessels",
+    "thal": "Thalassemia",
+}
+
+
+@dataclass
+class Attributions:
+    """Per-feature contributions for a batch of rows."""
+
+    base: float                # intercept (logit) or mean root value (probability)
+    contributions: np.ndarray  # (rows, len(FEATURES)), in ``units``
+    units: str                 # "logit" or "probability"
+
+    def __len__(self):
+        return len(self.contributions)
+
+    def total(self):
+        """``base`` plus every contribution: the logit or probability of each row."""
+        return self.base + self.contributions.sum(axis=1)
+
+    def row(self, i, k=None):
+        """``(feature, contribution)`` pairs for row ``i``, largest magnitude first, the first ``k``."""
+        values = self.contributions[i]
+        order = np.argsort(-np.abs(values), kind="stable")[:k]
+        return [(FEATURES[j], float(values[j])) for j in order]
+
+
+def explain(X, scorer=None):
+    """Attributions of ``scorer`` (default: the serving model) for a 2-D batch of raw inputs."""
+    scorer = scorer or get_serving_scorer()
+    base, contributions = scorer.contributions(np.asarray(X, dtype=np.float64).reshape(-1, len(FEATURES)))
+    return Attributions(base=float(base), contributions=contributions, units=scorer.contribution_units)
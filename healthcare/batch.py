@@ -0,0 +1,110 @@
+"""Headless batch scoring of patient cohorts.
+
+    python -m healthcare.batch cohort.csv scored.csv [--chunksize 100000]
+
+The input uses the column layout of ``cleaned_merged_heart_dataset.csv`` (the
+13 model features, optionally ``target`` and any id columns). The optional
+lifestyle columns ``bmi``, ``exercise``, ``smoking`` and ``alcohol`` take the
+form defaults when absent. The file is streamed in chunks and each chunk is
+written out before the next one is read, so memory stays bounded regardless of
+file size. ``--workers N`` splits the model scoring of each chunk across a
+:class:`~healthcare.pool.WorkerPool` of N processes. ``--attributions`` adds
+each feature's contribution to the prediction (``contribution_<feature>``,
+plus ``contribution_base``; see :mod:`healthcare.attributions`).
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from .attributions import explain
+from .pool import WORKERS, WorkerPool
+from .risk import LIFESTYLE_DEFAULTS, health_score, risk_level
+from .rules import default_engine
+from .schema import FEATURES
+from .scoring import get_serving_scorer
+
+
+def score_frame(frame, scorer, attributions=False):
+    """Return ``frame`` with prediction, probability and the rule-based summary appended."""
+    for column, default in LIFESTYLE_DEFAULTS.items():
+        if column not in frame:
+            frame[column] = default
+
+    missing = [name for name in FEATURES if name not in frame]
+    if missing:
+        raise ValueError(f"input is missing model feature columns: {', '.join(missing)}")
+
+    X = frame[FEATURES].to_numpy(dtype=np.float64)
+    prediction, probability = scorer.predict(X)
+    factors = default_engine.evaluate(frame).risk_factors
+    frame["prediction"] = prediction
+    frame["probability"] = probability
+    frame["risk_factors"] = factors
+    frame["risk_level"] = risk_level(probability, factors)
+    frame["health_score"] = health_score(probability, factors)
+    if attributions:
+        # A worker pool only scores; attributions then come from the same model in-process
+        explained = explain(X, scorer if hasattr(scorer, "contributions") else None)
+        frame["contribution_base"] = explained.base
+        for j, name in enumerate(FEATURES):
+            frame[f"contribution_{name}"] = explained.contributions[:, j]
+    return frame
+
+
+def score_csv(source, destination, chunksize=100_000, scorer=None, progress=None, attributions=False):
+    """Stream ``source`` through the scorer into ``destination``; returns rows written.
+
+    ``scorer`` may also be a started :class:`~healthcare.pool.WorkerPool`.
+    """
+    scorer = scorer or get_serving_scorer()
+    rows = 0
+    with open(destination, "w", newline="") as out:
+        for chunk in pd.read_csv(source, chunksize=chunksize):
+            scored = score_frame(chunk, scorer, attributions)
+            scored.to_csv(out, header=rows == 0, index=False)
+            rows += len(scored)
+            if progress is not None:
+                progress(rows)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a patient CSV in bounded memory.")
+    parser.add_argument("source", help="input CSV in the reference dataset layout")
+    parser.add_argument("destination", help="output CSV path")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="rows per chunk (default: 100000)")
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help="score in this many worker processes (default: $HEALTHCARE_WORKERS, "
+                             "else 0, in-process)")
+    parser.add_argument("--attributions", action="store_true",
+                        help="add per-feature contributions to the prediction")
+    parser.add_argument("--quiet", action="store_true", help="only print the final summary")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+
+    def progress(rows):
+        if not args.quiet:
+            elapsed = time.perf_counter() - start
+            print(f"\r{rows:,} rows  {rows / elapsed:,.0f} rows/s", end="", file=sys.stderr)
+
+    if args.workers:
+        with WorkerPool(args.workers) as pool:
+            rows = score_csv(args.source, args.destination, args.chunksize, scorer=pool, progress=progress,
+                             attributions=args.attributions)
+    else:
+        rows = score_csv(args.source, args.destination, args.chunksize, progress=progress,
+                         attributions=args.attributions)
+    elapsed = time.perf_counter() - start
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(f"scored {rows:,} rows in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+"""Cached rendering of the assessment charts.
+
+The app used to build a fresh ``plt.subplots`` figure for every assessment
+and never close it, so pyplot's figure manager kept every one alive for the
+life of the server. Here charts are drawn on standalone ``Figure`` objects
+(no pyplot registry), rasterized once to PNG bytes and memoized in a bounded
+LRU keyed by what they actually depend on: the probability rounded to the
+gauge's resolution plus its color (chosen from the exact value), the tuple
+of risk-factor flags, and the feature contributions rounded to two decimals.
+
+With ``HEALTHCARE_CHARTS=native`` the same charts are returned as small
+Vega-Lite specs instead, which the browser draws with no server-side
+rasterization at all.
+
+The goal tracker's line charts are always Vega-Lite specs built from plain
+lists: ``st.line_chart`` would build a DataFrame and an Altair chart on every
+rerun of the tracker.
+"""
+
+import io
+import os
+from datetime import datetime
+from functools import lru_cache
+
+GAUGE_DECIMALS = 2
+CONTRIBUTION_DECIMALS = 2
+CHART_MODE = os.environ.get("HEALTHCARE_CHARTS", "png")
+
+
+def gauge_color(probability):
+    return 'red' if probability > 0.5 else 'orange' if probability > 0.3 else 'green'
+
+
+def _render_png(fig):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    FigureCanvasAgg(fig)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png")
+    fig.clear()
+    return buffer.getvalue()
+
+
+@lru_cache(maxsize=128)
+def _gauge_png(probability, color):
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(8, 2))
+    ax = fig.subplots()
+    ax.barh([0], [probability], color=color)
+    ax.set_xlim(0, 1)
+    ax.set_xlabel('Heart Disease Probability')
+    ax.set_yticks([0])
+    ax.set_yticklabels([])
+    ax.set_title('Risk Probability Gauge')
+    return _render_png(fig)
+
+
+@lru_cache(maxsize=64)
+def _risk_factors_png(factors, present):
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    colors = ['red' if flag else 'green' for flag in present]
+    ax.barh(list(factors), [1] * len(factors), color=colors)
+    ax.set_xlabel('Risk Impact')
+    ax.set_title('Your Risk Factors Analysis')
+    ax.set_xlim(0, 1)
+    return _render_png(fig)
+
+
+@lru_cache(maxsize=64)
+def _contributions_png(labels, values, units):
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    # Largest at the top; red raises the predicted risk, green lowers it
+    ax.barh(list(labels)[::-1], list(values)[::-1], color=['red' if v > 0 else 'green' for v in values[::-1]])
+    ax.axvline(0, color='grey', linewidth=0.8)
+    ax.set_xlabel(f'Contribution ({units})')
+    ax.set_title('What Drove Your Prediction')
+    return _render_png(fig)
+
+
+def gauge_png(probability):
+    """PNG bytes of the "Risk Probability Gauge" for ``probability``."""
+    # The color comes from the exact probability: 0.503 rounds to 0.50 but is above the 0.5 cut-off
+    return _gauge_png(round(float(probability), GAUGE_DECIMALS), gauge_color(probability))
+
+
+def risk_factors_png(risk_present):
+    """PNG bytes of "Your Risk Factors Analysis" for a ``{label: present}`` mapping."""
+    return _risk_factors_png(tuple(risk_present), tuple(bool(flag) for flag in risk_present.values()))
+
+
+def contributions_png(contributions, units):
+    """PNG bytes of "What Drove Your Prediction" for ``[(label, contribution), ...]``."""
+    return _contributions_png(tuple(label for label, _ in contributions),
+                              tuple(round(float(value), CONTRIBUTION_DECIMALS) for _, value in contributions), units)
+
+
+def gauge_spec(probability):
+    """Vega-Lite spec equivalent of :func:`gauge_png`."""
+    return {
+        "title": "Risk Probability Gauge",
+        "height": 60,
+        "data": {"values": [{"probability": round(float(probability), GAUGE_DECIMALS)}]},
+        "mark": {"type": "bar", "color": gauge_color(probability)},
+        "encoding": {
+            "x": {"field": "probability", "type": "quantitative", "title": "Heart Disease Probability",
+                  "scale": {"domain": [0, 1]}},
+        },
+    }
+
+
+def risk_factors_spec(risk_present):
+    """Vega-Lite spec equivalent of :func:`risk_factors_png`."""
+    return {
+        "title": "Your Risk Factors Analysis",
+        "data": {"values": [{"factor": label, "present": bool(flag), "impact": 1}
+                            for label, flag in risk_present.items()]},
+        "mark": "bar",
+        "encoding": {
+            "y": {"field": "factor", "type": "nominal", "sort": None, "title": None},
+            "x": {"field": "impact", "type": "quantitative", "title": "Risk Impact", "scale": {"domain": [0, 1]}},
+            "color": {"field": "present", "type": "nominal", "legend": None,
+                      "scale": {"domain": [True, False], "range": ["red", "green"]}},
+        },
+    }
+
+
+def contributions_spec(contributions, units):
+    """Vega-Lite spec equivalent of :func:`contributions_png`."""
+    return {
+        "title": "What Drove Your Prediction",
+        "data": {"values": [{"feature": label, "contribution": round(float(value), CONTRIBUTION_DECIMALS),
+                             "raises": bool(value > 0)} for label, value in contributions]},
+        "mark": "bar",
+        "encoding": {
+            "y": {"field": "feature", "type": "nominal", "sort": None, "title": None},
+            "x": {"field": "contribution", "type": "quantitative", "title": f"Contribution ({units})"},
+            "color": {"field": "raises", "type": "nominal", "legend": None,
+                      "scale": {"domain": [True, False], "range": ["red", "green"]}},
+        },
+    }
+
+
+def goal_path_spec(probabilities):
+    """Line of the probability as every goal advances together, one point per step."""
+    return {
+        "data": {"values": [{"step": step, "probability": round(float(probability), 4)}
+                            for step, probability in enumerate(probabilities)]},
+        "mark": "line",
+        "encoding": {
+            "x": {"field": "step", "type": "quantitative", "title": "Progress toward all goals (step)"},
+            "y": {"field": "probability", "type": "quantitative", "title": "Probability as all goals advance",
+                  "axis": {"format": "%"}},
+        },
+    }
+
+
+def history_spec(timestamps, probabilities, health_scores):
+    """Trend of the probability (in %) and the health score over a user's saved assessments."""
+    values = []
+    for ts, probability, score in zip(timestamps, probabilities, health_scores):
+        date = datetime.fromtimestamp(ts).isoformat(timespec="seconds")
+        values.append({"date": date, "series": "Heart Disease Probability (%)",
+                       "value": round(float(probability) * 100, 2)})
+        values.append({"date": date, "series": "Health Score", "value": float(score)})
+    return {
+        "data": {"values": values},
+        "mark": {"type": "line", "point": True},
+        "encoding": {
+            "x": {"field": "date", "type": "temporal", "title": "Date"},
+            "y": {"field": "value", "type": "quantitative", "title": None},
+            "color": {"field": "series", "type": "nominal", "title": None},
+        },
+    }
+
+
+def cache_info():
+    return {"gauge": _gauge_png.cache_info(), "risk_factors": _risk_factors_png.cache_info(),
+            "contributions": _contributions_png.cache_info()}
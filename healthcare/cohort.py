@@ -0,0 +1,150 @@
+"""Population percentiles against a reference cohort.
+
+Places a patient's predicted probability, cholesterol, resting blood pressure
+and maximum heart rate within the distribution of people of the same sex and
+age band. The reference rows are bucketed once into sorted arrays, one
+contiguous segment per (age band, sex) group, so a query is a binary search
+per metric: O(log n) and independent of how the cohort was loaded. Nothing is
+rescanned per request.
+
+The default reference is ``cleaned_merged_heart_dataset.csv``; set
+``HEALTHCARE_REFERENCE`` to compare against another CSV in the same layout.
+Larger cohorts can be streamed in with :meth:`PercentileIndex.from_csv`.
+"""
+
+import os
+import threading
+
+import numpy as np
+
+from .schema import DATA_PATH, FEATURES
+
+METRICS = ("probability", "chol", "trestbps", "thalachh")
+
+# Lower edges of the age bands after the first: <30, 30-39, 40-49, 50-59, 60-69, 70+
+AGE_BAND_EDGES = np.array([30, 40, 50, 60, 70])
+AGE_BAND_LABELS = ("under 30", "30-39", "40-49", "50-59", "60-69", "70+")
+
+# Groups smaller than this fall back to the whole cohort
+MIN_GROUP_SIZE = 30
+
+REFERENCE_PATH = os.environ.get("HEALTHCARE_REFERENCE", DATA_PATH)
+
+
+def age_band(age):
+    return np.searchsorted(AGE_BAND_EDGES, age, side="right")
+
+
+class PercentileIndex:
+    """Sorted per-group value arrays for percentile-rank lookups."""
+
+    def __init__(self, values, offsets):
+        self.values = values    # metric -> sorted values, concatenated by group
+        self.offsets = offsets  # (groups + 2,) segment boundaries; the last group is everyone
+
+    @property
+    def size(self):
+        return int(self.offsets[-1] - self.offsets[-2])
+
+    @classmethod
+    def build(cls, age, sex, metrics):
+        """Build from equal-length arrays: ``age``, ``sex`` and ``{metric: values}``."""
+        age = np.asarray(age)
+        sex = np.asarray(sex).astype(np.int64)
+        group = age_band(age) * 2 + sex
+        n_groups = len(AGE_BAND_LABELS) * 2
+        order = np.argsort(group, kind="stable")
+        counts = np.bincount(group, minlength=n_groups)
+        offsets = np.concatenate([[0], np.cumsum(counts), [2 * len(group)]])
+
+        values = {}
+        for name, column in metrics.items():
+            column = np.asarray(column, dtype=np.float64)[order]
+            grouped = column.copy()
+            for g in range(n_groups):
+                grouped[offsets[g]:offsets[g + 1]].sort()
+            # The trailing "everyone" segment is the whole column sorted
+            values[name] = np.concatenate([grouped, np.sort(column)])
+        return cls(values, offsets)
+
+    @classmethod
+    def from_frame(cls, frame, scorer):
+        _, probability = scorer.predict(frame[FEATURES].to_numpy(dtype=np.float64))
+        return cls.build(frame["age"], frame["sex"], {
+            "probability": probability,
+            "chol": frame["chol"],
+            "trestbps": frame["trestbps"],
+            "thalachh": frame["thalachh"],
+        })
+
+    @classmethod
+    def from_csv(cls, paths, scorer, chunksize=500_000):
+        """Stream one or more CSVs, keeping only the columns the index needs."""
+        import pandas as pd
+
+        if isinstance(paths, str):
+            paths = [paths]
+        parts = {name: [] for name in ("age", "sex") + METRICS}
+        for path in paths:
+            for chunk in pd.read_csv(path, usecols=FEATURES, chunksize=chunksize):
+                _, probability = scorer.predict(chunk[FEATURES].to_numpy(dtype=np.float64))
+                parts["probability"].append(probability.astype(np.float32))
+                for name in ("age", "sex", "chol", "trestbps", "thalachh"):
+                    parts[name].append(chunk[name].to_numpy(dtype=np.float32))
+        columns = {name: np.concatenate(chunks) for name, chunks in parts.items()}
+        return cls.build(columns["age"], columns["sex"], {name: columns[name] for name in METRICS})
+
+    def _segment(self, age, sex):
+        g = int(age_band(age)) * 2 + int(sex)
+        start, stop = self.offsets[g], self.offsets[g + 1]
+        if stop - start < MIN_GROUP_SIZE:
+            g = len(self.offsets) - 2
+            start, stop = self.offsets[g], self.offsets[g + 1]
+        return g, int(start), int(stop)
+
+    def query(self, age, sex, **metrics):
+        """Percentile rank (0-100, mid-rank for ties) of each given metric within the patient's group.
+
+        Returns ``{"group": label, "group_size": n, metric: percentile, ...}``.
+        """
+        g, start, stop = self._segment(age, sex)
+        n = stop - start
+        result = {
+            "group": "everyone" if g == len(self.offsets) - 2
+            else f"{'male' if g % 2 else 'female'}, {AGE_BAND_LABELS[g // 2]}",
+            "group_size": n,
+        }
+        for name, value in metrics.items():
+            segment = self.values[name][start:stop]
+            below = np.searchsorted(segment, value, side="left")
+            at_or_below = np.searchsorted(segment, value, side="right")
+            result[name] = 100.0 * float(below + at_or_below) / (2 * n)
+        return result
+
+
+# (scorer, path, index); the scorer is held so its identity cannot be reused by a newer one
+_index = None
+_index_lock = threading.Lock()
+
+
+def _current(scorer, path):
+    entry = _index
+    if entry is not None and entry[0] is scorer and entry[1] == path:
+        return entry[2]
+    return None
+
+
+def get_reference_index(scorer, path=None):
+    """Percentile index over the reference CSV at ``path`` (default ``REFERENCE_PATH``), built once per scorer."""
+    global _index
+    path = path or REFERENCE_PATH
+    index = _current(scorer, path)
+    if index is None:
+        with _index_lock:
+            index = _current(scorer, path)
+            if index is None:
+                import pandas as pd
+
+                index = PercentileIndex.from_frame(pd.read_csv(path, usecols=FEATURES), scorer)
+                _index = (scorer, path, index)
+    return index
@@ -0,0 +1,254 @@
+"""Flat, memory-mappable copy of the fitted scaler, logistic model and forest.
+
+The joblib pickles are slow to unpickle, execute code when loaded, and are
+copied privately into every process that loads them. ``python -m
+healthcare.compact export`` writes the arrays the scorers actually use into a
+single file:
+
+    8 bytes   magic  b"HCFLAT\\x00\\x01" (format 1)
+    8 bytes   little-endian uint64 length of the JSON header
+    header    UTF-8 JSON: feature order, source pickle hashes, model
+              metadata and, for every array, its dtype, shape and offset
+    arrays    raw little-endian data, each starting on a 64-byte boundary
+
+:func:`load` maps the file read-only and returns NumPy views into the mapping,
+so loading is a header parse and every process serving from the same file
+shares one copy of the weights in the page cache. Nothing is unpickled.
+
+Serving picks the file up automatically (``HEALTHCARE_ARTIFACTS=auto``) when
+the pickles it was exported from are unchanged; ``HEALTHCARE_ARTIFACTS=flat``
+serves from it without consulting the pickles at all, and ``pickle`` ignores
+it.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import struct
+import sys
+import threading
+
+import numpy as np
+
+from .forest import FlatForest, ForestScorer
+from .registry import _stat_key, file_sha256, get_registry
+from .schema import BASE_DIR, FEATURES, FOREST_MODEL_PATH, HEART_MODEL_PATH, SCALER_PATH
+from .scoring import LinearScorer
+
+COMPACT_PATH = os.path.join(BASE_DIR, "healthcare_models.flat")
+ARTIFACTS_MODE = os.environ.get("HEALTHCARE_ARTIFACTS", "auto")
+
+MAGIC = b"HCFLAT\x00\x01"
+FORMAT = 1
+ALIGNMENT = 64
+
+_FOREST_ARRAYS = ("feature", "threshold", "children", "is_leaf", "value", "roots")
+_SOURCES = {"scaler": SCALER_PATH, "logistic": HEART_MODEL_PATH, "forest": FOREST_MODEL_PATH}
+
+
+def _aligned(n):
+    return -(-n // ALIGNMENT) * ALIGNMENT
+
+
+def export(path=COMPACT_PATH, scaler=None, model=None, forest=None):
+    """Write the flat file from fitted estimators (default: the registry's current ones)."""
+    registry = get_registry()
+    scaler = scaler if scaler is not None else registry.get(SCALER_PATH)
+    model = model if model is not None else registry.get(HEART_MODEL_PATH)
+    forest = forest if forest is not None else registry.get(FOREST_MODEL_PATH)
+
+    linear = LinearScorer.from_estimators(scaler, model)
+    flat = FlatForest.from_estimator(forest)
+    arrays = {
+        "scaler.mean": linear.mean,
+        "scaler.scale": linear.scale,
+        "logistic.coef": linear.coef,
+        "logistic.intercept": np.array([linear.intercept]),
+        **{f"forest.{name}": getattr(flat, name) for name in _FOREST_ARRAYS},
+    }
+
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[name] = array.astype(array.dtype.newbyteorder("<"), copy=False)
+        layout[name] = {"dtype": arrays[name].dtype.str, "shape": list(array.shape), "offset": offset}
+        offset = _aligned(offset + array.nbytes)
+
+    header = {
+        "format": FORMAT,
+        "features": FEATURES,
+        "sources": {
+            key: {"file": os.path.basename(source), "sha256": file_sha256(source)}
+            for key, source in _SOURCES.items() if os.path.exists(source)
+        },
+        "logistic": {"classes": linear.classes.tolist()},
+        "forest": {"classes": flat.classes.tolist(), "max_depth": flat.max_depth, "trees": len(flat.roots)},
+        "arrays": layout,
+    }
+    encoded = json.dumps(header, indent=1).encode()
+    data_start = _aligned(len(MAGIC) + 8 + len(encoded))
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(MAGIC + struct.pack("<Q", len(encoded)) + encoded)
+        for name, array in arrays.items():
+            fh.seek(data_start + layout[name]["offset"])
+            fh.write(array.tobytes())
+        fh.truncate(data_start + offset)
+    os.replace(tmp, path)
+    return header
+
+
+class CompactModels:
+    """Read-only views of the exported arrays plus the header describing them."""
+
+    def __init__(self, header, arrays):
+        self.header = header
+        self.arrays = arrays
+        self._linear = None
+        self._forest = None
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in self.arrays.values())
+
+    def version(self, *keys):
+        """:meth:`~healthcare.registry.ModelRegistry.version` of the pickles this was exported from."""
+        digest = hashlib.sha256()
+        for key in keys:
+            digest.update(self.header["sources"].get(key, {}).get("sha256", "").encode())
+        return digest.hexdigest()[:16]
+
+    def linear_scorer(self):
+        if self._linear is None:
+            a = self.arrays
+            self._linear = LinearScorer(a["scaler.mean"], a["scaler.scale"], a["logistic.coef"],
+                                        a["logistic.intercept"], self.header["logistic"]["classes"])
+        return self._linear
+
+    def forest_scorer(self):
+        if self._forest is None:
+            meta = self.header["forest"]
+            flat = FlatForest(**{name: self.arrays[f"forest.{name}"] for name in _FOREST_ARRAYS},
+                              max_depth=meta["max_depth"], classes=meta["classes"])
+            self._forest = ForestScorer(self.arrays["scaler.mean"], self.arrays["scaler.scale"], flat)
+        return self._forest
+
+
+def read_header(path=COMPACT_PATH):
+    """Return (header, offset of the first array) without mapping the arrays."""
+    with open(path, "rb") as fh:
+        prefix = fh.read(len(MAGIC) + 8)
+        if len(prefix) < len(MAGIC) + 8 or prefix[:6] != MAGIC[:6]:
+            raise ValueError(f"{path} is not a compact model file")
+        if prefix[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} uses an unsupported compact format version")
+        (length,) = struct.unpack("<Q", prefix[len(MAGIC):])
+        header = json.loads(fh.read(length))
+    if header.get("format") != FORMAT:
+        raise ValueError(f"{path} uses an unsupported compact format version")
+    if header["features"] != FEATURES:
+        raise ValueError(f"{path} was exported for a different feature order")
+    return header, _aligned(len(MAGIC) + 8 + length)
+
+
+def load(path=COMPACT_PATH):
+    header, data_start = read_header(path)
+    # Plain ndarray views keep the mapping alive without memmap subclass overhead in hot loops
+    buffer = np.memmap(path, dtype=np.uint8, mode="r").view(np.ndarray)
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        start = data_start + spec["offset"]
+        arrays[name] = buffer[start:start + count * dtype.itemsize].view(dtype).reshape(spec["shape"])
+    return CompactModels(header, arrays)
+
+
+# abspath -> (stat key, sha256), so pickles are rehashed only when they change on disk
+_hashes = {}
+
+
+def _current_sha256(path):
+    key = _stat_key(path)
+    cached = _hashes.get(path)
+    if cached is None or cached[0] != key:
+        cached = _hashes[path] = (key, file_sha256(path))
+    return cached[1]
+
+
+def _is_current(header):
+    for source in header["sources"].values():
+        path = os.path.join(BASE_DIR, source["file"])
+        if not os.path.exists(path) or _current_sha256(path) != source["sha256"]:
+            return False
+    return True
+
+
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+def get_compact_models(path=COMPACT_PATH, mode=None):
+    """The mapped compact models if serving should use them, else ``None``."""
+    mode = mode or ARTIFACTS_MODE
+    if mode == "pickle":
+        return None
+    if mode not in ("auto", "flat"):
+        raise ValueError(f"unknown HEALTHCARE_ARTIFACTS {mode!r}; expected 'auto', 'flat' or 'pickle'")
+    if not os.path.exists(path):
+        if mode == "flat":
+            raise FileNotFoundError(f"HEALTHCARE_ARTIFACTS=flat but {path} does not exist")
+        return None
+
+    key = (path, _stat_key(path))
+    models = _loaded.get(key)
+    if models is None:
+        with _loaded_lock:
+            models = _loaded.get(key)
+            if models is None:
+                models = load(path)
+                _loaded.clear()
+                _loaded[key] = models
+    if mode == "auto" and not _is_current(models.header):
+        return None  # exported from pickles that have since been replaced
+    return models
+
+
+def artifact_version(*keys):
+    """Combined content hash of the ``"scaler"``, ``"logistic"`` or ``"forest"`` artifacts.
+
+    Taken from the compact header while it is serving, so a compact-only
+    deployment needs no pickles; from the pickles' hashes otherwise. Both give
+    the same value for the same artifacts.
+    """
+    compact = get_compact_models()
+    if compact is not None:
+        return compact.version(*keys)
+    return get_registry().version(*(_SOURCES[key] for key in keys))
+
+
+def scaler_statistics():
+    """(mean, scale) of the serving scaler, from the compact export when it is serving."""
+    compact = get_compact_models()
+    if compact is not None:
+        return compact.arrays["scaler.mean"], compact.arrays["scaler.scale"]
+    scaler = get_registry().get(SCALER_PATH)
+    return scaler.mean_, scaler.scale_
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the model artifacts to the compact flat format.")
+    parser.add_argument("command", choices=["export"])
+    parser.add_argument("--output", default=COMPACT_PATH)
+    args = parser.parse_args(argv)
+
+    header = export(args.output)
+    models = load(args.output)
+    print(f"wrote {len(header['arrays'])} arrays ({models.nbytes / 1024:.1f} KiB) to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,340 @@
+"""Streaming drift monitor for form inputs and predicted probabilities.
+
+Every assessment adds one count per form input, and one for the predicted
+probability, to fixed-bin histograms. The report compares recent traffic with
+a baseline:
+
+* **Baseline.** For the 13 model features the bins are the training data's
+  percentiles (``cleaned_merged_heart_dataset.csv``) and the expected counts
+  are the training rows'. The probability is binned on the serving model's
+  scores for the training rows, rebuilt when the model changes. In-sample
+  scores are sharper than live ones, the forest's especially, so expect some
+  baseline gap there. ``bmi``, ``exercise``, ``smoking`` and ``alcohol`` are
+  not in the training data. They use fixed bins over the form's range (or
+  their choices), and the first ``REFERENCE_ROWS`` assessments become their
+  baseline.
+* **Constant memory.** Counts are kept per time slot: ``SLOTS`` slots cover
+  ``HEALTHCARE_DRIFT_WINDOW`` seconds (default one day). A slot is reused, and
+  cleared, once it falls out of the window. The bins double as a quantile
+  sketch: a quantile is located to within one bin, which is one training
+  percentile for the model features.
+* **Statistics.** PSI over deciles of the baseline (the fine bins grouped) and
+  the two-sample KS distance over the fine bins, with its 5% critical value.
+  PSI below 0.1 is ``stable``, below 0.25 ``moderate``, and otherwise
+  ``significant``.
+
+:meth:`DriftMonitor.report` builds the report on demand. It is served as JSON
+at ``/drift`` on the metrics endpoint (``HEALTHCARE_METRICS=<port>``) and by
+the scoring service. ``HEALTHCARE_DRIFT=off`` disables the monitor
+(``get_drift_monitor()`` returns ``None``).
+
+    python -m healthcare.drift report cohort.csv   # drift of a CSV of form inputs
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+import time
+from bisect import bisect_right
+
+import numpy as np
+
+from . import metrics
+from .assessment import ALCOHOL_CHOICES, SMOKING_CHOICES, normalize_inputs
+from .result_cache import model_version
+from .schema import DATA_PATH, FEATURES
+
+DRIFT_MODE = os.environ.get("HEALTHCARE_DRIFT", "on")
+WINDOW_SECONDS = float(os.environ.get("HEALTHCARE_DRIFT_WINDOW", "86400"))
+SLOTS = 24
+REFERENCE_ROWS = 500
+MIN_ROWS = 100  # fewer rows than this in the window: no statistics yet
+SMALL_BATCH = 16  # below this, counting rows one by one beats the vectorized pass
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+KS_ALPHA_COEFFICIENT = 1.358  # two-sample KS critical value at 5%, times sqrt((n + m) / (n * m))
+
+PERCENTILES = np.arange(1, 100)
+# Form inputs the training data lacks: (fine bin edges over the form's range, fine bins per PSI group, discrete)
+FORM_BINS = {
+    "bmi": (np.arange(15.0, 51.0, 1.0), 5, False),
+    "exercise": (np.arange(0.0, 21.0, 1.0), 2, True),
+}
+FORM_CHOICES = {"smoking": SMOKING_CHOICES, "alcohol": ALCOHOL_CHOICES}
+
+
+class _Field:
+    """Bin layout and baseline of one monitored value."""
+
+    def __init__(self, name, edges=None, choices=None, groups=None, expected=None, source=None, discrete=False):
+        self.name = name
+        self.choices = choices
+        self.discrete = discrete  # integer-valued: a fine bin holds its lower edge only
+        if choices is not None:
+            self.index = {choice: i for i, choice in enumerate(choices)}
+            self.size = len(choices) + 1  # the last bin counts anything else
+            self.groups = np.arange(self.size)
+        else:
+            self.edges = np.asarray(edges, dtype=np.float64)
+            self.edge_list = self.edges.tolist()  # bisect on a list is several times faster than on an array
+            self.size = len(self.edges) + 1
+            self.groups = np.asarray(groups)
+        self.expected = None if expected is None else np.asarray(expected, dtype=np.float64)
+        self.source = source
+        self.offset = 0
+
+    @classmethod
+    def from_sample(cls, name, values, source):
+        """Bins at the sample's percentiles, grouped into its deciles for PSI, with the sample as baseline."""
+        cuts = np.percentile(values, PERCENTILES)
+        edges = np.unique(cuts)
+        deciles = np.unique(cuts[9::10])  # a subset of the edges, so every fine bin sits inside one decile
+        lower = np.concatenate([[-np.inf], edges])
+        groups = np.searchsorted(deciles, lower, side="right")
+        expected = np.bincount(np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1)
+        return cls(name, edges, groups=groups, expected=expected, source=source,
+                   discrete=bool(np.all(values == np.round(values))))
+
+    def bins(self, values):
+        if self.choices is not None:
+            return np.array([self.index.get(value, len(self.choices)) for value in values], dtype=np.intp)
+        return np.searchsorted(self.edges, np.asarray(values, dtype=np.float64), side="right")
+
+
+def _read_training(path=DATA_PATH):
+    data = np.genfromtxt(path, delimiter=",", names=True)
+    return np.column_stack([data[name] for name in FEATURES]).astype(np.float64)
+
+
+def _quantiles(counts, edges, discrete, qs=(0.05, 0.5, 0.95)):
+    """Quantiles of a fine-bin histogram, interpolated within bins (open end bins give their edge)."""
+    cdf = np.cumsum(counts)
+    out = {}
+    for q in qs:
+        k = int(np.searchsorted(cdf, q * cdf[-1], side="left"))
+        if k == 0 or k >= len(edges):
+            value = edges[0] if k == 0 else edges[-1]
+        elif discrete:
+            value = edges[k - 1]
+        else:
+            inside = (q * cdf[-1] - (cdf[k] - counts[k])) / counts[k]
+            value = edges[k - 1] + inside * (edges[k] - edges[k - 1])
+        out[f"p{round(q * 100):02d}"] = float(value)
+    return out
+
+
+def _compare(field, current, expected):
+    """PSI and KS of ``current`` against ``expected`` fine-bin counts."""
+    n, m = current.sum(), expected.sum()
+    groups = field.groups.max() + 1
+    actual = np.bincount(field.groups, current, minlength=groups)
+    baseline = np.bincount(field.groups, expected, minlength=groups)
+    # Half a row in every group keeps empty groups finite without moving populated ones
+    a = (actual + 0.5) / (n + 0.5 * groups)
+    e = (baseline + 0.5) / (m + 0.5 * groups)
+    psi = float(np.sum((a - e) * np.log(a / e)))
+    result = {"psi": psi, "status": "stable" if psi < PSI_MODERATE else
+              "moderate" if psi < PSI_SIGNIFICANT else "significant"}
+    if field.choices is None:
+        ks = float(np.abs(np.cumsum(current) / n - np.cumsum(expected) / m).max())
+        critical = KS_ALPHA_COEFFICIENT * math.sqrt((n + m) / (n * m))
+        result.update(ks=ks, ks_critical=critical, ks_significant=ks > critical)
+        result["quantiles"] = _quantiles(current, field.edges, field.discrete)
+        result["baseline_quantiles"] = _quantiles(expected, field.edges, field.discrete)
+    return result
+
+
+class DriftMonitor:
+    """Windowed fixed-bin histograms of form inputs and probabilities, compared with a baseline."""
+
+    def __init__(self, training=None, window_seconds=WINDOW_SECONDS, slots=SLOTS, reference_rows=REFERENCE_ROWS):
+        training = _read_training() if training is None else np.asarray(training, dtype=np.float64)
+        self.window_seconds = window_seconds
+        self.slots = slots
+        self.reference_rows = reference_rows
+        self.observed = 0
+        self._training = training
+        self._slot_seconds = window_seconds / slots
+        self._lock = threading.Lock()
+
+        self._numeric = [_Field.from_sample(name, training[:, j], "training") for j, name in enumerate(FEATURES)]
+        for name, (edges, per_group, discrete) in FORM_BINS.items():
+            self._numeric.append(_Field(name, edges, groups=np.arange(len(edges) + 1) // per_group,
+                                        discrete=discrete))
+        self._categorical = [_Field(name, choices=choices) for name, choices in FORM_CHOICES.items()]
+        self._fields = self._numeric + self._categorical
+        offset = 0
+        for field in self._fields:
+            field.offset = offset
+            offset += field.size
+        self._inputs_size = self._size = offset
+        # The probability field is last, so a new model only resizes the tail of each slot
+        self._probability = None
+        self._scorer = self._version = None
+        self._slot = None
+        self._counts = None
+        self._ring = [None] * slots  # (slot number, counts)
+
+    def _set_model(self, scorer):
+        """Rebuild the probability baseline if ``scorer`` is a different model; call with the lock held."""
+        if scorer is self._scorer:
+            return
+        version = model_version(scorer)
+        if version != self._version:
+            probabilities = scorer.predict(self._training)[1]
+            self._probability = _Field.from_sample("probability", probabilities, "training scores")
+            self._probability.offset = self._inputs_size
+            size = self._inputs_size + self._probability.size
+            # Scores from the previous model are not comparable with the new baseline
+            for i, entry in enumerate(self._ring):
+                if entry is not None:
+                    self._ring[i] = (entry[0], entry[1][:self._inputs_size] + [0] * self._probability.size)
+            if self._slot is not None:
+                self._counts = self._ring[self._slot % self.slots][1]
+            self._size = size
+        self._scorer, self._version = scorer, version
+
+    def _current(self, now):
+        """Counts of the slot containing ``now``, clearing a reused slot; call with the lock held."""
+        slot = int(now // self._slot_seconds)
+        if slot != self._slot:
+            self._slot = slot
+            self._counts = [0] * self._size
+            self._ring[slot % self.slots] = (slot, self._counts)
+        return self._counts
+
+    def observe(self, inputs, probability, scorer=None):
+        """Count one assessment: normalized form ``inputs`` and its predicted ``probability``."""
+        with self._lock:
+            if self._probability is None or scorer is not None:
+                self._set_model(scorer or _serving_scorer())
+            counts = self._current(time.time())
+            for field in self._numeric:
+                counts[field.offset + bisect_right(field.edge_list, inputs[field.name])] += 1
+            for field in self._categorical:
+                counts[field.offset + field.index.get(inputs[field.name], field.size - 1)] += 1
+            field = self._probability
+            counts[field.offset + bisect_right(field.edge_list, probability)] += 1
+            self._count(1)
+
+    def observe_many(self, records, probabilities, scorer=None):
+        """Count a batch of assessments in one vectorized pass."""
+        if len(records) < SMALL_BATCH:
+            for record, probability in zip(records, probabilities):
+                self.observe(record, probability, scorer)
+            return
+        bins = []
+        with self._lock:
+            if self._probability is None or scorer is not None:
+                self._set_model(scorer or _serving_scorer())
+            for field in self._fields:
+                bins.append(field.offset + field.bins([record[field.name] for record in records]))
+            bins.append(self._probability.offset + self._probability.bins(probabilities))
+            added = np.bincount(np.concatenate(bins), minlength=self._size)
+            counts = self._current(time.time())
+            counts[:] = (np.asarray(counts) + added).tolist()
+            self._count(len(records))
+
+    def _count(self, n):
+        before = self.observed
+        self.observed += n
+        if before < self.reference_rows <= self.observed:
+            # The form-only fields have no training data: the first assessments become their baseline
+            window = self._window(time.time())
+            for field in self._fields[len(FEATURES):]:
+                field.expected = window[field.offset:field.offset + field.size].astype(np.float64)
+                field.source = f"first {self.observed} assessments"
+
+    def _window(self, now):
+        oldest = int(now // self._slot_seconds) - self.slots
+        window = np.zeros(self._size, dtype=np.int64)
+        for entry in self._ring:
+            if entry is not None and entry[0] > oldest:
+                window += np.asarray(entry[1])
+        return window
+
+    def report(self):
+        """Per-field PSI, KS and quantiles of the current window against the baseline."""
+        with self._lock:
+            if self._probability is None:
+                self._set_model(_serving_scorer())
+            window = self._window(time.time())
+            fields = self._fields + [self._probability]
+            expected = {field.name: field.expected for field in fields}
+            sources = {field.name: field.source for field in fields}
+            observed = self.observed
+            version = self._version
+
+        report = {}
+        for field in fields:
+            current = window[field.offset:field.offset + field.size]
+            n = int(current.sum())
+            entry = {"rows": n, "baseline": sources[field.name]}
+            if expected[field.name] is None:
+                entry["status"] = f"collecting baseline ({observed}/{self.reference_rows} assessments)"
+            elif n < MIN_ROWS:
+                entry["status"] = f"insufficient data (fewer than {MIN_ROWS} rows in the window)"
+            else:
+                entry.update(_compare(field, current, expected[field.name]))
+            report[field.name] = entry
+        return {
+            # JSON has no Infinity; an unbounded window (the report CLI) is null
+            "window_seconds": self.window_seconds if math.isfinite(self.window_seconds) else None,
+            "observed": observed,
+            "model_version": version,
+            "drifted": [name for name, entry in report.items() if entry.get("status") == "significant"],
+            "fields": report,
+        }
+
+
+def _serving_scorer():
+    from .scoring import get_serving_scorer
+
+    return get_serving_scorer()
+
+
+_monitor = None
+_monitor_lock = threading.Lock()
+
+
+def get_drift_monitor():
+    """The process-wide monitor, or ``None`` when ``HEALTHCARE_DRIFT=off``."""
+    global _monitor
+    if DRIFT_MODE == "off":
+        return None
+    if _monitor is None:
+        with _monitor_lock:
+            if _monitor is None:
+                _monitor = DriftMonitor()
+    return _monitor
+
+
+if DRIFT_MODE != "off":
+    metrics.register_endpoint("/drift", lambda: get_drift_monitor().report())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report input and score drift against the training data.")
+    parser.add_argument("command", choices=["report"])
+    parser.add_argument("source", help="CSV of form inputs: the 13 model features, optionally bmi, exercise, "
+                                       "smoking and alcohol")
+    parser.add_argument("--chunksize", type=int, default=10_000)
+    args = parser.parse_args(argv)
+
+    import pandas as pd
+
+    from .assessment import assess_many
+
+    monitor = DriftMonitor(window_seconds=float("inf"), slots=1)
+    for chunk in pd.read_csv(args.source, chunksize=args.chunksize):
+        records = [normalize_inputs(row) for row in chunk.to_dict("records")]
+        monitor.observe_many(records, [result["probability"] for result in assess_many(records)])
+    print(json.dumps(monitor.report(), indent=2, allow_nan=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+"""Array-backed evaluation of the random forest in healthcare_recommendation_model.pkl.
+
+Every tree of the fitted ``RandomForestClassifier`` is flattened into one set
+of contiguous arrays indexed by a global node id: split feature, threshold,
+interleaved left/right children, a leaf flag and the positive-class fraction
+at each node. Evaluating a batch walks all (row, tree) pairs down one level
+per round with a few array gathers, dropping pairs as they reach a leaf, so
+there is no per-tree or per-row Python loop.
+
+scikit-learn compares float32 inputs against float64 thresholds. Each
+threshold is stored as the largest float32 not above it, which makes
+``x <= t`` give the same answer with both sides in float32. Probabilities
+therefore match ``predict_proba`` exactly, and the arrays take about a
+quarter of the memory of the unpickled estimator.
+
+The shipped pickle was written by scikit-learn 1.3, whose trees store class
+counts that ``predict_proba`` normalized per tree; leaf values are normalized
+here so the fitted model's probabilities come out under any version.
+"""
+
+import threading
+
+import numpy as np
+
+from .registry import get_registry
+from .schema import FEATURES, FOREST_MODEL_PATH, SCALER_PATH
+
+# Rows evaluated together; bounds the (rows * trees) node-id vector and keeps it cache-sized
+BLOCK_ROWS = 1024
+
+
+def _float32_floor(threshold):
+    t32 = threshold.astype(np.float32)
+    above = t32.astype(np.float64) > threshold
+    t32[above] = np.nextafter(t32[above], np.float32(-np.inf))
+    return t32
+
+
+class FlatForest:
+    """A forest of binary classification trees packed into flat NumPy arrays."""
+
+    def __init__(self, feature, threshold, children, is_leaf, value, roots, max_depth, classes=(0, 1)):
+        self.feature = feature      # (nodes,) int8 split feature
+        self.threshold = threshold  # (nodes,) float32, go right when x > threshold
+        self.children = children    # (2 * nodes,) int32, left child at 2i, right at 2i + 1
+        self.is_leaf = is_leaf      # (nodes,) bool
+        self.value = value          # (nodes,) float64 positive-class fraction
+        self.roots = roots          # (trees,) int32
+        self.max_depth = int(max_depth)
+        self.classes = np.asarray(classes)
+
+    @classmethod
+    def from_estimator(cls, forest):
+        if len(forest.classes_) != 2:
+            raise ValueError("FlatForest only supports binary classifiers")
+        features, thresholds, children, leaves, values, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            n = tree.node_count
+            index = np.arange(offset, offset + n, dtype=np.int32)
+            leaf = tree.children_left == -1
+            roots.append(offset)
+            features.append(np.where(leaf, 0, tree.feature).astype(np.int8))
+            thresholds.append(_float32_floor(np.where(leaf, 0.0, tree.threshold)))
+            children.append(np.column_stack([
+                np.where(leaf, index, tree.children_left + offset),
+                np.where(leaf, index, tree.children_right + offset),
+            ]).astype(np.int32).ravel())
+            leaves.append(leaf)
+            # Older pickles store class counts, newer ones fractions; normalize either way
+            counts = tree.value[:, 0, :]
+            values.append(counts[:, 1] / counts.sum(axis=1))
+            offset += n
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            children=np.concatenate(children),
+            is_leaf=np.concatenate(leaves),
+            value=np.concatenate(values),
+            roots=np.array(roots, dtype=np.int32),
+            max_depth=max(estimator.tree_.max_depth for estimator in forest.estimators_),
+            classes=forest.classes_,
+        )
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.children, self.is_leaf,
+                                      self.value, self.roots))
+
+    def leaves(self, X):
+        """Leaf node id reached in every tree, shape ``(rows, trees)``, for float32 rows."""
+        n_rows, n_trees = len(X), len(self.roots)
+        node = np.tile(self.roots, n_rows)
+        # Offset of each (row, tree) pair's row in the flattened input
+        row_base = np.repeat(np.arange(n_rows, dtype=np.int32) * X.shape[1], n_trees)
+        flat = np.ascontiguousarray(X).ravel()
+        active = np.arange(n_rows * n_trees, dtype=np.int32)
+        while len(active):
+            current = node[active]
+            go_right = flat[row_base[active] + self.feature[current]] > self.threshold[current]
+            current = self.children[2 * current + go_right]
+            node[active] = current
+            active = active[~self.is_leaf[current]]
+        return node.reshape(n_rows, n_trees)
+
+    def predict_proba_positive(self, X):
+        """Positive-class probability for already-scaled rows."""
+        X = np.asarray(X, dtype=np.float32)
+        out = np.empty(len(X))
+        for start in range(0, len(X), BLOCK_ROWS):
+            block = X[start:start + BLOCK_ROWS]
+            out[start:start + len(block)] = self.value[self.leaves(block)].mean(axis=1)
+        return out
+
+    def path_contributions(self, X):
+        """Saabas decomposition of the positive-class probability for already-scaled rows.
+
+        Returns ``(bias, contributions)``. ``bias`` is the mean root value and
+        ``contributions[i, j]`` sums, over every split on feature ``j`` along
+        row ``i``'s paths, the change in node value from parent to child,
+        averaged over trees. ``bias + contributions.sum(axis=1)`` equals the
+        predicted probability.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        n_features = X.shape[1]
+        out = np.zeros((len(X), n_features))
+        for start in range(0, len(X), BLOCK_ROWS):
+            block = np.ascontiguousarray(X[start:start + BLOCK_ROWS])
+            n_rows, n_trees = len(block), len(self.roots)
+            node = np.tile(self.roots, n_rows)
+            row = np.repeat(np.arange(n_rows, dtype=np.int32), n_trees)
+            flat = block.ravel()
+            totals = np.zeros(n_rows * n_features)
+            active = np.arange(n_rows * n_trees, dtype=np.int32)
+            # Same level-by-level walk as leaves(), crediting each step to the split's feature
+            while len(active):
+                current = node[active]
+                feature = self.feature[current]
+                go_right = flat[row[active] * n_features + feature] > self.threshold[current]
+                child = self.children[2 * current + go_right]
+                totals += np.bincount(row[active] * n_features + feature,
+                                      weights=self.value[child] - self.value[current], minlength=len(totals))
+                node[active] = child
+                active = active[~self.is_leaf[child]]
+            out[start:start + n_rows] = totals.reshape(n_rows, n_features) / n_trees
+        return float(self.value[self.roots].mean()), out
+
+
+class ForestScorer:
+    """Scaler + flattened forest with the same interface as ``LinearScorer``."""
+
+    contribution_units = "probability"
+
+    def __init__(self, mean, scale, forest):
+        self.mean = np.ascontiguousarray(mean, dtype=np.float64)
+        self.scale = np.ascontiguousarray(scale, dtype=np.float64)
+        self.forest = forest
+        self.classes = forest.classes
+
+    @classmethod
+    def from_estimators(cls, scaler, forest):
+        return cls(scaler.mean_, scaler.scale_, FlatForest.from_estimator(forest))
+
+    def predict(self, X):
+        scaled = (np.asarray(X, dtype=np.float64) - self.mean) / self.scale
+        probability = self.forest.predict_proba_positive(scaled)
+        # predict() takes the argmax of the two class probabilities; ties go to class 0
+        return self.classes[(probability > 0.5).astype(np.intp)], probability
+
+    def predict_one(self, row):
+        labels, probability = self.predict(np.asarray(row, dtype=np.float64).reshape(1, len(FEATURES)))
+        return labels[0], float(probability[0])
+
+    def contributions(self, X):
+        """(bias, per-feature contributions) to the probability; see :meth:`FlatForest.path_contributions`."""
+        return self.forest.path_contributions((np.asarray(X, dtype=np.float64) - self.mean) / self.scale)
+
+
+_compiled = {}
+_compiled_lock = threading.Lock()
+
+
+def get_forest_scorer():
+    """Flattened scorer for the current random forest and scaler.
+
+    Uses the memory-mapped compact export when one is current, otherwise
+    flattens the registry's pickled forest.
+    """
+    from .compact import get_compact_models
+
+    compact = get_compact_models()
+    if compact is not None:
+        return compact.forest_scorer()
+
+    registry = get_registry()
+    scaler = registry.get(SCALER_PATH)
+    forest = registry.get(FOREST_MODEL_PATH)
+    key = (id(scaler), id(forest))
+    scorer = _compiled.get(key)
+    if scorer is None:
+        with _compiled_lock:
+            scorer = _compiled.get(key)
+            if scorer is None:
+                scorer = ForestScorer.from_estimators(scaler, forest)
+                _compiled.clear()
+                _compiled[key] = scorer
+    return scorer
@@ -0,0 +1,246 @@
+"""Persistent per-user history of assessments and health goals.
+
+Results used to live only in ``st.session_state`` and vanished with the
+session. :class:`HistoryStore` keeps them in a local SQLite database in WAL
+mode:
+
+* **Batched appends.** :meth:`~HistoryStore.append_assessment` and
+  :meth:`~HistoryStore.append_goals` only enqueue the row. One writer thread
+  drains the queue and commits up to ``max_batch`` rows per transaction,
+  every ``flush_interval`` seconds or sooner when the batch fills, so
+  concurrent sessions never contend for the write lock or wait on fsync.
+  :meth:`~HistoryStore.flush` commits everything queued so far
+  immediately, for reads that must see a write just made.
+* **Range reads.** Both tables are indexed on ``(user_id, ts)``, so one
+  user's trend over any period is an index range scan however many other
+  users and rows the database holds. WAL lets those reads run while the
+  writer commits.
+
+    python -m healthcare.history stats      # rows, users and file size
+
+``HEALTHCARE_HISTORY`` overrides the database path; ``HEALTHCARE_HISTORY=off``
+disables history (``get_history_store()`` returns ``None``).
+"""
+
+import argparse
+import logging
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+from .schema import BASE_DIR
+
+logger = logging.getLogger(__name__)
+
+HISTORY_PATH = os.environ.get("HEALTHCARE_HISTORY", os.path.join(BASE_DIR, "assessment_history.sqlite3"))
+
+ASSESSMENT_COLUMNS = ("user_id", "ts", "probability", "risk_level", "risk_factors", "health_score",
+                      "trestbps", "chol", "bmi", "thalachh", "exercise")
+GOAL_COLUMNS = ("user_id", "ts", "target_bp", "target_chol", "target_bmi", "target_hr", "target_exercise")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS assessments (
+    user_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    probability REAL NOT NULL,
+    risk_level TEXT NOT NULL,
+    risk_factors INTEGER NOT NULL,
+    health_score REAL NOT NULL,
+    trestbps REAL, chol REAL, bmi REAL, thalachh REAL, exercise REAL
+);
+CREATE INDEX IF NOT EXISTS assessments_user_ts ON assessments (user_id, ts);
+CREATE TABLE IF NOT EXISTS goals (
+    user_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    target_bp REAL, target_chol REAL, target_bmi REAL, target_hr REAL, target_exercise REAL
+);
+CREATE INDEX IF NOT EXISTS goals_user_ts ON goals (user_id, ts);
+"""
+
+_INSERT = {
+    "assessments": f"INSERT INTO assessments ({', '.join(ASSESSMENT_COLUMNS)}) "
+                   f"VALUES ({', '.join('?' * len(ASSESSMENT_COLUMNS))})",
+    "goals": f"INSERT INTO goals ({', '.join(GOAL_COLUMNS)}) VALUES ({', '.join('?' * len(GOAL_COLUMNS))})",
+}
+
+
+def _connect(path):
+    connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    # In WAL mode NORMAL only fsyncs at checkpoints; a crash can lose the last commits, not corrupt the file
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+class HistoryStore:
+    def __init__(self, path=HISTORY_PATH, flush_interval=0.05, max_batch=2000, max_pending=100_000):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.appended = 0
+        self.committed = 0
+        self.batches = 0
+        connection = _connect(path)
+        connection.executescript(_SCHEMA)
+        connection.close()
+        self._queue = queue.Queue(max_pending)
+        self._local = threading.local()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="healthcare-history", daemon=True)
+        self._writer.start()
+
+    def append_assessment(self, user_id, probability, risk_level, risk_factors, health_score,
+                          trestbps=None, chol=None, bmi=None, thalachh=None, exercise=None, ts=None):
+        self._append("assessments", (user_id, time.time() if ts is None else ts, float(probability),
+                                     str(risk_level), int(risk_factors), float(health_score),
+                                     trestbps, chol, bmi, thalachh, exercise))
+
+    def append_goals(self, user_id, target_bp=None, target_chol=None, target_bmi=None, target_hr=None,
+                     target_exercise=None, ts=None):
+        self._append("goals", (user_id, time.time() if ts is None else ts,
+                               target_bp, target_chol, target_bmi, target_hr, target_exercise))
+
+    def _append(self, table, row):
+        if self._closed:
+            raise RuntimeError("history store is closed")
+        # Blocks only when max_pending rows are already waiting: backpressure on a stalled disk
+        self._queue.put((table, row))
+        self.appended += 1
+
+    def flush(self, timeout=None):
+        """Commit every row queued so far; returns False if ``timeout`` passed first."""
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        return done.wait(timeout)
+
+    def _write_loop(self):
+        connection = _connect(self.path)
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                rows = {"assessments": [], "goals": []}
+                waiters = []
+                deadline = time.monotonic() + self.flush_interval
+                count = 0
+                stop = False
+                while True:
+                    table, payload = item
+                    if table == "flush":
+                        waiters.append(payload)
+                        break  # commit now rather than waiting out the interval
+                    rows[table].append(payload)
+                    count += 1
+                    if count >= self.max_batch:
+                        break
+                    try:
+                        item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stop = True
+                        break
+                if count:
+                    try:
+                        with connection:
+                            for table, batch in rows.items():
+                                if batch:
+                                    connection.executemany(_INSERT[table], batch)
+                    except sqlite3.Error:
+                        # Keep the writer alive: later batches may succeed (e.g. once disk space frees up)
+                        logger.exception("dropped a batch of %d history rows", count)
+                    else:
+                        self.committed += count
+                        self.batches += 1
+                for waiter in waiters:
+                    waiter.set()
+                if stop:
+                    break
+        finally:
+            connection.close()
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._writer.join()
+
+    def _reader(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = _connect(self.path)
+        return connection
+
+    def _range(self, table, columns, user_id, since, until, limit):
+        query = f"SELECT {', '.join(columns[1:])} FROM {table} WHERE user_id = ? AND ts >= ? AND ts < ? ORDER BY ts"
+        params = [user_id, float("-inf") if since is None else since, float("inf") if until is None else until]
+        if limit is not None:
+            # The newest ``limit`` rows, still returned oldest first
+            query = f"SELECT * FROM ({query} DESC LIMIT ?) ORDER BY ts"
+            params.append(limit)
+        rows = self._reader().execute(query, params).fetchall()
+        return {name: [row[i] for row in rows] for i, name in enumerate(columns[1:])}
+
+    def assessments(self, user_id, since=None, until=None, limit=None):
+        """Columns (``ts``, ``probability``, ...) of the user's assessments in ``[since, until)``, oldest first."""
+        return self._range("assessments", ASSESSMENT_COLUMNS, user_id, since, until, limit)
+
+    def goals(self, user_id, since=None, until=None, limit=None):
+        return self._range("goals", GOAL_COLUMNS, user_id, since, until, limit)
+
+    def latest_goals(self, user_id):
+        """The user's most recent goals as a dict, or ``None``."""
+        goals = self.goals(user_id, limit=1)
+        if not goals["ts"]:
+            return None
+        return {name: values[0] for name, values in goals.items()}
+
+    def stats(self):
+        connection = self._reader()
+        return {
+            "path": self.path,
+            "assessments": connection.execute("SELECT COUNT(*) FROM assessments").fetchone()[0],
+            "goals": connection.execute("SELECT COUNT(*) FROM goals").fetchone()[0],
+            "users": connection.execute("SELECT COUNT(DISTINCT user_id) FROM assessments").fetchone()[0],
+            "file_bytes": sum(os.path.getsize(p) for p in (self.path, f"{self.path}-wal") if os.path.exists(p)),
+            "pending": self._queue.qsize(),
+            "committed": self.committed,
+            "batches": self.batches,
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_history_store():
+    """The process-wide store at ``HEALTHCARE_HISTORY``, or ``None`` when history is off."""
+    global _store
+    if HISTORY_PATH == "off":
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = HistoryStore(HISTORY_PATH)
+    return _store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect the assessment history database.")
+    parser.add_argument("command", choices=["stats"])
+    parser.add_argument("--path", default=HISTORY_PATH)
+    args = parser.parse_args(argv)
+
+    store = HistoryStore(args.path)
+    for name, value in store.stats().items():
+        print(f"{name:12s} {value}")
+    store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
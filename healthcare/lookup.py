@@ -0,0 +1,195 @@
+"""Precomputed per-feature logit contributions over the form's input grid.
+
+For a linear model the logit is ``intercept + sum_j coef_j * (x_j - mean_j) / scale_j``,
+a sum of independent per-feature terms. Every form input is bounded and
+discretized (integer sliders, 0.1-step ``oldpeak``, small categorical
+selects), so each term can be tabulated once for every reachable value. Scoring
+is then one gather from a ~1k-entry table plus a sigmoid.
+
+    python -m healthcare.lookup build   # writes heart_model.lut.npy / .json
+
+The table is stored as a plain ``.npy`` so it is memory-mapped read-only on
+load, with a JSON sidecar recording the grid and the hashes of the artifacts
+it was built from. Rows with any value off the grid fall back to
+:class:`~healthcare.scoring.LinearScorer`.
+
+Serving only uses the table with ``HEALTHCARE_LOOKUP=on``:
+``benchmarks/bench_lookup.py`` measures it at about half the speed of
+``LinearScorer``, which is the default.
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+
+import numpy as np
+
+from .compact import artifact_version as _artifact_version
+from .schema import BASE_DIR, FEATURES
+from .scoring import get_scorer
+
+TABLE_PATH = os.path.join(BASE_DIR, "heart_model.lut.npy")
+HEADER_PATH = os.path.join(BASE_DIR, "heart_model.lut.json")
+
+# (first value, step, number of values) for each feature, matching the app's widgets
+FORM_GRID = {
+    "age": (18, 1, 83),
+    "sex": (0, 1, 2),
+    "cp": (0, 1, 4),
+    "trestbps": (80, 1, 121),
+    "chol": (100, 1, 501),
+    "fbs": (0, 1, 2),
+    "restecg": (0, 1, 3),
+    "thalachh": (60, 1, 191),
+    "exang": (0, 1, 2),
+    "oldpeak": (0.0, 0.1, 101),
+    "slope": (0, 1, 3),
+    "ca": (0, 1, 5),
+    "thal": (0, 1, 3),
+}
+
+_GRID_TOLERANCE = 1e-6
+
+
+def build_table(scorer, grid=FORM_GRID):
+    """Return the concatenated contribution table for ``scorer`` over ``grid``."""
+    parts = []
+    for j, name in enumerate(FEATURES):
+        start, step, count = grid[name]
+        values = start + step * np.arange(count, dtype=np.float64)
+        parts.append(((values - scorer.mean[j]) / scorer.scale[j]) * scorer.coef[j])
+    return np.concatenate(parts)
+
+
+def artifact_version():
+    return _artifact_version("scaler", "logistic")
+
+
+def save_table(scorer, table_path=TABLE_PATH, header_path=HEADER_PATH, grid=FORM_GRID):
+    table = build_table(scorer, grid)
+    np.save(table_path, table)
+    header = {
+        "format": 1,
+        "features": FEATURES,
+        "grid": {name: list(grid[name]) for name in FEATURES},
+        "intercept": scorer.intercept,
+        "artifact_version": artifact_version(),
+    }
+    with open(header_path, "w") as fh:
+        json.dump(header, fh, indent=2)
+    return table
+
+
+class LookupScorer:
+    """Table-driven scorer with the same interface as ``LinearScorer``."""
+
+    contribution_units = "logit"
+
+    def __init__(self, table, grid, intercept, fallback):
+        self.table = table
+        self.intercept = float(intercept)
+        self.fallback = fallback
+        self.classes = fallback.classes
+        self.start = np.array([grid[name][0] for name in FEATURES], dtype=np.float64)
+        self.step = np.array([grid[name][1] for name in FEATURES], dtype=np.float64)
+        self.count = np.array([grid[name][2] for name in FEATURES], dtype=np.int64)
+        self.offset = np.concatenate([[0], np.cumsum(self.count)[:-1]]).astype(np.intp)
+        if int(self.count.sum()) != len(table):
+            raise ValueError("lookup table does not match its grid")
+        # Single-row scoring walks Python floats; the list is ~8 KB for the form grid
+        self._values = table.tolist()
+        self._cells = [
+            (float(grid[name][0]), float(grid[name][1]), int(grid[name][2]), int(offset))
+            for name, offset in zip(FEATURES, self.offset)
+        ]
+
+    @classmethod
+    def load(cls, table_path=TABLE_PATH, header_path=HEADER_PATH, fallback=None):
+        with open(header_path) as fh:
+            header = json.load(fh)
+        if header["features"] != FEATURES:
+            raise ValueError("lookup table was built for a different feature order")
+        table = np.load(table_path, mmap_mode="r")
+        return cls(table, header["grid"], header["intercept"], fallback or get_scorer())
+
+    def _grid_index(self, X):
+        position = (X - self.start) / self.step
+        index = np.rint(position)
+        on_grid = (np.abs(position - index) <= _GRID_TOLERANCE) & (index >= 0) & (index < self.count)
+        return index, on_grid.all(axis=-1)
+
+    def contributions(self, X):
+        return self.fallback.contributions(X)
+
+    def predict(self, X):
+        """Return (labels, probabilities); off-grid rows are scored by the fallback."""
+        from scipy.special import expit
+
+        X = np.asarray(X, dtype=np.float64)
+        index, on_grid = self._grid_index(X)
+        z = np.empty(len(X))
+        hits = index[on_grid].astype(np.intp) + self.offset
+        z[on_grid] = self.table[hits].sum(axis=1) + self.intercept
+        if not on_grid.all():
+            z[~on_grid] = self.fallback.decision_function(X[~on_grid])
+        return self.classes[(z > 0).astype(np.intp)], expit(z)
+
+    def predict_one(self, row):
+        """Score one row with plain-Python indexing; 13 gathers beat any NumPy dispatch here."""
+        z = self.intercept
+        values = self._values
+        for x, (start, step, count, offset) in zip(row.tolist() if hasattr(row, "tolist") else row, self._cells):
+            position = (x - start) / step
+            index = round(position)
+            if abs(position - index) > _GRID_TOLERANCE or not 0 <= index < count:
+                return self.fallback.predict_one(row)
+            z += values[offset + index]
+        if z >= 0:
+            probability = 1.0 / (1.0 + math.exp(-z))
+        else:
+            e = math.exp(z)
+            probability = e / (1.0 + e)
+        return self.classes[int(z > 0)], probability
+
+
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+def get_lookup_scorer(table_path=TABLE_PATH, header_path=HEADER_PATH):
+    """The lookup scorer if a table built from the current artifacts exists, else ``None``."""
+    if not (os.path.exists(table_path) and os.path.exists(header_path)):
+        return None
+    version = artifact_version()
+    key = (table_path, os.stat(table_path).st_mtime_ns, version)
+    scorer = _loaded.get(key)
+    if scorer is None:
+        with _loaded_lock:
+            scorer = _loaded.get(key)
+            if scorer is None:
+                with open(header_path) as fh:
+                    if json.load(fh).get("artifact_version") != version:
+                        return None  # stale table: the model or scaler changed since it was built
+                scorer = LookupScorer.load(table_path, header_path)
+                _loaded.clear()
+                _loaded[key] = scorer
+    return scorer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the precomputed contribution table.")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--table", default=TABLE_PATH)
+    parser.add_argument("--header", default=HEADER_PATH)
+    args = parser.parse_args(argv)
+
+    table = save_table(get_scorer(), args.table, args.header)
+    print(f"wrote {len(table)} contributions ({table.nbytes} bytes) to {args.table}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
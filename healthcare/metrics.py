@@ -0,0 +1,317 @@
+"""Per-stage timers and counters for the assessment flow.
+
+Disabled unless ``HEALTHCARE_METRICS`` is set:
+
+* ``HEALTHCARE_METRICS=9464`` serves the Prometheus text exposition at
+  ``http://127.0.0.1:9464/metrics`` from a background thread;
+* ``HEALTHCARE_METRICS=log`` writes the exposition to the ``healthcare.metrics``
+  logger, at most once every ``HEALTHCARE_METRICS_LOG_INTERVAL`` seconds
+  (default 60), checked whenever a session ends.
+
+Code is instrumented with ``with metrics.stage("predict"):`` and
+``metrics.count("assessments")``. While disabled, :func:`stage` and
+:func:`session` return a shared no-op context manager and :func:`count` returns
+immediately, so instrumented code pays one global lookup and a call.
+
+A :func:`session` groups the stages of one user action. With
+``HEALTHCARE_PROFILE_SLOW_MS`` set, a sampling profiler records the session
+thread's stack every ``HEALTHCARE_PROFILE_INTERVAL_MS`` (default 5) while it
+runs, and sessions slower than the threshold are passed to the slow-session
+hook -- by default a warning log with the stage timings and the hottest
+stacks in collapsed (flame graph) format. Replace it with
+:func:`set_slow_session_hook`.
+"""
+
+import bisect
+import contextlib
+import logging
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+METRICS_MODE = os.environ.get("HEALTHCARE_METRICS", "")
+LOG_INTERVAL = float(os.environ.get("HEALTHCARE_METRICS_LOG_INTERVAL", "60"))
+PROFILE_SLOW_MS = float(os.environ.get("HEALTHCARE_PROFILE_SLOW_MS", "0"))
+PROFILE_INTERVAL_MS = float(os.environ.get("HEALTHCARE_PROFILE_INTERVAL_MS", "5"))
+
+# Histogram upper bounds in seconds, from sub-millisecond model calls to multi-second cold loads
+BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Deepest stack kept per profiler sample
+MAX_STACK_DEPTH = 48
+
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Thread-safe histograms and counters rendered in Prometheus text format."""
+
+    def __init__(self, prefix="healthcare"):
+        self.prefix = prefix
+        self._histograms = {}  # (metric, label value) -> Histogram
+        self._counters = Counter()
+        self._lock = threading.Lock()
+
+    def observe(self, metric, label, seconds):
+        with self._lock:
+            histogram = self._histograms.get((metric, label))
+            if histogram is None:
+                histogram = self._histograms[(metric, label)] = Histogram()
+            histogram.observe(seconds)
+
+    def count(self, event, n=1):
+        with self._lock:
+            self._counters[event] += n
+
+    def render(self):
+        """The Prometheus text exposition of everything recorded so far."""
+        label_names = {"stage_seconds": "stage", "session_seconds": "session"}
+        help_text = {
+            "stage_seconds": "Time spent in each stage of the assessment flow.",
+            "session_seconds": "Time spent in each user action, across all its stages.",
+        }
+        lines = []
+        with self._lock:
+            for metric in ("stage_seconds", "session_seconds"):
+                name = f"{self.prefix}_{metric}"
+                series = sorted((label, h) for (m, label), h in self._histograms.items() if m == metric)
+                if not series:
+                    continue
+                lines.append(f"# HELP {name} {help_text[metric]}")
+                lines.append(f"# TYPE {name} histogram")
+                for label, histogram in series:
+                    key = f'{label_names[metric]}="{label}"'
+                    cumulative = 0
+                    for bound, n in zip(BUCKETS, histogram.counts):
+                        cumulative += n
+                        lines.append(f'{name}_bucket{{{key},le="{bound:g}"}} {cumulative}')
+                    lines.append(f'{name}_bucket{{{key},le="+Inf"}} {histogram.count}')
+                    lines.append(f"{name}_sum{{{key}}} {histogram.sum:.9g}")
+                    lines.append(f"{name}_count{{{key}}} {histogram.count}")
+            if self._counters:
+                name = f"{self.prefix}_events_total"
+                lines.append(f"# HELP {name} Count of notable events in the assessment flow.")
+                lines.append(f"# TYPE {name} counter")
+                for event, n in sorted(self._counters.items()):
+                    lines.append(f'{name}{{event="{event}"}} {n}')
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+_registry = MetricsRegistry()
+_enabled = False
+_local = threading.local()
+_NULL = contextlib.nullcontext()
+
+
+class _Stage:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        _registry.observe("stage_seconds", self.name, seconds)
+        current = getattr(_local, "session", None)
+        if current is not None:
+            current.stages[self.name] = current.stages.get(self.name, 0.0) + seconds
+        return False
+
+
+def stage(name):
+    """Time the enclosed block as stage ``name``."""
+    if not _enabled:
+        return _NULL
+    return _Stage(name)
+
+
+def count(event, n=1):
+    if _enabled:
+        _registry.count(event, n)
+
+
+class _Sampler(threading.Thread):
+    """Collects the target thread's stack every ``interval`` seconds until stopped."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name="healthcare-profiler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                code = frame.f_code
+                # Import machinery frames repeat at every nesting level of a lazy import
+                if not code.co_filename.startswith("<frozen "):
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        return self.samples
+
+
+def _log_slow_session(name, seconds, stages, samples):
+    timings = ", ".join(f"{label}={t * 1000:.1f}ms" for label, t in stages.items())
+    hottest = "\n".join(f"  {n} {stack}" for stack, n in samples.most_common(5))
+    logger.warning("slow %s session: %.1f ms (%s)\n%s", name, seconds * 1000, timings, hottest)
+
+
+_slow_session_hook = _log_slow_session
+
+
+def set_slow_session_hook(hook):
+    """Call ``hook(name, seconds, stages, samples)`` for each slow session.
+
+    ``stages`` maps stage name to seconds spent; ``samples`` is a ``Counter``
+    of collapsed stacks (``file:function;...``, outermost first).
+    """
+    global _slow_session_hook
+    _slow_session_hook = hook
+
+
+_last_log = 0.0
+
+
+class _Session:
+    __slots__ = ("name", "start", "stages", "sampler")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.stages = {}
+        self.sampler = None
+        if PROFILE_SLOW_MS > 0:
+            self.sampler = _Sampler(threading.get_ident(), PROFILE_INTERVAL_MS / 1000)
+            self.sampler.start()
+        _local.session = self
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        global _last_log
+        seconds = time.perf_counter() - self.start
+        _local.session = None
+        samples = self.sampler.stop() if self.sampler is not None else Counter()
+        _registry.observe("session_seconds", self.name, seconds)
+        if PROFILE_SLOW_MS > 0 and seconds * 1000 >= PROFILE_SLOW_MS:
+            _registry.count(f"slow_{self.name}_sessions")
+            _slow_session_hook(self.name, seconds, dict(self.stages), samples)
+        if METRICS_MODE == "log" and time.monotonic() - _last_log >= LOG_INTERVAL:
+            _last_log = time.monotonic()
+            logger.info("metrics\n%s", _registry.render())
+        return False
+
+
+def session(name):
+    """Group the stages timed inside the block as one user action called ``name``."""
+    if not _enabled:
+        return _NULL
+    return _Session(name)
+
+
+_server = None
+_endpoints = {}
+
+
+def register_endpoint(path, fn):
+    """Serve ``fn()`` as JSON at ``path`` on the metrics endpoint."""
+    _endpoints[path] = fn
+
+
+def start_http_server(port, host="127.0.0.1"):
+    """Serve ``/metrics`` (and registered JSON endpoints) on a daemon thread; returns the bound (host, port)."""
+    global _server
+    if _server is None:
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body = _registry.render().encode()
+                    content_type = "text/plain; version=0.0.4; charset=utf-8"
+                elif self.path in _endpoints:
+                    body = json.dumps(_endpoints[self.path]()).encode()
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        _server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=_server.serve_forever, name="healthcare-metrics", daemon=True).start()
+    return _server.server_address
+
+
+def enable(enabled=True):
+    global _enabled
+    _enabled = enabled
+
+
+def get_registry():
+    return _registry
+
+
+def _configure(mode):
+    if not mode:
+        return
+    enable()
+    if mode.isdigit():
+        try:
+            start_http_server(int(mode))
+        except OSError as exc:
+            # Another process (e.g. a second app server) already owns the port
+            logger.warning("metrics endpoint not started on port %s: %s", mode, exc)
+    elif mode == "log":
+        if not logger.handlers and not logging.getLogger().handlers:
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(levelname)s %(message)s"))
+            logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+    else:
+        raise ValueError(f"HEALTHCARE_METRICS must be a port number or 'log', not {mode!r}")
+
+
+_configure(METRICS_MODE)
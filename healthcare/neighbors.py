@@ -0,0 +1,251 @@
+"""Most similar reference patients in the standardized feature space.
+
+Patients are compared by Euclidean distance after ``scaler.pkl``'s
+standardization, the same space the models see. Three interchangeable index
+types answer k-nearest-neighbour queries:
+
+* ``brute``: a float32 matrix with precomputed squared norms, scanned in
+  fixed-size blocks with one matrix product per block and a running top-k;
+* ``kdtree`` / ``balltree``: scikit-learn's ``KDTree`` and ``BallTree``.
+
+Brute force needs no build and half the memory, but its query cost grows with
+the cohort; the KD-tree stays around a millisecond per query at 10M rows (see
+``benchmarks/bench_neighbors.py``).
+
+    python -m healthcare.neighbors build [--kind kdtree] [--data CSV ...]
+
+writes ``similar_patients/`` next to the model artifacts: the standardized
+points and outcomes as plain ``.npy`` files (memory-mapped read-only on load),
+the pickled tree for the tree kinds, and a JSON header recording the scaler
+it was built with. Exact duplicate rows -- the merged reference dataset
+repeats most patients -- are dropped at build time. Without a current
+persisted index, the app builds a brute-force one over the reference dataset
+in memory on first use.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+
+import numpy as np
+
+from .compact import artifact_version, scaler_statistics
+from .registry import file_sha256
+from .schema import BASE_DIR, DATA_PATH, FEATURES, TARGET
+
+INDEX_DIR = os.path.join(BASE_DIR, "similar_patients")
+INDEX_KINDS = ("brute", "kdtree", "balltree")
+
+# Reference rows compared per matrix product in the brute-force scan
+BLOCK_ROWS = 1 << 16
+
+
+class BruteForceIndex:
+    """Blocked exhaustive search over a float32 matrix."""
+
+    kind = "brute"
+
+    def __init__(self, points, norms=None):
+        self.points = points
+        self.norms = norms if norms is not None else np.einsum("ij,ij->i", points, points)
+
+    @property
+    def nbytes(self):
+        return self.points.nbytes + self.norms.nbytes
+
+    def query(self, queries, k):
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        k = min(k, len(self.points))
+        rows = np.arange(len(queries))[:, None]
+        best_d = np.empty((len(queries), 0), dtype=np.float32)
+        best_i = np.empty((len(queries), 0), dtype=np.intp)
+        for start in range(0, len(self.points), BLOCK_ROWS):
+            block = self.points[start:start + BLOCK_ROWS]
+            # |q|^2 is the same for every candidate of a query, so it is left out of the ranking
+            d = self.norms[start:start + len(block)] - 2.0 * (queries @ block.T)
+            if d.shape[1] > k:
+                part = np.argpartition(d, k - 1, axis=1)[:, :k]
+                d = d[rows, part]
+            else:
+                part = np.broadcast_to(np.arange(d.shape[1]), d.shape)
+            best_d = np.concatenate([best_d, d], axis=1)
+            best_i = np.concatenate([best_i, part + start], axis=1)
+            if best_d.shape[1] > k:
+                keep = np.argpartition(best_d, k - 1, axis=1)[:, :k]
+                best_d, best_i = best_d[rows, keep], best_i[rows, keep]
+        # Exact distances for the survivors only, in float64
+        diff = self.points[best_i].astype(np.float64) - queries[:, None, :]
+        distances = np.sqrt((diff * diff).sum(axis=2))
+        order = np.lexsort((best_i, distances), axis=1)
+        return distances[rows, order], best_i[rows, order]
+
+
+class TreeIndex:
+    """scikit-learn ``KDTree`` or ``BallTree`` behind the same interface."""
+
+    def __init__(self, kind, tree):
+        self.kind = kind
+        self.tree = tree
+
+    @classmethod
+    def build(cls, kind, points, leaf_size=40):
+        from sklearn.neighbors import BallTree, KDTree
+
+        tree_type = KDTree if kind == "kdtree" else BallTree
+        return cls(kind, tree_type(points, leaf_size=leaf_size))
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in self.tree.get_arrays())
+
+    def query(self, queries, k):
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float64))
+        return self.tree.query(queries, k=min(k, self.tree.data.shape[0]), sort_results=True)
+
+
+def build_index(kind, points):
+    if kind == "brute":
+        return BruteForceIndex(points)
+    if kind in ("kdtree", "balltree"):
+        return TreeIndex.build(kind, points)
+    raise ValueError(f"unknown index kind {kind!r}; expected one of {', '.join(INDEX_KINDS)}")
+
+
+class SimilarPatients:
+    """A neighbour index over standardized reference patients and their outcomes."""
+
+    def __init__(self, index, targets, mean, scale):
+        self.index = index
+        self.targets = targets
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+
+    @classmethod
+    def from_columns(cls, X, y, mean, scale, kind="brute"):
+        """Build from raw feature rows ``X`` and outcomes ``y``, dropping exact duplicates."""
+        rows = np.unique(np.column_stack([X, y]).astype(np.float32), axis=0)
+        points = ((rows[:, :-1] - mean) / scale).astype(np.float32)
+        return cls(build_index(kind, points), rows[:, -1].astype(np.int8), mean, scale)
+
+    @classmethod
+    def from_csv(cls, paths, mean, scale, kind="brute", chunksize=500_000):
+        import pandas as pd
+
+        if isinstance(paths, str):
+            paths = [paths]
+        X, y = [], []
+        for path in paths:
+            for chunk in pd.read_csv(path, usecols=FEATURES + [TARGET], chunksize=chunksize):
+                X.append(chunk[FEATURES].to_numpy(dtype=np.float32))
+                y.append(chunk[TARGET].to_numpy(dtype=np.int8))
+        return cls.from_columns(np.concatenate(X), np.concatenate(y), mean, scale, kind)
+
+    def __len__(self):
+        return len(self.targets)
+
+    def points(self, indices):
+        """Standardized rows for ``indices``, whatever the index kind stores."""
+        if isinstance(self.index, BruteForceIndex):
+            return np.asarray(self.index.points[indices], dtype=np.float64)
+        return np.asarray(self.index.tree.data)[indices]
+
+    def query(self, X, k=5):
+        """Return (distances, indices) of the ``k`` nearest patients for each raw feature row."""
+        scaled = (np.atleast_2d(np.asarray(X, dtype=np.float64)) - self.mean) / self.scale
+        return self.index.query(scaled, k)
+
+    def similar(self, row, k=5):
+        """The ``k`` nearest patients to one raw feature row as display-ready dicts."""
+        distances, indices = self.query(row, k)
+        raw = self.points(indices[0]) * self.scale + self.mean
+        return [
+            {"distance": float(d), TARGET: int(self.targets[i]),
+             **{name: round(float(v), 1) + 0.0 for name, v in zip(FEATURES, values)}}
+            for d, i, values in zip(distances[0], indices[0], raw)
+        ]
+
+    def save(self, directory=INDEX_DIR, source=None):
+        os.makedirs(directory, exist_ok=True)
+        if isinstance(self.index, BruteForceIndex):
+            np.save(os.path.join(directory, "points.npy"), self.index.points)
+            np.save(os.path.join(directory, "norms.npy"), self.index.norms)
+        else:
+            import joblib
+
+            joblib.dump(self.index.tree, os.path.join(directory, "tree.pkl"))
+        np.save(os.path.join(directory, "targets.npy"), self.targets)
+        header = {
+            "format": 1,
+            "kind": self.index.kind,
+            "features": FEATURES,
+            "rows": len(self),
+            "mean": self.mean.tolist(),
+            "scale": self.scale.tolist(),
+            "scaler_version": artifact_version("scaler"),
+            "source": source,
+        }
+        with open(os.path.join(directory, "header.json"), "w") as fh:
+            json.dump(header, fh, indent=2)
+
+    @classmethod
+    def load(cls, directory=INDEX_DIR):
+        with open(os.path.join(directory, "header.json")) as fh:
+            header = json.load(fh)
+        if header["features"] != FEATURES:
+            raise ValueError("neighbour index was built for a different feature order")
+        if header["kind"] == "brute":
+            index = BruteForceIndex(np.load(os.path.join(directory, "points.npy"), mmap_mode="r"),
+                                    np.load(os.path.join(directory, "norms.npy"), mmap_mode="r"))
+        else:
+            import joblib
+
+            index = TreeIndex(header["kind"], joblib.load(os.path.join(directory, "tree.pkl")))
+        targets = np.load(os.path.join(directory, "targets.npy"), mmap_mode="r")
+        return cls(index, targets, header["mean"], header["scale"])
+
+
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+def get_similar_patients(directory=INDEX_DIR):
+    """The persisted index if it matches the current scaler, else one built over the reference data."""
+    version = artifact_version("scaler")
+    header_path = os.path.join(directory, "header.json")
+    mtime = os.stat(header_path).st_mtime_ns if os.path.exists(header_path) else None
+    key = (directory, mtime, version)
+    index = _loaded.get(key)
+    if index is None:
+        with _loaded_lock:
+            index = _loaded.get(key)
+            if index is None:
+                if mtime is not None:
+                    with open(header_path) as fh:
+                        if json.load(fh).get("scaler_version") == version:
+                            index = SimilarPatients.load(directory)
+                if index is None:
+                    index = SimilarPatients.from_csv(DATA_PATH, *scaler_statistics())
+                _loaded.clear()
+                _loaded[key] = index
+    return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the similar-patients index.")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--kind", choices=INDEX_KINDS, default="kdtree")
+    parser.add_argument("--data", nargs="+", default=[DATA_PATH], help="reference CSVs with features and target")
+    parser.add_argument("--output", default=INDEX_DIR)
+    args = parser.parse_args(argv)
+
+    index = SimilarPatients.from_csv(args.data, *scaler_statistics(), kind=args.kind)
+    source = [{"path": os.path.relpath(path, BASE_DIR), "sha256": file_sha256(path)} for path in args.data]
+    index.save(args.output, source)
+    print(f"wrote {args.kind} index over {len(index):,} patients ({index.index.nbytes / 2**20:.1f} MiB) to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
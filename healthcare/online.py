@@ -0,0 +1,266 @@
+"""Incremental updates of the logistic model from newly labelled outcomes.
+
+    python -m healthcare.online update outcomes.csv [--chunksize 10000] [--install]
+
+Retraining from scratch refits on the whole history. :class:`OnlineLogistic`
+instead starts from the installed model and moves it with each batch of new
+rows (the 13 features and ``target``), so an update costs time proportional to
+the new rows only:
+
+* **Running scaler statistics.** The row count, mean and sum of squared
+  deviations are merged batch by batch (Chan et al.'s parallel update),
+  seeded from the fitted ``StandardScaler``.
+* **Weights follow the statistics.** The weights live in the space
+  standardized by the running statistics. When a batch moves the statistics,
+  the weights and intercept are re-expressed so the model's predictions are
+  unchanged by the move itself; only the gradient steps change them.
+* **Mini-batch SGD** on the same objective as ``LogisticRegression`` (log
+  loss plus an L2 penalty of ``1 / (2 C n)`` per row).
+
+:meth:`~OnlineLogistic.save` writes a versioned directory under ``artifacts/``
+like :mod:`healthcare.train`. ``scaler.pkl`` is shared with the random forest,
+so it is copied unchanged and the learner's weights are expressed in that
+scaler's space instead. ``--install`` swaps the new ``heart_model.pkl`` in with
+:func:`healthcare.train.install`; running apps pick it up on their next read,
+with no restart. The learner's state is kept in ``online_state.json`` so the
+next run continues from it, as long as the installed model is still the one
+it produced.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from .registry import file_sha256, get_registry
+from .schema import BASE_DIR, FEATURES, FOREST_MODEL_PATH, HEART_MODEL_PATH, SCALER_PATH, TARGET
+from .train import ARTIFACTS_DIR, install
+
+STATE_PATH = os.path.join(BASE_DIR, "online_state.json")
+
+
+def _scale(var):
+    scale = np.sqrt(var)
+    scale[scale == 0.0] = 1.0  # constant features, as StandardScaler handles them
+    return scale
+
+
+def _reexpress(coef, intercept, mean, scale, new_mean, new_scale):
+    """Weights giving the same logits for inputs standardized by (new_mean, new_scale)."""
+    return coef * new_scale / scale, intercept + float(np.sum(coef * (new_mean - mean) / scale))
+
+
+class OnlineLogistic:
+    """Logistic regression updated by mini-batch SGD, with running standardization."""
+
+    def __init__(self, count, mean, m2, coef, intercept, C=1.0, learning_rate=0.05, batch_size=64,
+                 updates=0, seed=0):
+        self.count = int(count)
+        self.mean = np.asarray(mean, dtype=np.float64).copy()
+        self.m2 = np.asarray(m2, dtype=np.float64).copy()
+        self.coef = np.asarray(coef, dtype=np.float64).ravel().copy()
+        self.intercept = float(intercept)
+        self.C = C
+        self.learning_rate = learning_rate
+        self.batch_size = batch_size
+        self.updates = updates
+        self._rng = np.random.default_rng(seed)
+
+    @classmethod
+    def from_estimators(cls, scaler, model, **options):
+        """Seed from a fitted ``StandardScaler`` and ``LogisticRegression``."""
+        if list(model.classes_) != [0, 1]:
+            raise ValueError("OnlineLogistic expects a binary model with classes [0, 1]")
+        count = int(np.max(scaler.n_samples_seen_))
+        # The model's weights are in the scaler's space, which is the running space at the start
+        return cls(count, scaler.mean_, scaler.var_ * count, model.coef_, model.intercept_[0],
+                   C=getattr(model, "C", 1.0), **options)
+
+    @property
+    def scale(self):
+        return _scale(self.m2 / self.count)
+
+    def decision_function(self, X):
+        return ((np.asarray(X, dtype=np.float64) - self.mean) / self.scale) @ self.coef + self.intercept
+
+    def predict_proba_positive(self, X):
+        from scipy.special import expit
+
+        return expit(self.decision_function(X))
+
+    def _merge_statistics(self, X):
+        n = len(X)
+        batch_mean = X.mean(axis=0)
+        batch_m2 = ((X - batch_mean) ** 2).sum(axis=0)
+        delta = batch_mean - self.mean
+        total = self.count + n
+        new_mean = self.mean + delta * n / total
+        new_m2 = self.m2 + batch_m2 + delta ** 2 * self.count * n / total
+
+        old_scale = self.scale
+        self.count, self.m2 = total, new_m2
+        self.coef, self.intercept = _reexpress(self.coef, self.intercept, self.mean, old_scale,
+                                               new_mean, self.scale)
+        self.mean = new_mean
+
+    def partial_fit(self, X, y, epochs=1):
+        """Update with one batch of labelled rows; returns its log loss before the update."""
+        from scipy.special import expit
+
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != len(FEATURES) or len(X) != len(y):
+            raise ValueError(f"expected ({len(y)}, {len(FEATURES)}) features for {len(y)} targets")
+        if not np.isin(y, (0.0, 1.0)).all():
+            raise ValueError(f"{TARGET} must be 0 or 1")
+        if not len(X):
+            return float("nan")
+
+        # Progressive validation: score the batch with the model that has not seen it yet
+        p = np.clip(self.predict_proba_positive(X), 1e-15, 1 - 1e-15)
+        loss = float(-np.mean(y * np.log(p) + (1 - y) * np.log(1 - p)))
+
+        self._merge_statistics(X)
+        Z = (X - self.mean) / self.scale
+        penalty = 1.0 / (self.C * self.count)
+        for _ in range(epochs):
+            order = self._rng.permutation(len(Z))
+            for start in range(0, len(Z), self.batch_size):
+                rows = order[start:start + self.batch_size]
+                error = expit(Z[rows] @ self.coef + self.intercept) - y[rows]
+                self.coef -= self.learning_rate * (Z[rows].T @ error / len(rows) + penalty * self.coef)
+                self.intercept -= self.learning_rate * float(error.mean())
+        self.updates += 1
+        return loss
+
+    def to_estimator(self, scaler):
+        """A fitted ``LogisticRegression`` equivalent to this model for inputs scaled by ``scaler``."""
+        from sklearn.linear_model import LogisticRegression
+
+        coef, intercept = _reexpress(self.coef, self.intercept, self.mean, self.scale,
+                                     scaler.mean_, _scale(scaler.var_))
+        model = LogisticRegression(C=self.C)
+        model.classes_ = np.array([0, 1])
+        model.coef_ = coef.reshape(1, -1)
+        model.intercept_ = np.array([intercept])
+        model.n_features_in_ = len(FEATURES)
+        model.n_iter_ = np.array([self.updates], dtype=np.int32)
+        return model
+
+    def state(self):
+        return {
+            "count": self.count,
+            "mean": self.mean.tolist(),
+            "m2": self.m2.tolist(),
+            "coef": self.coef.tolist(),
+            "intercept": self.intercept,
+            "C": self.C,
+            "learning_rate": self.learning_rate,
+            "batch_size": self.batch_size,
+            "updates": self.updates,
+        }
+
+    @classmethod
+    def from_state(cls, state, **options):
+        """Resume from :meth:`state`; ``options`` (e.g. ``learning_rate``) override the saved settings."""
+        settings = {"learning_rate": state["learning_rate"], "batch_size": state["batch_size"], **options}
+        return cls(state["count"], state["mean"], state["m2"], state["coef"], state["intercept"], C=state["C"],
+                   updates=state["updates"], **settings)
+
+    def save(self, output_dir=ARTIFACTS_DIR, history=None):
+        """Write a versioned artifact directory with the updated model; returns its path."""
+        import joblib
+
+        registry = get_registry()
+        scaler = registry.get(SCALER_PATH)
+        version = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}-online{self.updates}"
+        target = os.path.join(output_dir, version)
+        os.makedirs(target)
+        joblib.dump(self.to_estimator(scaler), os.path.join(target, os.path.basename(HEART_MODEL_PATH)))
+        for source in (SCALER_PATH, FOREST_MODEL_PATH):
+            shutil.copyfile(source, os.path.join(target, os.path.basename(source)))
+
+        heart_sha = file_sha256(os.path.join(target, os.path.basename(HEART_MODEL_PATH)))
+        metadata = {
+            "version": version,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "features": FEATURES,
+            "target": TARGET,
+            "online": {"rows_seen": self.count, "updates": self.updates, "history": history or []},
+            "artifacts": {
+                os.path.basename(HEART_MODEL_PATH): "Logistic Regression (online update)",
+                os.path.basename(FOREST_MODEL_PATH): "unchanged",
+                os.path.basename(SCALER_PATH): "unchanged",
+            },
+            "heart_model_sha256": heart_sha,
+        }
+        with open(os.path.join(target, "metadata.json"), "w") as fh:
+            json.dump(metadata, fh, indent=2)
+        with open(os.path.join(target, "online_state.json"), "w") as fh:
+            json.dump({"heart_model_sha256": heart_sha, **self.state()}, fh)
+        return target
+
+
+def current_learner(state_path=STATE_PATH, **options):
+    """Resume from ``state_path`` if it produced the installed model, else seed from the installed artifacts."""
+    if os.path.exists(state_path):
+        with open(state_path) as fh:
+            state = json.load(fh)
+        if state.get("heart_model_sha256") == file_sha256(HEART_MODEL_PATH):
+            return OnlineLogistic.from_state(state, **options)
+    registry = get_registry()
+    return OnlineLogistic.from_estimators(registry.get(SCALER_PATH), registry.get(HEART_MODEL_PATH), **options)
+
+
+def update_from_csv(learner, source, chunksize=10_000, epochs=1, progress=None):
+    """Stream labelled rows from ``source`` into ``learner``; returns per-chunk (rows, log loss)."""
+    import pandas as pd
+
+    history = []
+    for chunk in pd.read_csv(source, chunksize=chunksize):
+        missing = [name for name in FEATURES + [TARGET] if name not in chunk]
+        if missing:
+            raise ValueError(f"{source} is missing columns: {', '.join(missing)}")
+        loss = learner.partial_fit(chunk[FEATURES].to_numpy(dtype=np.float64), chunk[TARGET].to_numpy(), epochs)
+        history.append({"rows": len(chunk), "log_loss_before": loss})
+        if progress is not None:
+            progress(history[-1])
+    return history
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Update the logistic model from newly labelled outcomes.")
+    parser.add_argument("command", choices=["update"])
+    parser.add_argument("source", help=f"CSV with the 13 model features and {TARGET!r}")
+    parser.add_argument("--chunksize", type=int, default=10_000, help="rows per update (default: 10000)")
+    parser.add_argument("--epochs", type=int, default=1, help="passes over each chunk")
+    parser.add_argument("--learning-rate", type=float, default=None,
+                        help="SGD step size (default: the resumed learner's, else 0.05)")
+    parser.add_argument("--output", default=ARTIFACTS_DIR)
+    parser.add_argument("--install", action="store_true", help="hot-swap the updated model into the app")
+    args = parser.parse_args(argv)
+
+    options = {"learning_rate": args.learning_rate} if args.learning_rate is not None else {}
+    learner = current_learner(**options)
+    start = time.perf_counter()
+    history = update_from_csv(learner, args.source, args.chunksize, args.epochs, progress=lambda h: print(
+        f"{h['rows']:,} rows, log loss before update {h['log_loss_before']:.4f}"))
+    rows = sum(h["rows"] for h in history)
+    print(f"updated on {rows:,} rows in {time.perf_counter() - start:.2f}s")
+
+    target = learner.save(args.output, history)
+    print(f"wrote {target}")
+    if args.install:
+        install(target)
+        shutil.copyfile(os.path.join(target, "online_state.json"), STATE_PATH)
+        print("installed the updated model")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,398 @@
+"""Process pool for CPU-bound scoring, assessment and what-if work.
+
+One Python process scores every request under one GIL. :class:`WorkerPool`
+fans work out to worker processes instead:
+
+* **Shared weights.** Workers serve from the compact export
+  (:mod:`healthcare.compact`), which each one memory-maps read-only, so N
+  workers hold one physical copy of the model. When no current export exists
+  the pool writes one to a temporary directory for its workers, and writes it
+  again when the pickles it came from are replaced. Workers re-map the export
+  when it is replaced, so installed models reach them without restarting the
+  pool.
+* **Chunked tasks, handed out as workers free up.** Large batches are cut
+  into ``chunk_rows`` pieces and each worker is sent the next piece as soon as
+  it is free, so a slow chunk never leaves the other workers idle behind it.
+* **Backpressure.** At most ``max_pending`` tasks are queued or running;
+  :meth:`WorkerPool.submit` waits for a free slot, or raises :class:`PoolBusy`
+  when called with ``block=False`` or its wait times out.
+* **Deadlines.** Every task may carry a deadline. Tasks that expire while
+  queued are never sent to a worker, and waiting for results past the
+  deadline raises :class:`DeadlineExceeded`.
+* **Worker failure.** Each worker has its own pipe and runs one task at a
+  time, so the pool knows which task a worker holds. When a worker dies, only
+  that task fails, and a replacement worker is started.
+
+``HEALTHCARE_WORKERS=N`` is the default ``--workers`` of the scoring service
+and of :mod:`healthcare.batch`; unset or 0 means they score in-process.
+"""
+
+import collections
+import itertools
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from multiprocessing import connection
+
+import numpy as np
+
+from .scoring import SERVING_MODEL
+
+WORKERS = int(os.environ.get("HEALTHCARE_WORKERS", "0") or 0)
+
+# Rows per task when a batch is split across workers
+CHUNK_ROWS = 8192
+
+# How often the result collector checks its workers, and idle workers their parent
+LIVENESS_INTERVAL = 1.0
+
+
+
+class PoolBusy(RuntimeError):
+    """Raised when the pool already has ``max_pending`` tasks."""
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a task's deadline passes before its result is available."""
+
+
+# Worker-process state, set by _worker_init and refreshed when the export is replaced
+_scorers = None
+_compact_key = None
+
+
+def _worker_init(compact_path):
+    global _scorers, _compact_key
+    from .compact import load
+    from .registry import _stat_key
+
+    key = _stat_key(compact_path)
+    if key == _compact_key:
+        return
+    # Exports are written with os.replace, so a changed file is a new model (e.g. an online update)
+    models = load(compact_path)
+    _scorers = {"logistic": models.linear_scorer(), "forest": models.forest_scorer()}
+    _compact_key = key
+
+
+def _score(scorer, X):
+    return scorer.predict(X)
+
+
+def _assess(scorer, records):
+    from .assessment import assess_many
+
+    return assess_many(records, scorer=scorer)
+
+
+def _what_if(scorer, requests):
+    from .whatif import what_if
+
+    return [what_if(inputs, targets, steps, scorer=scorer) for inputs, targets, steps in requests]
+
+
+_HANDLERS = {"score": _score, "assess": _assess, "what_if": _what_if}
+
+
+def _worker_main(conn, compact_path):
+    _worker_init(compact_path)
+    parent = multiprocessing.parent_process()
+    while True:
+        if not conn.poll(LIVENESS_INTERVAL):
+            if not parent.is_alive():
+                break  # the parent was killed without closing the pool
+            continue
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        task_id, kind, model, payload = task
+        try:
+            _worker_init(compact_path)
+            message = (task_id, True, _HANDLERS[kind](_scorers[model], payload))
+        except Exception as exc:
+            message = (task_id, False, exc)
+        conn.send(message)
+
+
+def _source_keys():
+    from .compact import _SOURCES
+    from .registry import _stat_key
+
+    return tuple(_stat_key(path) if os.path.exists(path) else None for path in _SOURCES.values())
+
+
+class WorkerPool:
+    def __init__(self, workers=None, max_pending=None, chunk_rows=CHUNK_ROWS, compact_path=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 4 * self.workers
+        self.chunk_rows = chunk_rows
+        self.compact_path = compact_path
+        self.submitted = 0
+        self.rejected = 0
+        self.expired = 0
+        self.restarted = 0
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._futures = {}
+        self._ids = itertools.count()
+        self._tmpdir = None
+        self._exported_from = None
+        self._export_lock = threading.Lock()
+        self._processes = []
+        # Tasks not yet handed to a worker, the idle workers, and the task each busy worker holds
+        self._lock = threading.Lock()
+        self._backlog = collections.deque()
+        self._idle = []
+        self._running = {}
+        self._closed = False
+
+    def start(self):
+        from .compact import get_compact_models
+
+        if self.compact_path is None:
+            compact = get_compact_models()
+            if compact is not None:
+                from .compact import COMPACT_PATH
+
+                self.compact_path = COMPACT_PATH
+            else:
+                from .compact import export
+
+                self._tmpdir = tempfile.mkdtemp(prefix="healthcare-pool-")
+                self.compact_path = os.path.join(self._tmpdir, "models.flat")
+                self._exported_from = _source_keys()
+                export(self.compact_path)
+
+        # spawn, not fork: the parent may be a threaded Streamlit or asyncio server
+        self._context = multiprocessing.get_context("spawn")
+        # One pipe per worker rather than shared queues: a worker killed while holding a shared
+        # queue's lock would block every other worker, and the parent always knows who runs what
+        self._conns = [None] * self.workers
+        self._processes = [None] * self.workers
+        for index in range(self.workers):
+            self._spawn(index)
+        self._wakeup, self._wake = self._context.Pipe(duplex=False)
+        self._collector = threading.Thread(target=self._collect, name="healthcare-pool-results", daemon=True)
+        self._collector.start()
+        return self
+
+    def _refresh_export(self):
+        """Re-export the pool's private copy when the pickles it came from were replaced (e.g. installed)."""
+        if self._tmpdir is None or _source_keys() == self._exported_from:
+            return
+        from .compact import export
+
+        with self._export_lock:
+            keys = _source_keys()
+            if keys != self._exported_from:
+                # Keys are taken before exporting, so a file replaced mid-export triggers another one
+                self._exported_from = keys
+                export(self.compact_path)
+
+    def _spawn(self, index):
+        conn, child_conn = self._context.Pipe()
+        process = self._context.Process(target=_worker_main, args=(child_conn, self.compact_path),
+                                        name=f"healthcare-worker-{index}", daemon=True)
+        process.start()
+        child_conn.close()
+        self._conns[index], self._processes[index] = conn, process
+        self._idle.append(index)
+
+    def _finish(self, task_id, ok, value):
+        future = self._futures.pop(task_id, None)
+        if future is None:
+            return
+        self._slots.release()
+        if ok:
+            future.set_result(value)
+        else:
+            if isinstance(value, DeadlineExceeded):
+                self.expired += 1
+            future.set_exception(value)
+
+    def _dispatch(self):
+        """Hand queued tasks to idle workers; each worker holds at most one task."""
+        sends, expired = [], []
+        with self._lock:
+            while self._idle and self._backlog:
+                task_id, kind, model, payload, deadline = self._backlog.popleft()
+                if deadline is not None and time.monotonic() > deadline:
+                    expired.append(task_id)
+                    continue
+                index = self._idle.pop()
+                self._running[index] = task_id
+                sends.append((self._conns[index], (task_id, kind, model, payload)))
+        for task_id in expired:
+            self._finish(task_id, False, DeadlineExceeded("deadline passed while queued"))
+        for conn, task in sends:
+            try:
+                conn.send(task)
+            except OSError:
+                pass  # the worker died; the collector fails its task and replaces it
+
+    def _collect(self):
+        while True:
+            with self._lock:
+                conns = {conn: index for index, conn in enumerate(self._conns)}
+                sentinels = {process.sentinel: index for index, process in enumerate(self._processes)}
+            ready = connection.wait([self._wakeup, *conns, *sentinels], timeout=LIVENESS_INTERVAL)
+            if self._closed:
+                break
+            for item in ready:
+                if item in conns:
+                    try:
+                        task_id, ok, value = item.recv()
+                    except (EOFError, OSError):
+                        continue  # the worker died; its sentinel is ready too
+                    with self._lock:
+                        index = conns[item]
+                        if self._running.get(index) == task_id:
+                            del self._running[index]
+                            self._idle.append(index)
+                    self._finish(task_id, ok, value)
+            for item in ready:
+                if item in sentinels:
+                    self._replace(sentinels[item])
+            self._dispatch()
+
+    def _replace(self, index):
+        process = self._processes[index]
+        process.join()
+        with self._lock:
+            if self._closed or self._processes[index] is not process:
+                return
+            # The task the dead worker held never completes: fail it, and only it, then replace the worker
+            task_id = self._running.pop(index, None)
+            if index in self._idle:
+                self._idle.remove(index)
+            self._conns[index].close()
+            self._spawn(index)
+            self.restarted += 1
+        if task_id is not None:
+            self._finish(task_id, False, RuntimeError(f"{process.name} exited with code {process.exitcode}"))
+
+    def submit(self, kind, payload, model=None, deadline=None, block=True, timeout=None):
+        """Queue one task; returns a ``concurrent.futures.Future``.
+
+        ``model`` is ``"logistic"`` or ``"forest"`` (default: ``HEALTHCARE_MODEL``).
+        ``deadline`` is a ``time.monotonic()`` value after which the task is
+        dropped. Raises :class:`PoolBusy` if no slot frees up in time, or
+        :class:`DeadlineExceeded` if the deadline passes while waiting for one.
+        """
+        if kind not in _HANDLERS:
+            raise ValueError(f"unknown task kind {kind!r}")
+        if self._closed or not self._processes:
+            raise RuntimeError("the pool is not running; call start() first")
+        model = model or SERVING_MODEL
+        self._refresh_export()
+        if block and deadline is not None and timeout is None:
+            timeout = max(0.0, deadline - time.monotonic())
+        if not self._slots.acquire(block, timeout if block else None):
+            self.rejected += 1
+            if block and deadline is not None and time.monotonic() >= deadline:
+                raise DeadlineExceeded("deadline passed while waiting for a queue slot")
+            raise PoolBusy(f"{self.max_pending} tasks already pending")
+        task_id = next(self._ids)
+        future = Future()
+        self._futures[task_id] = future
+        with self._lock:
+            self._backlog.append((task_id, kind, model, payload, deadline))
+        self.submitted += 1
+        self._dispatch()
+        return future
+
+    @staticmethod
+    def _gather(futures, deadline):
+        results = []
+        for future in futures:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                results.append(future.result(timeout))
+            except FutureTimeout:
+                raise DeadlineExceeded("deadline passed before all results arrived") from None
+        return results
+
+    def _chunks(self, n):
+        return [slice(start, start + self.chunk_rows) for start in range(0, n, self.chunk_rows)]
+
+    def predict(self, X, model=None, timeout=None):
+        """(labels, probabilities) for a 2-D batch, scored in chunks across the workers."""
+        X = np.asarray(X, dtype=np.float64)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        futures = [self.submit("score", X[part], model, deadline) for part in self._chunks(len(X))]
+        parts = self._gather(futures, deadline)
+        if not parts:
+            return np.empty(0), np.empty(0)
+        return np.concatenate([labels for labels, _ in parts]), np.concatenate([p for _, p in parts])
+
+    def assess(self, records, model=None, timeout=None):
+        """:func:`~healthcare.assessment.assess_many` over normalized records, in chunks."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        futures = [self.submit("assess", records[part], model, deadline) for part in self._chunks(len(records))]
+        return [result for part in self._gather(futures, deadline) for result in part]
+
+    def what_if_many(self, requests, model=None, timeout=None, per_task=1):
+        """:func:`~healthcare.whatif.what_if` for each ``(inputs, targets, steps)``, ``per_task`` per task."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        futures = [self.submit("what_if", requests[i:i + per_task], model, deadline)
+                   for i in range(0, len(requests), per_task)]
+        return [result for part in self._gather(futures, deadline) for result in part]
+
+    def warm_up(self, timeout=60):
+        """Block until the workers answer, so the first real request does not pay for their imports."""
+        from .schema import FEATURES
+
+        row = np.zeros((1, len(FEATURES)))
+        self._gather([self.submit("score", row) for _ in range(self.workers)], time.monotonic() + timeout)
+        return self
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "alive": sum(process.is_alive() for process in self._processes),
+            "pending": len(self._futures),
+            "max_pending": self.max_pending,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "expired": self.expired,
+            "restarted": self.restarted,
+        }
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._backlog.clear()
+        for conn in self._conns:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._wake.send(None)
+        self._collector.join()
+        for conn in (*self._conns, self._wakeup, self._wake):
+            conn.close()
+        self._processes = []
+        for future in self._futures.values():
+            future.cancel()
+        self._futures.clear()
+        if self._tmpdir is not None:
+            shutil.rmtree(self._tmpdir, ignore_errors=True)
+            self._tmpdir = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
@@ -0,0 +1,231 @@
+"""Process-wide registry of fitted model artifacts.
+
+Streamlit re-executes app.py on every widget interaction, but imported modules
+stay in ``sys.modules`` for the lifetime of the server process. Keeping the
+loaded artifacts here means every session shares a single unpickled copy and a
+rerun only costs an ``os.stat`` per artifact.
+
+Entries are keyed by absolute path and SHA-256 of the file contents. The file
+is only re-hashed when its size or mtime changes, and only re-loaded when the
+hash actually differs.
+"""
+
+import hashlib
+import importlib
+import os
+import pickletools
+import sys
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+from .schema import FOREST_MODEL_PATH, HEART_MODEL_PATH, SCALER_PATH
+
+
+@dataclass(frozen=True)
+class ArtifactInfo:
+    path: str
+    sha256: str
+    file_bytes: int
+    load_seconds: float
+    memory_bytes: int
+    loaded_at: float
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _stat_key(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _pickled_modules(path):
+    """Modules referenced by a pickle's GLOBAL opcodes."""
+    modules = set()
+    strings = []
+    with open(path, "rb") as fh:
+        try:
+            for opcode, arg, _ in pickletools.genops(fh):
+                if opcode.name == "GLOBAL":
+                    modules.add(arg.split(" ", 1)[0])
+                elif opcode.name == "STACK_GLOBAL" and len(strings) >= 2:
+                    modules.add(strings[-2])
+                elif isinstance(arg, str):
+                    strings.append(arg)
+                    del strings[:-2]
+        except ValueError:
+            # joblib appends raw array buffers after some opcodes; stop at the first one
+            pass
+    return modules
+
+
+def deep_nbytes(obj, _seen=None):
+    """Approximate resident size of an object graph, including array buffers.
+
+    scikit-learn trees keep their nodes in C buffers that tracemalloc cannot
+    see, so they are sized through the state they pickle to.
+    """
+    if _seen is None:
+        _seen = {}
+    if id(obj) in _seen:
+        return 0
+    # Hold a reference so temporaries from __getstate__ cannot recycle their id
+    _seen[id(obj)] = obj
+
+    nbytes = getattr(obj, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes + sys.getsizeof(obj)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        children = list(obj.keys()) + list(obj.values())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        children = list(obj)
+    elif isinstance(obj, (str, bytes, int, float, bool, type(None))):
+        children = []
+    elif hasattr(obj, "__dict__"):
+        children = [vars(obj)]
+    elif hasattr(obj, "__getstate__"):
+        try:
+            children = [obj.__getstate__()]
+        except TypeError:
+            children = []
+    else:
+        children = []
+    return size + sum(deep_nbytes(child, _seen) for child in children)
+
+
+def joblib_load(path):
+    # joblib is imported on first load so importing the registry stays cheap
+    import joblib
+
+    return joblib.load(path)
+
+
+def _measured_load(path, loader):
+    """Load an artifact, returning (obj, seconds, bytes allocated while loading).
+
+    Library modules the pickle refers to are imported first so the figures
+    describe the artifact itself rather than the one-off cost of importing
+    scikit-learn.
+    """
+    for module in _pickled_modules(path):
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        obj = loader(path)
+        seconds = time.perf_counter() - start
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+    return obj, seconds, max(after - before, deep_nbytes(obj))
+
+
+class ModelRegistry:
+    """Thread-safe cache of loaded artifacts, reloaded only when files change."""
+
+    def __init__(self, loader=joblib_load):
+        self._loader = loader
+        self._lock = threading.RLock()
+        # abspath -> (stat key, current entry)
+        self._current = {}
+        # (abspath, sha256) -> (obj, ArtifactInfo)
+        self._objects = {}
+
+    def get(self, path):
+        return self._entry(path)[0]
+
+    def info(self, path):
+        return self._entry(path)[1]
+
+    def _entry(self, path):
+        path = os.path.abspath(path)
+        key = _stat_key(path)
+        cached = self._current.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        with self._lock:
+            cached = self._current.get(path)
+            if cached is not None and cached[0] == key:
+                return cached[1]
+
+            sha = file_sha256(path)
+            entry = self._objects.get((path, sha))
+            if entry is None:
+                obj, seconds, memory = _measured_load(path, self._loader)
+                info = ArtifactInfo(
+                    path=path,
+                    sha256=sha,
+                    file_bytes=key[1],
+                    load_seconds=seconds,
+                    memory_bytes=memory,
+                    loaded_at=time.time(),
+                )
+                entry = (obj, info)
+                # Drop superseded versions of this file before publishing the new one
+                for stale in [k for k in self._objects if k[0] == path]:
+                    del self._objects[stale]
+                self._objects[(path, sha)] = entry
+            self._current[path] = (key, entry)
+            return entry
+
+    def version(self, *paths):
+        """Short combined content hash of the given artifacts."""
+        digest = hashlib.sha256()
+        for path in paths:
+            digest.update(self.info(path).sha256.encode())
+        return digest.hexdigest()[:16]
+
+    def stats(self):
+        with self._lock:
+            return [info for _, info in self._objects.values()]
+
+    def clear(self):
+        with self._lock:
+            self._current.clear()
+            self._objects.clear()
+
+
+_registry = ModelRegistry()
+
+
+def get_registry():
+    return _registry
+
+
+def load_heart_model():
+    return _registry.get(HEART_MODEL_PATH)
+
+
+def load_scaler():
+    return _registry.get(SCALER_PATH)
+
+
+def load_forest_model():
+    return _registry.get(FOREST_MODEL_PATH)
+
+
+if __name__ == "__main__":
+    for artifact in (HEART_MODEL_PATH, SCALER_PATH, FOREST_MODEL_PATH):
+        info = _registry.info(artifact)
+        print(
+            f"{os.path.basename(info.path):40s} sha256={info.sha256[:12]} "
+            f"file={info.file_bytes / 1024:8.1f} KiB  "
+            f"load={info.load_seconds * 1000:7.2f} ms  "
+            f"memory={info.memory_bytes / 1024:8.1f} KiB"
+        )
@@ -0,0 +1,194 @@
+"""Cross-session cache of full assessment results.
+
+Many submissions are identical -- the form defaults above all -- and each one
+used to rerun the model and the rule engine from scratch. :class:`ResultCache`
+keeps the :func:`~healthcare.assessment.assess_many` result for recently seen
+inputs in a bounded LRU whose entries also expire after a TTL.
+
+Keys are a hash of the canonical form inputs (the 13 model features,
+``bmi`` and ``exercise`` as floats, ``smoking`` and ``alcohol`` as strings, in
+``FORM_FIELDS`` order) and the version of the scorer that produced the
+result. The version is a hash of the scorer's type and parameter arrays, so
+when the artifacts change and the serving scorer is rebuilt, the new scorer
+gets a new version and every entry made by the old one is dropped.
+
+``HEALTHCARE_RESULT_CACHE`` sets the number of entries (default 4096, 0
+disables caching) and ``HEALTHCARE_RESULT_CACHE_TTL`` their lifetime in
+seconds (default 3600). :meth:`ResultCache.stats` reports the hit rate and the
+memory held, extrapolated from a sample of sized entries; hits and misses are also counted as
+:mod:`~healthcare.metrics` events.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from . import metrics
+from .assessment import FORM_FIELDS, assess_many
+from .registry import deep_nbytes
+from .schema import FEATURES
+from .scoring import get_serving_scorer
+
+MAXSIZE = int(os.environ.get("HEALTHCARE_RESULT_CACHE", "4096"))
+TTL = float(os.environ.get("HEALTHCARE_RESULT_CACHE_TTL", "3600"))
+
+_NUMERIC_FIELDS = frozenset(FEATURES + ["bmi", "exercise"])
+
+# Entries are sized with deep_nbytes (~0.1 ms each) on one put in this many; memory is extrapolated
+SIZE_SAMPLE_EVERY = 32
+
+
+def _hash_state(digest, obj, depth=0):
+    digest.update(type(obj).__qualname__.encode())
+    if isinstance(obj, np.ndarray):
+        digest.update(str(obj.dtype).encode() + str(obj.shape).encode())
+        digest.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, (int, float, str, tuple)):
+        digest.update(repr(obj).encode())
+    elif hasattr(obj, "__dict__") and depth < 3:
+        # Public attributes only: private ones are scratch buffers and derived caches
+        for name, value in sorted(vars(obj).items()):
+            if not name.startswith("_"):
+                digest.update(name.encode())
+                _hash_state(digest, value, depth + 1)
+
+
+def model_version(scorer):
+    """Short hash of a scorer's type and public parameters (arrays included)."""
+    digest = hashlib.sha256()
+    _hash_state(digest, scorer)
+    return digest.hexdigest()[:16]
+
+
+def input_key(inputs, version):
+    """Canonical hash of normalized form inputs and a model version."""
+    parts = [version]
+    for name in FORM_FIELDS:
+        value = inputs[name]
+        # 45 and 45.0 are the same input; +0.0 folds -0.0 into 0.0
+        parts.append(repr(float(value) + 0.0) if name in _NUMERIC_FIELDS else str(value))
+    return hashlib.blake2b("\x1f".join(parts).encode(), digest_size=16).digest()
+
+
+class ResultCache:
+    """Thread-safe LRU of assessment results with a per-entry TTL."""
+
+    def __init__(self, maxsize=MAXSIZE, ttl=TTL, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (expires at, result)
+        self._lock = threading.Lock()
+        self._scorer = None
+        self._version = None
+        self._puts = 0
+        self._sampled_bytes = 0
+        self._samples = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def version(self, scorer):
+        """Version of ``scorer``; entries made with a different model are dropped."""
+        # Holding the last scorer keeps its id from being reused by a rebuilt one
+        if scorer is self._scorer:
+            return self._version
+        version = model_version(scorer)
+        with self._lock:
+            if version != self._version:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+            self._scorer, self._version = scorer, version
+        return version
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    metrics.count("result_cache_hits")
+                    return entry[1]
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            metrics.count("result_cache_misses")
+            return None
+
+    def put(self, key, result):
+        if self.maxsize <= 0:
+            return
+        self._puts += 1
+        if self._puts % SIZE_SAMPLE_EVERY == 1:
+            nbytes = deep_nbytes(result)
+            with self._lock:
+                self._sampled_bytes += nbytes
+                self._samples += 1
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (self._clock() + self.ttl, result)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def assess_many(self, records, scorer=None):
+        """:func:`~healthcare.assessment.assess_many`, scoring only inputs not already cached.
+
+        Cached results are shared between callers; treat them as read-only.
+        """
+        scorer = scorer or get_serving_scorer()
+        if self.maxsize <= 0:
+            return assess_many(records, scorer=scorer)
+        version = self.version(scorer)
+        keys = [input_key(record, version) for record in records]
+        results = [self.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            for i, result in zip(missing, assess_many([records[i] for i in missing], scorer=scorer)):
+                results[i] = result
+                self.put(keys[i], result)
+        return results
+
+    def assess_one(self, inputs, scorer=None):
+        return self.assess_many([inputs], scorer)[0]
+
+    def _estimated_nbytes(self):
+        if not self._samples:
+            return 0
+        return round(len(self._entries) * self._sampled_bytes / self._samples)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "bytes": self._estimated_nbytes(),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "model_version": self._version,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = ResultCache()
+
+
+def get_result_cache():
+    return _cache
@@ -0,0 +1,26 @@
+"""Risk level and health score derived from the model probability and risk factors.
+
+Every function accepts scalars or equally-shaped arrays, so the same code
+serves a single form submission and a whole cohort. The risk factors
+themselves come from :mod:`healthcare.rules`.
+"""
+
+import numpy as np
+
+RISK_LEVELS = np.array(["LOW", "MEDIUM", "HIGH"])
+
+# Lifestyle inputs the form collects but the reference dataset does not have
+LIFESTYLE_DEFAULTS = {"bmi": 25.0, "exercise": 5, "smoking": "Never", "alcohol": "None"}
+
+
+def risk_level(probability, risk_factors):
+    probability = np.asarray(probability)
+    risk_factors = np.asarray(risk_factors)
+    high = (probability > 0.7) | (risk_factors >= 4)
+    medium = (probability > 0.3) | (risk_factors >= 2)
+    return RISK_LEVELS[np.where(high, 2, np.where(medium, 1, 0))]
+
+
+def health_score(probability, risk_factors):
+    score = 100 - (np.asarray(risk_factors) * 15) - (np.asarray(probability) * 20)
+    return np.clip(score, 0, 100)
@@ -0,0 +1,207 @@
+"""Declarative rule tables for risk factors, health indicators and recommendations.
+
+The thresholds the app shows to users are data, not code: each rule is a
+:class:`Condition` over one input column, and :class:`RuleEngine` evaluates a
+whole table at once over NumPy columns. A single form submission is just a
+batch of one, so the Streamlit tabs and the batch scorer share one engine.
+"""
+
+import operator
+from collections import namedtuple
+from dataclasses import dataclass
+
+import numpy as np
+
+Condition = namedtuple("Condition", "field op value")
+Rule = namedtuple("Rule", "code label condition")
+
+_OPS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "between": lambda column, bounds: (column >= bounds[0]) & (column <= bounds[1]),
+}
+
+RISK_FACTOR_RULES = (
+    Rule("age", "Age > 50", Condition("age", ">", 50)),
+    Rule("blood_pressure", "BP > 140", Condition("trestbps", ">", 140)),
+    Rule("cholesterol", "Chol > 240", Condition("chol", ">", 240)),
+    Rule("bmi", "BMI > 30", Condition("bmi", ">", 30)),
+    Rule("smoking", "Smoking", Condition("smoking", "==", "Current")),
+    Rule("low_exercise", "Low Exercise", Condition("exercise", "<", 3)),
+)
+
+# Indicator -> ordered (status, condition) pairs; the first match wins and the
+# final pair, with no condition, is the fallback.
+INDICATOR_RULES = {
+    "Blood Pressure": (
+        ("Normal", Condition("trestbps", "<", 120)),
+        ("Elevated", Condition("trestbps", "<", 130)),
+        ("High", None),
+    ),
+    "Cholesterol": (
+        ("Normal", Condition("chol", "<", 200)),
+        ("Borderline", Condition("chol", "<", 240)),
+        ("High", None),
+    ),
+    "Max Heart Rate": (
+        ("Good", Condition("thalachh", ">", 150)),
+        ("Average", Condition("thalachh", ">", 130)),
+        ("Low", None),
+    ),
+    "BMI": (
+        ("Normal", Condition("bmi", "between", (18.5, 24.9))),
+        ("Overweight", Condition("bmi", "<=", 29.9)),
+        ("Obese", None),
+    ),
+    "Exercise": (
+        ("Active", Condition("exercise", ">=", 5)),
+        ("Moderate", Condition("exercise", ">=", 3)),
+        ("Sedentary", None),
+    ),
+    "Smoking": (
+        ("Non-smoker", Condition("smoking", "==", "Never")),
+        ("Former smoker", Condition("smoking", "==", "Former")),
+        ("Current smoker", None),
+    ),
+}
+
+# Traffic-light tone for every indicator status
+STATUS_TONES = {
+    "Normal": "good", "Good": "good", "Active": "good", "Non-smoker": "good",
+    "Average": "warning", "Moderate": "warning", "Borderline": "warning",
+    "Overweight": "warning", "Former smoker": "warning",
+    "Elevated": "critical", "High": "critical", "Low": "critical",
+    "Obese": "critical", "Sedentary": "critical", "Current smoker": "critical",
+}
+
+RECOMMENDATION_RULES = (
+    Rule("blood_pressure", "**Blood Pressure**: Reduce sodium intake, monitor BP daily",
+         Condition("trestbps", ">", 140)),
+    Rule("cholesterol", "**Cholesterol**: Increase soluble fiber, reduce saturated fats",
+         Condition("chol", ">", 240)),
+    Rule("weight", "**Weight**: Aim for 5-10% weight loss through diet and exercise",
+         Condition("bmi", ">", 30)),
+    Rule("activity", "**Activity**: Gradually increase to 150 minutes of moderate exercise weekly",
+         Condition("exercise", "<", 3)),
+    Rule("smoking", "**Smoking**: Seek smoking cessation support immediately",
+         Condition("smoking", "==", "Current")),
+    Rule("alcohol", "**Alcohol**: Reduce alcohol consumption to moderate levels",
+         Condition("alcohol", "==", "Heavy")),
+)
+
+
+# General action plan shown for each risk level
+ACTION_PLANS = {
+    "HIGH": (
+        "🩺 **Consult a cardiologist immediately** for comprehensive evaluation",
+        "💊 **Discuss medication options** with your healthcare provider",
+        "🏥 **Schedule diagnostic tests**: ECG, Stress Test, Echocardiogram",
+        "📱 **Monitor vital signs daily**: Blood pressure and heart rate",
+        "🚭 **Quit smoking immediately** and avoid secondhand smoke",
+        "🥗 **Adopt strict heart-healthy diet**: Low sodium, low cholesterol",
+        "🏃 **Start supervised exercise program** with medical clearance",
+        "😴 **Ensure 7-8 hours of quality sleep** nightly",
+        "⚖️ **Achieve and maintain healthy weight** (BMI 18.5-24.9)",
+    ),
+    "MEDIUM": (
+        "🩺 **Regular check-ups** with primary care physician every 6 months",
+        "🏃 **Moderate exercise** 30 minutes daily, 5 days/week",
+        "🥗 **Heart-healthy diet**: Focus on fruits, vegetables, whole grains",
+        "⚖️ **Weight management** through balanced diet and exercise",
+        "🚭 **Smoking cessation** program if applicable",
+        "🍷 **Limit alcohol** to moderate levels",
+        "😊 **Stress management**: Meditation, yoga, or relaxation techniques",
+        "📊 **Monitor health metrics** regularly",
+        "💤 **Quality sleep** 7-8 hours per night",
+    ),
+    "LOW": (
+        "✅ **Continue current healthy lifestyle** habits",
+        "🏃 **Maintain regular physical activity** routine",
+        "🥗 **Balanced nutrition** with variety of whole foods",
+        "🩺 **Annual health check-ups** for prevention",
+        "😊 **Stress management** and work-life balance",
+        "💤 **Consistent sleep schedule**",
+        "🚭 **Avoid smoking** and limit alcohol",
+        "📚 **Stay informed** about heart health",
+        "🎯 **Set health goals** for continuous improvement",
+    ),
+}
+
+
+@dataclass
+class RuleEvaluation:
+    """Rule outcomes for a batch of ``n`` patients."""
+
+    risk_masks: np.ndarray            # (n, len(risk_rules)) bool
+    risk_factors: np.ndarray          # (n,) count of risk factors present
+    indicators: dict                  # indicator name -> (n,) status strings
+    recommendation_masks: np.ndarray  # (n, len(recommendation_rules)) bool
+    risk_rules: tuple
+    recommendation_rules: tuple
+
+    def __len__(self):
+        return len(self.risk_factors)
+
+    def recommendation_codes(self, i):
+        return [rule.code for rule, hit in zip(self.recommendation_rules, self.recommendation_masks[i]) if hit]
+
+    def row(self, i=0):
+        """Plain-Python view of one patient, as the UI renders it."""
+        return {
+            "risk_factors": int(self.risk_factors[i]),
+            "risk_present": {rule.label: bool(hit) for rule, hit in zip(self.risk_rules, self.risk_masks[i])},
+            "indicators": {name: str(statuses[i]) for name, statuses in self.indicators.items()},
+            "recommendations": [
+                rule.label for rule, hit in zip(self.recommendation_rules, self.recommendation_masks[i]) if hit
+            ],
+        }
+
+
+class RuleEngine:
+    def __init__(self, risk_rules=RISK_FACTOR_RULES, indicator_rules=INDICATOR_RULES,
+                 recommendation_rules=RECOMMENDATION_RULES):
+        self.risk_rules = tuple(risk_rules)
+        self.indicator_rules = dict(indicator_rules)
+        self.recommendation_rules = tuple(recommendation_rules)
+
+    def evaluate(self, columns):
+        """Evaluate every rule over ``columns``, a DataFrame or mapping of equal-length arrays."""
+        cache = {}
+
+        def mask(condition):
+            # Several tables share conditions (e.g. BP > 140); evaluate each only once
+            result = cache.get(condition)
+            if result is None:
+                # Compare on the column as given so pandas string columns stay in their native form
+                column = columns[condition.field]
+                result = cache[condition] = np.asarray(_OPS[condition.op](column, condition.value), dtype=bool)
+            return result
+
+        risk_masks = np.column_stack([mask(rule.condition) for rule in self.risk_rules])
+        recommendation_masks = np.column_stack([mask(rule.condition) for rule in self.recommendation_rules])
+
+        indicators = {}
+        for name, tiers in self.indicator_rules.items():
+            # Select a tier index, then map indices to status strings in one gather
+            *matched, _ = tiers
+            tier = np.select([mask(condition) for _, condition in matched], list(range(len(matched))), default=len(matched))
+            indicators[name] = np.array([status for status, _ in tiers])[tier]
+
+        return RuleEvaluation(
+            risk_masks=risk_masks,
+            risk_factors=risk_masks.sum(axis=1),
+            indicators=indicators,
+            recommendation_masks=recommendation_masks,
+            risk_rules=self.risk_rules,
+            recommendation_rules=self.recommendation_rules,
+        )
+
+    def evaluate_one(self, **inputs):
+        """Evaluate a single patient given as keyword scalars; returns :meth:`RuleEvaluation.row`."""
+        return self.evaluate({name: np.array([value]) for name, value in inputs.items()}).row(0)
+
+
+default_engine = RuleEngine()
@@ -0,0 +1,19 @@
+"""Feature layout and artifact locations shared by the app and the tooling."""
+
+import os
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DATA_PATH = os.path.join(BASE_DIR, "1. Data", "cleaned_merged_heart_dataset.csv")
+
+HEART_MODEL_PATH = os.path.join(BASE_DIR, "heart_model.pkl")
+SCALER_PATH = os.path.join(BASE_DIR, "scaler.pkl")
+FOREST_MODEL_PATH = os.path.join(BASE_DIR, "healthcare_recommendation_model.pkl")
+
+# Column order the scaler and both models were fitted on
+FEATURES = [
+    "age", "sex", "cp", "trestbps", "chol", "fbs", "restecg",
+    "thalachh", "exang", "oldpeak", "slope", "ca", "thal",
+]
+
+TARGET = "target"
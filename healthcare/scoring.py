@@ -0,0 +1,135 @@
+"""Compiled scoring for the StandardScaler + LogisticRegression pair.
+
+``scaler.transform`` followed by ``model.predict`` and ``model.predict_proba``
+validates the input three times and computes the same standardized logit
+twice. For a fitted linear model the whole thing reduces to
+
+    z = ((x - mean) / scale) @ coef + intercept,   p = 1 / (1 + exp(-z))
+
+which :class:`LinearScorer` evaluates directly from the fitted arrays, using the
+same operation order as scikit-learn so results agree to floating-point noise.
+"""
+
+import math
+import os
+import threading
+
+import numpy as np
+
+from .registry import get_registry
+from .schema import FEATURES, HEART_MODEL_PATH, SCALER_PATH
+
+SERVING_MODEL = os.environ.get("HEALTHCARE_MODEL", "logistic")
+# The contribution table is slower than LinearScorer per row and per batch, so it is opt-in
+LOOKUP_MODE = os.environ.get("HEALTHCARE_LOOKUP", "off")
+
+
+class LinearScorer:
+    """Label and positive-class probability from a scaler and a binary linear model."""
+
+    contribution_units = "logit"
+
+    def __init__(self, mean, scale, coef, intercept, classes=(0, 1)):
+        self.mean = np.ascontiguousarray(mean, dtype=np.float64)
+        self.scale = np.ascontiguousarray(scale, dtype=np.float64)
+        self.coef = np.ascontiguousarray(coef, dtype=np.float64).ravel()
+        self.intercept = float(np.ravel(intercept)[0])
+        self.classes = np.asarray(classes)
+        if not (self.mean.shape == self.scale.shape == self.coef.shape == (len(FEATURES),)):
+            raise ValueError(f"expected {len(FEATURES)} features, got coef of shape {self.coef.shape}")
+        self._local = threading.local()
+
+    @classmethod
+    def from_estimators(cls, scaler, model):
+        if len(model.classes_) != 2:
+            raise ValueError("LinearScorer only supports binary classifiers")
+        scale = scaler.scale_ if scaler.scale_ is not None else np.ones_like(scaler.mean_)
+        return cls(scaler.mean_, scale, model.coef_, model.intercept_, model.classes_)
+
+    def decision_function(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        return ((X - self.mean) / self.scale) @ self.coef + self.intercept
+
+    def contributions(self, X):
+        """(intercept, per-feature logit terms); each row's terms sum with it to the logit."""
+        X = np.asarray(X, dtype=np.float64)
+        return self.intercept, ((X - self.mean) / self.scale) * self.coef
+
+    def predict(self, X):
+        """Return (labels, probabilities) for a 2-D batch of rows."""
+        from scipy.special import expit
+
+        z = self.decision_function(X)
+        return self.classes[(z > 0).astype(np.intp)], expit(z)
+
+    def predict_one(self, row):
+        """Return (label, probability) for a single row without allocating arrays.
+
+        The scratch buffer is per-thread because Streamlit serves sessions from
+        a thread pool.
+        """
+        buf = getattr(self._local, "buf", None)
+        if buf is None:
+            buf = self._local.buf = np.empty(len(FEATURES), dtype=np.float64)
+        np.subtract(row, self.mean, out=buf)
+        np.divide(buf, self.scale, out=buf)
+        z = float(buf.dot(self.coef)) + self.intercept
+        if z >= 0:
+            probability = 1.0 / (1.0 + math.exp(-z))
+        else:
+            e = math.exp(z)
+            probability = e / (1.0 + e)
+        return self.classes[int(z > 0)], probability
+
+
+_compiled = {}
+_compiled_lock = threading.Lock()
+
+
+def get_scorer():
+    """Compiled scorer for the current heart model and scaler.
+
+    Served from the memory-mapped compact export when one is current (see
+    :mod:`healthcare.compact`), otherwise from the registry's pickles.
+    """
+    from .compact import get_compact_models
+
+    compact = get_compact_models()
+    if compact is not None:
+        return compact.linear_scorer()
+
+    registry = get_registry()
+    scaler = registry.get(SCALER_PATH)
+    model = registry.get(HEART_MODEL_PATH)
+    key = (id(scaler), id(model))
+    scorer = _compiled.get(key)
+    if scorer is None:
+        with _compiled_lock:
+            scorer = _compiled.get(key)
+            if scorer is None:
+                scorer = LinearScorer.from_estimators(scaler, model)
+                _compiled.clear()
+                _compiled[key] = scorer
+    return scorer
+
+
+def get_serving_scorer(model=None):
+    """Scorer for the model selected by ``HEALTHCARE_MODEL`` (``logistic`` or ``forest``).
+
+    The logistic model uses the compiled scorer, or the precomputed
+    contribution table when ``HEALTHCARE_LOOKUP=on`` and a current one has
+    been built.
+    """
+    model = model or SERVING_MODEL
+    if model == "forest":
+        from .forest import get_forest_scorer
+
+        return get_forest_scorer()
+    if model != "logistic":
+        raise ValueError(f"unknown HEALTHCARE_MODEL {model!r}; expected 'logistic' or 'forest'")
+
+    if LOOKUP_MODE == "on":
+        from .lookup import get_lookup_scorer
+
+        return get_lookup_scorer() or get_scorer()
+    return get_scorer()
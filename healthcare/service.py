@@ -0,0 +1,314 @@
+"""Asynchronous JSON scoring endpoint for machine-to-machine clients.
+
+    python -m healthcare.service --host 127.0.0.1 --port 8600
+
+``POST /v1/assess`` takes one object (or a list of objects) with the same
+inputs as the Streamlit form -- the 13 model features plus ``bmi``,
+``exercise``, ``smoking`` and ``alcohol`` -- and returns the probability,
+risk level, risk factors, indicators and recommendation lists.
+``GET /healthz`` and ``GET /stats`` are provided for probes and monitoring,
+and ``GET /drift`` reports how recent inputs and scores compare with the
+training data (:mod:`~healthcare.drift`).
+
+Requests arriving close together are coalesced by :class:`MicroBatcher` so a
+burst of N concurrent requests costs one vectorized model call, not N. The
+server is a small HTTP/1.1 implementation on ``asyncio`` streams with
+keep-alive, so it needs nothing beyond the standard library.
+
+With ``--workers N`` the coalesced batches are scored by a
+:class:`~healthcare.pool.WorkerPool` of N processes instead of the event loop's
+own thread, with several batches in flight at once. A full pool answers
+``503`` and a request not answered within ``--deadline-ms`` answers ``504``.
+Without workers, inputs already assessed recently are answered from the
+shared :mod:`~healthcare.result_cache` (``--no-cache`` turns this off).
+"""
+
+import argparse
+import asyncio
+import json
+import signal
+import sys
+import time
+from http import HTTPStatus
+
+from .assessment import assess_many, normalize_inputs
+from .drift import get_drift_monitor
+from .pool import WORKERS, DeadlineExceeded, PoolBusy, WorkerPool
+from .result_cache import get_result_cache
+from .scoring import get_serving_scorer
+
+MAX_BODY_BYTES = 1 << 20
+
+
+class MicroBatcher:
+    """Coalesce concurrent submissions into calls of ``fn(list_of_items)``.
+
+    A batch is dispatched once ``max_batch`` items are waiting or ``max_delay``
+    seconds after its first item arrived, whichever comes first. A coroutine
+    ``fn`` is run as its own task, so batches overlap while it awaits.
+    """
+
+    def __init__(self, fn, max_batch=64, max_delay=0.002):
+        self.fn = fn
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.batches = 0
+        self.items = 0
+        self._queue = None
+        self._task = None
+        self._inflight = set()
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    async def submit(self, item):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_delay
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        concurrent = asyncio.iscoroutinefunction(self.fn)
+        while True:
+            batch = await self._collect()
+            if concurrent:
+                task = asyncio.get_running_loop().create_task(self._dispatch(batch))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+            else:
+                await self._dispatch(batch)
+
+    async def _dispatch(self, batch):
+        try:
+            results = self.fn([item for item, _ in batch])
+            if asyncio.iscoroutine(results):
+                results = await results
+        except Exception as exc:  # surface the failure to every waiting request
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        self.batches += 1
+        self.items += len(batch)
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+class ScoringService:
+    def __init__(self, max_batch=64, max_delay=0.002, assess=None, pool=None, deadline=None, cache=None,
+                 drift=None):
+        self.pool = pool
+        self.deadline = deadline
+        self.cache = cache
+        self.drift = drift
+        if pool is not None:
+            assess = self._assess_in_pool
+        elif assess is None:
+            assess = cache.assess_many if cache is not None else assess_many
+        self.batcher = MicroBatcher(assess, max_batch=max_batch, max_delay=max_delay)
+        self.requests = 0
+        self.errors = 0
+        self._server = None
+
+    async def _assess_in_pool(self, records):
+        deadline = None if self.deadline is None else time.monotonic() + self.deadline
+        # block=False: waiting for a slot here would stall the event loop
+        future = self.pool.submit("assess", records, deadline=deadline, block=False)
+        return await asyncio.wrap_future(future)
+
+    async def start(self, host="127.0.0.1", port=8600):
+        # load the artifacts before the first request, not during it
+        if self.pool is None:
+            get_serving_scorer()
+        else:
+            await asyncio.get_running_loop().run_in_executor(None, self.pool.warm_up)
+        self.batcher.start()
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.batcher.stop()
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "batches": self.batcher.batches,
+            "assessments": self.batcher.items,
+            "mean_batch_size": self.batcher.items / self.batcher.batches if self.batcher.batches else 0.0,
+            **({"pool": self.pool.stats()} if self.pool is not None else {}),
+            **({"result_cache": self.cache.stats()} if self.cache is not None else {}),
+        }
+
+    async def _route(self, method, path, body):
+        if path == "/healthz" and method == "GET":
+            return HTTPStatus.OK, {"status": "ok"}
+        if path == "/stats" and method == "GET":
+            return HTTPStatus.OK, self.stats()
+        if path == "/drift" and method == "GET" and self.drift is not None:
+            return HTTPStatus.OK, self.drift.report()
+        if path != "/v1/assess":
+            return HTTPStatus.NOT_FOUND, {"error": f"no route for {path}"}
+        if method != "POST":
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "use POST"}
+
+        try:
+            payload = json.loads(body)
+            if isinstance(payload, list):
+                records = [normalize_inputs(item) for item in payload]
+            else:
+                records = [normalize_inputs(payload)]
+        except ValueError as exc:
+            return HTTPStatus.BAD_REQUEST, {"error": str(exc)}
+
+        try:
+            results = await asyncio.wait_for(
+                asyncio.gather(*(self.batcher.submit(record) for record in records)), self.deadline)
+        except PoolBusy as exc:
+            return HTTPStatus.SERVICE_UNAVAILABLE, {"error": str(exc)}
+        except (DeadlineExceeded, asyncio.TimeoutError):
+            return HTTPStatus.GATEWAY_TIMEOUT, {"error": "deadline exceeded"}
+        if self.drift is not None:
+            # Pool workers hold their own model; in-process, pass the scorer so a new model resets the baseline
+            scorer = get_serving_scorer() if self.pool is None else None
+            self.drift.observe_many(records, [result["probability"] for result in results], scorer)
+        return HTTPStatus.OK, results if isinstance(payload, list) else results[0]
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                request_line, *header_lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+                try:
+                    method, target, version = request_line.split(" ", 2)
+                except ValueError:
+                    break
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                        {"error": "request body too large"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                self.requests += 1
+                try:
+                    status, payload = await self._route(method, target.split("?", 1)[0], body)
+                except Exception as exc:
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": repr(exc)}
+                if status >= 400:
+                    self.errors += 1
+
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode()
+        writer.write(
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+
+
+async def _serve(args):
+    pool = WorkerPool(args.workers).start() if args.workers else None
+    deadline = args.deadline_ms / 1000 if args.deadline_ms else None
+    cache = get_result_cache() if pool is None and args.cache else None
+    service = ScoringService(max_batch=args.max_batch, max_delay=args.max_delay_ms / 1000,
+                             pool=pool, deadline=deadline, cache=cache, drift=get_drift_monitor())
+    host, port = await service.start(args.host, args.port)
+    print(f"listening on http://{host}:{port}", flush=True)
+    serving = asyncio.current_task()
+    # Shut down through the finally block on SIGTERM too, so worker processes are not orphaned
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, serving.cancel)
+    try:
+        await service.serve_forever()
+    except asyncio.CancelledError:
+        pass
+    finally:
+        await service.close()
+        if pool is not None:
+            pool.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve heart-disease assessments over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600, help="0 picks a free port")
+    parser.add_argument("--max-batch", type=int, default=64, help="largest coalesced batch")
+    parser.add_argument("--max-delay-ms", type=float, default=2.0,
+                        help="how long the first request of a batch may wait for company")
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help="score in this many worker processes (default: $HEALTHCARE_WORKERS, "
+                             "else 0, in-process)")
+    parser.add_argument("--no-cache", dest="cache", action="store_false",
+                        help="score every request, even inputs answered recently")
+    parser.add_argument("--deadline-ms", type=float, default=0,
+                        help="answer 504 to requests not scored within this time (default: no deadline)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+"""Reproducible training pipeline for the model artifacts.
+
+    python -m healthcare.train [--folds 5] [--jobs N] [--install]
+
+Replaces the hand-run notebook cells. The candidates from the notebook --
+LogisticRegression, RandomForest and GradientBoosting -- are cross-validated
+and refit in parallel: every (candidate, fold) fit is an independent task on
+a process pool sized to the machine, and the dataset is shipped to each
+worker once through the pool initializer.
+
+Fold assignments are cached under ``artifacts/.cache`` keyed by the dataset's
+content hash, so repeated runs on the same data reuse them. Each run writes a
+versioned directory ``artifacts/<timestamp>-<data hash>/`` containing the
+three pickles the app loads and ``metadata.json`` (feature order, metrics,
+training times, library versions, and which candidate cross-validated best).
+The logistic model and the random forest are always the ones written, since
+serving builds its scorers from exactly those two. ``--install`` then
+validates the new set and swaps it in for the top-level pickles, which the
+running app's registry picks up on its next read.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from .registry import file_sha256
+from .schema import BASE_DIR, DATA_PATH, FEATURES, FOREST_MODEL_PATH, HEART_MODEL_PATH, SCALER_PATH, TARGET
+
+ARTIFACTS_DIR = os.path.join(BASE_DIR, "artifacts")
+SEED = 42
+
+
+def candidate_models():
+    """Fresh, unfitted candidates keyed by the names the notebook used."""
+    from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+
+    # Parallelism comes from the process pool; keep each estimator single-threaded
+    return {
+        "Logistic Regression": LogisticRegression(max_iter=1000),
+        "Random Forest": RandomForestClassifier(n_estimators=100, random_state=SEED, n_jobs=1),
+        "Gradient Boosting": GradientBoostingClassifier(random_state=SEED),
+    }
+
+
+def load_dataset(path=DATA_PATH):
+    frame = pd.read_csv(path)
+    missing = [name for name in FEATURES + [TARGET] if name not in frame]
+    if missing:
+        raise ValueError(f"{path} is missing columns: {', '.join(missing)}")
+    return frame[FEATURES].to_numpy(dtype=np.float64), frame[TARGET].to_numpy()
+
+
+def fold_indices(y, data_hash, folds, seed=SEED, cache_dir=None):
+    """Per-row fold id from StratifiedKFold, cached by dataset hash, fold count and seed."""
+    cache_dir = cache_dir or os.path.join(ARTIFACTS_DIR, ".cache")
+    path = os.path.join(cache_dir, f"folds-{data_hash[:16]}-k{folds}-s{seed}.npy")
+    if os.path.exists(path):
+        fold_of = np.load(path)
+        if len(fold_of) == len(y):
+            return fold_of
+
+    from sklearn.model_selection import StratifiedKFold
+
+    fold_of = np.empty(len(y), dtype=np.int8)
+    splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed)
+    for fold, (_, test) in enumerate(splitter.split(np.zeros(len(y)), y)):
+        fold_of[test] = fold
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp.npy"
+    np.save(tmp, fold_of)
+    os.replace(tmp, path)
+    return fold_of
+
+
+# Worker-process state, set once per worker by _init_worker
+_X = _y = _fold_of = None
+
+
+def _init_worker(X, y, fold_of):
+    global _X, _y, _fold_of
+    _X, _y, _fold_of = X, y, fold_of
+
+
+def _fit(name, fold):
+    """Fit candidate ``name`` on every fold but ``fold`` (``None``: on all rows)."""
+    from sklearn.metrics import accuracy_score, roc_auc_score
+    from sklearn.preprocessing import StandardScaler
+
+    train = np.ones(len(_y), dtype=bool) if fold is None else _fold_of != fold
+    scaler = StandardScaler()
+    X_train = scaler.fit_transform(_X[train])
+    model = candidate_models()[name]
+
+    start = time.perf_counter()
+    model.fit(X_train, _y[train])
+    seconds = time.perf_counter() - start
+
+    if fold is None:
+        return name, fold, seconds, None, (scaler, model)
+    X_test = scaler.transform(_X[~train])
+    metrics = {
+        "accuracy": float(accuracy_score(_y[~train], model.predict(X_test))),
+        "roc_auc": float(roc_auc_score(_y[~train], model.predict_proba(X_test)[:, 1])),
+    }
+    return name, fold, seconds, metrics, None
+
+
+def train(data_path=DATA_PATH, folds=5, jobs=None, output_dir=ARTIFACTS_DIR):
+    """Cross-validate and refit all candidates; returns the version directory written."""
+    import sklearn
+
+    started = time.perf_counter()
+    data_hash = file_sha256(data_path)
+    X, y = load_dataset(data_path)
+    fold_of = fold_indices(y, data_hash, folds, cache_dir=os.path.join(output_dir, ".cache"))
+    names = list(candidate_models())
+    tasks = [(name, fold) for name in names for fold in [*range(folds), None]]
+
+    scores = {name: [] for name in names}
+    fit_seconds = {}
+    final = {}
+    jobs = jobs or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tasks)), initializer=_init_worker,
+                             initargs=(X, y, fold_of)) as pool:
+        futures = [pool.submit(_fit, name, fold) for name, fold in tasks]
+        for future in futures:
+            name, fold, seconds, metrics, fitted = future.result()
+            if fold is None:
+                final[name] = fitted
+                fit_seconds[name] = seconds
+            else:
+                scores[name].append(metrics)
+
+    metrics = {}
+    for name in names:
+        accuracy = [m["accuracy"] for m in scores[name]]
+        auc = [m["roc_auc"] for m in scores[name]]
+        metrics[name] = {
+            "cv_accuracy_mean": float(np.mean(accuracy)),
+            "cv_accuracy_std": float(np.std(accuracy)),
+            "cv_roc_auc_mean": float(np.mean(auc)),
+            "cv_roc_auc_std": float(np.std(auc)),
+            "final_fit_seconds": fit_seconds[name],
+        }
+    best = max(names, key=lambda name: metrics[name]["cv_accuracy_mean"])
+
+    version = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}-{data_hash[:8]}"
+    target = os.path.join(output_dir, version)
+    os.makedirs(target)
+
+    import joblib
+
+    # Every final fit standardizes the same full dataset, so any candidate's scaler serves both models
+    scaler = final["Logistic Regression"][0]
+    joblib.dump(final["Logistic Regression"][1], os.path.join(target, os.path.basename(HEART_MODEL_PATH)))
+    # Serving compiles this file into a FlatForest; the CV winner is only recorded in the metadata
+    joblib.dump(final["Random Forest"][1], os.path.join(target, os.path.basename(FOREST_MODEL_PATH)))
+    joblib.dump(scaler, os.path.join(target, os.path.basename(SCALER_PATH)))
+
+    metadata = {
+        "version": version,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "features": FEATURES,
+        "target": TARGET,
+        "dataset": {"path": os.path.relpath(data_path, BASE_DIR), "sha256": data_hash, "rows": int(len(y))},
+        "cv": {"folds": folds, "seed": SEED, "strategy": "StratifiedKFold"},
+        "metrics": metrics,
+        "best_model": best,
+        "artifacts": {
+            os.path.basename(HEART_MODEL_PATH): "Logistic Regression",
+            os.path.basename(FOREST_MODEL_PATH): "Random Forest",
+            os.path.basename(SCALER_PATH): "StandardScaler",
+        },
+        "workers": min(jobs, len(tasks)),
+        "training_seconds": time.perf_counter() - started,
+        "versions": {"python": sys.version.split()[0], "scikit-learn": sklearn.__version__,
+                     "numpy": np.__version__, "pandas": pd.__version__},
+    }
+    with open(os.path.join(target, "metadata.json"), "w") as fh:
+        json.dump(metadata, fh, indent=2)
+    return target
+
+
+def validate(version_dir):
+    """Build the serving scorers from the artifacts in ``version_dir``; raises if they cannot serve."""
+    import joblib
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+
+    from .forest import FlatForest
+    from .scoring import LinearScorer
+
+    scaler, model, forest = (joblib.load(os.path.join(version_dir, os.path.basename(path)))
+                             for path in (SCALER_PATH, HEART_MODEL_PATH, FOREST_MODEL_PATH))
+    for path, estimator, expected in ((HEART_MODEL_PATH, model, LogisticRegression),
+                                      (FOREST_MODEL_PATH, forest, RandomForestClassifier)):
+        if not isinstance(estimator, expected):
+            raise ValueError(f"{os.path.basename(path)} in {version_dir} is a {type(estimator).__name__}, "
+                             f"expected a {expected.__name__}")
+    LinearScorer.from_estimators(scaler, model)
+    FlatForest.from_estimator(forest)
+
+
+def install(version_dir):
+    """Replace the top-level artifacts with the ones in ``version_dir``.
+
+    The new set is validated and copied next to the installed files before
+    any of them is touched, so a bad set leaves the old one in place. The
+    three renames then run back to back. Each is atomic, but the set is not:
+    a reader can briefly see the new scaler beside the old models. An existing
+    compact export is regenerated from the new pickles.
+    """
+    validate(version_dir)
+    staged = []
+    try:
+        for destination in (SCALER_PATH, HEART_MODEL_PATH, FOREST_MODEL_PATH):
+            tmp = f"{destination}.{os.getpid()}.tmp"
+            staged.append((tmp, destination))
+            shutil.copyfile(os.path.join(version_dir, os.path.basename(destination)), tmp)
+    except BaseException:
+        for tmp, _ in staged:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        raise
+    for tmp, destination in staged:
+        os.replace(tmp, destination)
+
+    from .compact import COMPACT_PATH, export
+
+    # Keep an existing compact export in step with the pickles it mirrors
+    if os.path.exists(COMPACT_PATH):
+        export(COMPACT_PATH)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train, cross-validate and version the model artifacts.")
+    parser.add_argument("--data", default=DATA_PATH, help="training CSV (default: the reference dataset)")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--output", default=ARTIFACTS_DIR)
+    parser.add_argument("--install", action="store_true", help="replace the artifacts the app loads")
+    args = parser.parse_args(argv)
+
+    target = train(args.data, args.folds, args.jobs, args.output)
+    with open(os.path.join(target, "metadata.json")) as fh:
+        metadata = json.load(fh)
+    for name, m in metadata["metrics"].items():
+        marker = "*" if name == metadata["best_model"] else " "
+        print(f"{marker} {name:20s} accuracy {m['cv_accuracy_mean']:.4f} ± {m['cv_accuracy_std']:.4f}  "
+              f"AUC {m['cv_roc_auc_mean']:.4f}  fit {m['final_fit_seconds']:.2f}s")
+    print(f"wrote {target} in {metadata['training_seconds']:.1f}s on {metadata['workers']} workers")
+    if args.install:
+        install(target)
+        print("installed artifacts")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""What-if projections: how the assessment changes as inputs move toward goals.
+
+From one patient's current inputs and a set of targets, :func:`what_if` builds
+the full factorial grid of counterfactuals in which each goal field moves
+independently from its current value to its target in ``steps`` equal steps
+(rounded to the form's resolution), so ``steps ** len(targets)`` rows. The
+whole grid is scored with one ``predict`` call and one rule evaluation, and
+the result can be sliced into the views the app shows: every goal at once,
+each goal on its own, and the path where all goals advance together.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .assessment import FORM_FIELDS
+from .risk import risk_level
+from .rules import default_engine
+from .schema import FEATURES
+from .scoring import get_serving_scorer
+
+# Inputs a goal can move, and the step the form accepts for each
+GOAL_FIELDS = {"trestbps": 1, "chol": 1, "thalachh": 1, "exercise": 1, "bmi": 0.1}
+
+# Targets used by the Health Improvement Tracker before the user changes them
+DEFAULT_TARGETS = {"trestbps": 120, "chol": 200, "thalachh": 150, "exercise": 5, "bmi": 22.0}
+
+
+@dataclass
+class WhatIf:
+    """Scored counterfactual grid for one patient."""
+
+    fields: tuple             # goal fields, in grid-axis order
+    steps: int
+    fractions: np.ndarray     # (rows, len(fields)) progress toward each target, 0..1
+    columns: dict             # form field -> (rows,) counterfactual inputs
+    probability: np.ndarray   # (rows,)
+    risk_factors: np.ndarray  # (rows,)
+    risk_level: np.ndarray    # (rows,)
+
+    def __len__(self):
+        return len(self.probability)
+
+    def index(self, **progress):
+        """Row with the given step (0..steps-1) per field; unnamed fields stay at 0."""
+        unknown = set(progress) - set(self.fields)
+        if unknown:
+            raise ValueError(f"not a goal field: {', '.join(sorted(unknown))}")
+        position = [progress.get(name, 0) for name in self.fields]
+        return int(np.ravel_multi_index(position, (self.steps,) * len(self.fields)))
+
+    def row(self, i):
+        return {
+            **{name: float(self.columns[name][i]) if GOAL_FIELDS[name] < 1 else int(self.columns[name][i])
+               for name in self.fields},
+            "probability": float(self.probability[i]),
+            "risk_factors": int(self.risk_factors[i]),
+            "risk_level": str(self.risk_level[i]),
+        }
+
+    @property
+    def current(self):
+        return self.row(0)
+
+    @property
+    def goal(self):
+        return self.row(len(self) - 1)
+
+    def single_goals(self):
+        """Outcome of reaching each target on its own, keyed by field."""
+        last = self.steps - 1
+        return {name: self.row(self.index(**{name: last})) for name in self.fields}
+
+    def path(self):
+        """Outcomes as every goal advances together, one per step."""
+        return [self.row(self.index(**{name: k for name in self.fields})) for k in range(self.steps)]
+
+
+def counterfactual_grid(inputs, targets, steps):
+    """Return (fields, fractions, columns) for the grid moving ``inputs`` toward ``targets``."""
+    fields = tuple(name for name in GOAL_FIELDS if name in targets)
+    unknown = set(targets) - set(GOAL_FIELDS)
+    if unknown:
+        raise ValueError(f"not a goal field: {', '.join(sorted(unknown))}")
+    if steps < 2:
+        raise ValueError("steps must be at least 2")
+
+    axes = np.meshgrid(*[np.linspace(0.0, 1.0, steps)] * len(fields), indexing="ij")
+    fractions = np.stack([axis.ravel() for axis in axes], axis=1) if fields else np.zeros((1, 0))
+    n = len(fractions)
+
+    columns = {name: np.repeat(np.asarray([inputs[name]]), n) for name in FORM_FIELDS}
+    for j, name in enumerate(fields):
+        start, resolution = float(inputs[name]), GOAL_FIELDS[name]
+        values = start + fractions[:, j] * (float(targets[name]) - start)
+        columns[name] = np.round(np.round(values / resolution) * resolution, 1)
+    return fields, fractions, columns
+
+
+def what_if(inputs, targets, steps=6, scorer=None, engine=default_engine):
+    """Score every counterfactual between ``inputs`` (all form fields) and ``targets``."""
+    scorer = scorer or get_serving_scorer()
+    fields, fractions, columns = counterfactual_grid(inputs, targets, steps)
+
+    X = np.column_stack([columns[name] for name in FEATURES]).astype(np.float64)
+    _, probability = scorer.predict(X)
+    risk_factors = engine.evaluate(columns).risk_factors
+    return WhatIf(
+        fields=fields,
+        steps=steps,
+        fractions=fractions,
+        columns=columns,
+        probability=probability,
+        risk_factors=risk_factors,
+        risk_level=risk_level(probability, risk_factors),
+    )